@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -123,3 +124,7 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# JSON API erişim anahtarı (products/api.py). MES gibi sistemler "Authorization: Token <anahtar>" başlığı ile erişir.
+# Boş bırakılırsa API'ye yalnızca yönetim paneline giriş yapmış personel erişebilir.
+PRODUCTS_API_TOKEN = os.environ.get('PRODUCTS_API_TOKEN', '')
@@ -1,10 +1,16 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.db.models import Case, F, IntegerField, Value, When
 from .models import (
     Category, Product, BOM, BOMItem, WorkCenter, Operation,
     ProductionLog, ProductionOrder, Customer, SalesOrder,
     Shift, Warehouse, QualityCheck, Employee, StockTransaction,
-    Maintenance, MaintenanceReason, QualityParameter, QualityMeasurement
+    Maintenance, MaintenanceReason, QualityParameter, QualityMeasurement,
+    MRPResult, CostSnapshot, WarehouseStock, ProductionLogSummary, OEEDaily, CostLayer,
+    PurchaseSuggestion
 )
+from .atp import promise
+from .categories import get_tree, subtree_ids
 
 
 admin.site.site_header = "KURUMSAL KAYNAK PLANLAMA YÖNETİM SİSTEMİ"
@@ -29,19 +35,55 @@ class QualityMeasurementInline(admin.TabularInline):
 
 # --- 2. ÜRÜN VE REÇETE YÖNETİMİ ---
 
+class CategoryTreeFilter(admin.SimpleListFilter):
+    # Bir kategori seçildiğinde alt kategorilerindeki ürünler de listelenir.
+    # Alt ağaç bellekteki kategori ağacından bulunur (products/categories.py); ek sorgu çalışmaz.
+    title = "Kategori"
+    parameter_name = 'category'
+
+    def lookups(self, request, model_admin):
+        tree = get_tree()
+        return [(str(pk), "\u2003" * depth + tree.names[pk]) for pk, depth in tree.ordered()]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            try:
+                category_id = int(self.value())
+            except ValueError:
+                raise IncorrectLookupParameters(f"Geçersiz kategori: {self.value()!r}")
+            return queryset.filter(category_id__in=subtree_ids(category_id))
+        return queryset
+
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     # list_display: Tablo listesinde hangi sütunların görüneceğini belirler.
     # stock_status: Models'de yazdığımız otonom özelliği burada sütun olarak görüyoruz.
-    list_display = ('sku', 'name', 'product_type', 'stock_quantity', 'stock_status', 'price')
+    list_display = ('sku', 'name', 'product_type', 'stock_quantity', 'stock_status', 'price', 'stock_value')
     # list_filter: Sağ tarafta hızlı filtreleme kutuları oluşturur.
-    list_filter = ('product_type', 'category')
+    list_filter = ('product_type', 'valuation_method', CategoryTreeFilter)
     # search_fields: Arama kutusunda hangi alanlarda arama yapılacağını belirler.
     search_fields = ('name', 'sku')
+    # Stok miktarı yalnızca stok hareketleriyle değişir; elle değiştirilirse stok değeri ve maliyet katmanlarıyla uyumsuz kalır.
+    readonly_fields = ('stock_quantity',)
+
+    # Stok durumu veritabanında CASE WHEN ile de hesaplanır; böylece sütuna tıklayarak sıralanabilir.
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(stock_rank=Case(
+            When(stock_quantity__lte=0, then=Value(0)),
+            When(stock_quantity__lte=F('min_stock_level'), then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField(),
+        ))
+
+    @admin.display(description="Stok Durumu", ordering='stock_rank')
+    def stock_status(self, obj):
+        return obj.stock_status
 
 @admin.register(BOM)
 class BOMAdmin(admin.ModelAdmin):
     list_display = ('parent_product', 'version', 'is_active')
+    # list_select_related: Ürün bilgisi her satır için ayrı sorgu yerine tek JOIN ile gelir.
+    list_select_related = ('parent_product',)
     # inlines: Reçete içine hem malzemeleri hem operasyonları (rotayı) gömdük.
     inlines = [BOMItemInline, OperationInline]
     search_fields = ['parent_product__name']
@@ -52,9 +94,33 @@ class BOMAdmin(admin.ModelAdmin):
 class ProductionOrderAdmin(admin.ModelAdmin):
     # current_progress ve is_delayed: Üretimin nabzını buradan tutuyoruz. - Otonom
     list_display = ('id', 'product', 'planned_quantity', 'current_progress', 'status', 'due_date', 'is_delayed')
-    list_filter = ('status', 'start_date', 'due_date')
+    list_filter = ('status', 'mrp_generated', 'start_date', 'due_date')
     # readonly_fields: Bu alanlar sistem tarafından hesaplandığı için elle değiştirilmesini engelledik.
     readonly_fields = ('current_progress', 'estimated_total_cost')
+    list_select_related = ('product',)
+
+    # Üretilen miktarlar sorguya eklenir; current_progress satır başına ek sorgu çalıştırmaz.
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_progress()
+
+class ProductionOrderChoiceMixin:
+    # İş emri seçim kutusundaki her satırın adı (__str__) ilerleme yüzdesini içerir.
+    # Seçenekler with_progress() ile tek sorguda hazırlanır.
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'production_order':
+            kwargs['queryset'] = ProductionOrder.objects.with_progress()
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+@admin.register(ProductionLog)
+class ProductionLogAdmin(ProductionOrderChoiceMixin, admin.ModelAdmin):
+    list_display = ('__str__', 'operation', 'shift', 'operator', 'quantity_produced', 'actual_duration')
+    list_filter = ('work_center', 'shift')
+    # __str__ makine adını, operation ise reçetedeki ürün adını kullanır.
+    list_select_related = ('work_center', 'operation__bom__parent_product', 'shift', 'operator')
+
+@admin.register(QualityCheck)
+class QualityCheckAdmin(ProductionOrderChoiceMixin, admin.ModelAdmin):
+    pass
 
 @admin.register(WorkCenter)
 class WorkCenterAdmin(admin.ModelAdmin):
@@ -65,22 +131,111 @@ class WorkCenterAdmin(admin.ModelAdmin):
 
 @admin.register(StockTransaction)
 class StockTransactionAdmin(admin.ModelAdmin):
-    list_display = ('product', 'quantity', 'transaction_type', 'warehouse', 'created_at')
+    list_display = ('product', 'quantity', 'transaction_type', 'unit_cost', 'warehouse', 'created_at')
     list_filter = ('transaction_type', 'warehouse')
+    list_select_related = ('product', 'warehouse')
     # Veri girişini kolaylaştırmak için ürünleri aratıyoruz.
     autocomplete_fields = ['product']
 
-# --- 5. DİĞER TEMEL KAYITLAR ---
+@admin.register(WarehouseStock)
+class WarehouseStockAdmin(admin.ModelAdmin):
+    # Depo bakiyeleri stok hareketlerinden otomatik hesaplanır, elle değiştirilmez.
+    list_display = ('product', 'warehouse', 'quantity')
+    list_filter = ('warehouse',)
+    list_select_related = ('product', 'warehouse')
+    search_fields = ('product__name', 'product__sku')
+    readonly_fields = ('product', 'warehouse', 'quantity')
+
+@admin.register(CostLayer)
+class CostLayerAdmin(admin.ModelAdmin):
+    # FIFO katmanları stok hareketlerinden otomatik oluşur, elle değiştirilmez.
+    list_display = ('product', 'quantity', 'remaining_quantity', 'unit_cost', 'created_at')
+    list_select_related = ('product',)
+    search_fields = ('product__name', 'product__sku')
+    readonly_fields = ('product', 'source', 'quantity', 'remaining_quantity', 'unit_cost')
+
+# --- 5. PLANLAMA SONUÇLARI ---
+
+@admin.register(MRPResult)
+class MRPResultAdmin(admin.ModelAdmin):
+    # Sonuçlar "run_mrp" komutu ile üretilir, elle düzenlenmez.
+    list_display = ('product', 'open_demand', 'in_production', 'net_requirement', 'calculated_at')
+    list_select_related = ('product',)
+    search_fields = ('product__name', 'product__sku')
+    readonly_fields = ('product', 'open_demand', 'in_production', 'net_requirement', 'calculated_at')
+
+@admin.register(PurchaseSuggestion)
+class PurchaseSuggestionAdmin(admin.ModelAdmin):
+    # Öneriler "run_mrp --time-phased" komutu ile üretilir, her çalışmada yenilenir.
+    list_display = ('product', 'quantity', 'order_date', 'due_date', 'calculated_at')
+    list_filter = ('order_date',)
+    list_select_related = ('product',)
+    search_fields = ('product__name', 'product__sku')
+    readonly_fields = ('product', 'quantity', 'order_date', 'due_date', 'calculated_at')
+
+@admin.register(CostSnapshot)
+class CostSnapshotAdmin(admin.ModelAdmin):
+    # Maliyet kartları "rollup_costs" komutu ile üretilir.
+    list_display = ('product', 'bom_version', 'material_cost', 'labor_cost', 'setup_cost', 'is_stale', 'calculated_at')
+    list_filter = ('is_stale',)
+    list_select_related = ('product',)
+    search_fields = ('product__name', 'product__sku')
+    readonly_fields = ('product', 'bom_version', 'material_cost', 'labor_cost', 'setup_cost', 'is_stale', 'calculated_at')
+
+@admin.register(ProductionLogSummary)
+class ProductionLogSummaryAdmin(admin.ModelAdmin):
+    # Aylık özetler "archive_production_logs" komutu ile üretilir.
+    list_display = ('month', 'work_center', 'operation', 'shift', 'log_count', 'planned_duration_total', 'actual_duration_total', 'quantity_produced_total')
+    list_filter = ('month', 'work_center')
+    list_select_related = ('work_center', 'operation__bom__parent_product', 'shift')
+    readonly_fields = ('month', 'work_center', 'operation', 'shift', 'log_count', 'planned_duration_total', 'actual_duration_total', 'quantity_produced_total')
+
+@admin.register(OEEDaily)
+class OEEDailyAdmin(admin.ModelAdmin):
+    # Günlük OEE değerleri "refresh_oee" komutu ile hesaplanır.
+    list_display = ('date', 'work_center', 'shift', 'availability', 'performance', 'quality', 'oee')
+    list_filter = ('work_center', 'shift', 'date')
+    list_select_related = ('work_center', 'shift')
+    readonly_fields = ('work_center', 'shift', 'date', 'planned_minutes', 'downtime_minutes', 'ideal_minutes',
+                       'produced_quantity', 'good_quantity', 'availability', 'performance', 'quality', 'oee')
+
+# --- 6. DİĞER TEMEL KAYITLAR ---
 # Basit kayıtlar için standart admin kaydı yeterlidir.
 
+@admin.register(SalesOrder)
+class SalesOrderAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'product', 'quantity', 'delivery_date', 'is_shipped')
+    list_filter = ('is_shipped',)
+    # __str__ müşteri adını kullanır.
+    list_select_related = ('customer', 'product')
+
+    # Kayıttan sonra söz verilen teslim tarihi ATP ile kontrol edilir; tutulamayacaksa uyarı gösterilir.
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if obj.is_shipped:
+            return
+        result = promise(obj.product_id, obj.quantity, obj.delivery_date, exclude_order_id=obj.pk)
+        if not result.is_feasible:
+            if result.promise_date is None:
+                earliest = "belirlenemedi (ürünün tedarik süresi tanımlı değil)"
+            else:
+                earliest = f"{result.promise_date:%d.%m.%Y}{' (yeni üretim/tedarik ile)' if result.source == 'CTP' else ''}"
+            self.message_user(request, (
+                f"{obj.product} için {obj.delivery_date:%d.%m.%Y} tarihinde yalnızca {result.available_on_requested:.2f} adet "
+                f"sözü verilebilir. En erken teslim tarihi: {earliest}"
+            ), messages.WARNING)
+
+@admin.register(Maintenance)
+class MaintenanceAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'work_center', 'maintenance_type', 'downtime_minutes', 'created_at')
+    list_filter = ('maintenance_type', 'work_center')
+    # __str__ arıza nedenini kullanır.
+    list_select_related = ('reason', 'work_center')
+
 admin.site.register(Category)
 admin.site.register(Customer)
-admin.site.register(SalesOrder)
 admin.site.register(Employee)
 admin.site.register(Shift)
 admin.site.register(Warehouse)
-admin.site.register(QualityCheck)
-admin.site.register(Maintenance)
 admin.site.register(MaintenanceReason)
-admin.site.register(ProductionLog)
 admin.site.register(QualityParameter)
\ No newline at end of file
@@ -0,0 +1,199 @@
+# Salt Okunur JSON API
+# MES ve gösterge panelleri (dashboard) için ürün, reçete, üretim emri ve stok hareketi listeleri.
+# - Sayfalama anahtar tabanlıdır (keyset/cursor): OFFSET yerine "id > son görülen id" ile okunur; sayfa ne kadar ileride
+#   olursa olsun sorgu aynı hızdadır ve sayfalar arasında eklenen kayıtlar satır kaydırmaz.
+# - Yalnızca gereken alanlar values()/only() ile okunur, reçete kalemleri ve operasyonlar prefetch ile toplu gelir.
+# - Her yanıt ETag taşır. İstemci If-None-Match gönderirse ve sayfa değişmediyse 304 (gövdesiz) döner.
+import hashlib
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import wraps
+from hmac import compare_digest
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from .models import BOM, BOMItem, Operation, Product, ProductionOrder, StockTransaction
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+# --- YARDIMCILAR ---
+
+def api_authorized(request):
+    """Yönetim paneline giriş yapmış personel veya 'Authorization: Token <PRODUCTS_API_TOKEN>' başlığı ile erişilir."""
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    token = getattr(settings, 'PRODUCTS_API_TOKEN', None)
+    header = request.headers.get('Authorization', '')
+    return bool(token) and header.startswith('Token ') and compare_digest(header[len('Token '):], token)
+
+
+def _error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def api_view(view):
+    """GET dışındaki istekleri, yetkisiz erişimi ve hatalı parametreleri JSON hata yanıtına çevirir."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return _error("Yalnızca GET desteklenir.", 405)
+        if not api_authorized(request):
+            return _error("Yetkisiz erişim.", 401)
+        try:
+            return view(request, *args, **kwargs)
+        except ValueError as exc:
+            return _error(str(exc), 400)
+    return wrapper
+
+
+def encode_cursor(pk):
+    return urlsafe_b64encode(str(pk).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        return int(urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Geçersiz cursor.")
+
+
+def _int_param(request, name, default=None):
+    value = request.GET.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"'{name}' bir sayı olmalı.")
+
+
+def paginate(request, queryset, key='pk'):
+    """
+    Anahtar tabanlı sayfalama. Bir fazla satır okunarak sonraki sayfanın olup olmadığı anlaşılır.
+    Dönüş: (satırlar, sonraki sayfanın adresi veya None)
+    """
+    limit = min(max(_int_param(request, 'limit', PAGE_SIZE), 1), MAX_PAGE_SIZE)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        queryset = queryset.filter(**{f'{key}__gt': decode_cursor(cursor)})
+    rows = list(queryset.order_by(key)[:limit + 1])
+
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        params = request.GET.copy()
+        params['cursor'] = encode_cursor(last[key] if isinstance(last, dict) else getattr(last, key))
+        next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+    return rows, next_url
+
+
+def json_response(request, data):
+    """JSON yanıtı ETag ile döner. İçerik istemcideki sürümle aynıysa 304 Not Modified döner."""
+    body = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False).encode()
+    etag = quote_etag(hashlib.md5(body, usedforsecurity=False).hexdigest())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    # İstemci her seferinde doğrulama yapsın; değişmeyen sayfa için yalnızca 304 gider.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _page(request, queryset, serialize=None, key='pk'):
+    rows, next_url = paginate(request, queryset, key)
+    return json_response(request, {
+        'results': [serialize(row) for row in rows] if serialize else rows,
+        'next': next_url,
+    })
+
+
+# --- UÇ NOKTALAR ---
+
+@api_view
+def product_list(request):
+    """?type=RAW|SEMI|FINAL, ?category=<id>"""
+    products = Product.objects.all()
+    if request.GET.get('type'):
+        products = products.filter(product_type=request.GET['type'])
+    if request.GET.get('category'):
+        products = products.filter(category_id=_int_param(request, 'category'))
+    return _page(request, products.values(
+        'id', 'sku', 'name', 'product_type', 'category_id', 'price',
+        'stock_quantity', 'min_stock_level', 'lead_time', 'low_level_code',
+    ), key='id')
+
+
+def _serialize_bom(bom):
+    return {
+        'id': bom.pk,
+        'product_id': bom.parent_product_id,
+        'product_sku': bom.parent_product.sku,
+        'version': bom.version,
+        'is_active': bom.is_active,
+        'items': [
+            {'product_id': item.child_product_id, 'product_sku': item.child_product.sku,
+             'quantity': item.quantity, 'scrap_factor': item.scrap_factor}
+            for item in bom.items.all()
+        ],
+        'operations': [
+            {'step_number': operation.step_number, 'work_center_id': operation.work_center_id, 'description': operation.description,
+             'setup_time': operation.setup_time, 'cycle_time': operation.cycle_time}
+            for operation in bom.operations.all()
+        ],
+    }
+
+
+@api_view
+def bom_list(request):
+    """Kalemler ve operasyonlar iç içe döner. ?product=<id>, ?active=1"""
+    boms = (BOM.objects.select_related('parent_product')
+            .only('id', 'version', 'is_active', 'parent_product__sku')
+            .prefetch_related(
+                Prefetch('items', queryset=BOMItem.objects.select_related('child_product')
+                         .only('id', 'bom_id', 'quantity', 'scrap_factor', 'child_product__sku').order_by('id')),
+                Prefetch('operations', queryset=Operation.objects
+                         .only('id', 'bom_id', 'step_number', 'work_center_id', 'description', 'setup_time', 'cycle_time').order_by('step_number')),
+            ))
+    if request.GET.get('product'):
+        boms = boms.filter(parent_product_id=_int_param(request, 'product'))
+    if request.GET.get('active'):
+        boms = boms.filter(is_active=request.GET['active'] in ('1', 'true'))
+    return _page(request, boms, _serialize_bom)
+
+
+@api_view
+def production_order_list(request):
+    """Üretilen toplam miktar (produced_quantity_total) dahil. ?status=PLANNED, ?product=<id>"""
+    orders = ProductionOrder.objects.with_progress()
+    if request.GET.get('status'):
+        orders = orders.filter(status=request.GET['status'])
+    if request.GET.get('product'):
+        orders = orders.filter(product_id=_int_param(request, 'product'))
+    return _page(request, orders.values(
+        'id', 'product_id', 'planned_quantity', 'status', 'start_date', 'due_date',
+        'scheduled_start_date', 'scheduled_end_date', 'produced_quantity_total',
+    ), key='id')
+
+
+@api_view
+def stock_transaction_list(request):
+    """?product=<id>, ?warehouse=<id>, ?type=IN|OUT|SCRAP|ADJ"""
+    transactions = StockTransaction.objects.all()
+    if request.GET.get('product'):
+        transactions = transactions.filter(product_id=_int_param(request, 'product'))
+    if request.GET.get('warehouse'):
+        transactions = transactions.filter(warehouse_id=_int_param(request, 'warehouse'))
+    if request.GET.get('type'):
+        transactions = transactions.filter(transaction_type=request.GET['type'])
+    return _page(request, transactions.values(
+        'id', 'product_id', 'warehouse_id', 'transaction_type', 'quantity', 'notes', 'created_at',
+    ), key='id')
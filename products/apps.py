@@ -4,3 +4,7 @@ class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products'
     verbose_name = 'Üretim ve Stok Yönetimi'
+
+    def ready(self):
+        # Sinyal alıcılarını (türetilmiş tabloların güncellenmesi) kaydeder.
+        from . import signals  # noqa: F401
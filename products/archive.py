@@ -0,0 +1,142 @@
+# Üretim Kaydı Arşivi
+# Üretim kayıtları (ProductionLog) her gün on binlerce satır büyür. Kapanmış aylar makine/operasyon/vardiya bazında
+# aylık özet satırlarına (ProductionLogSummary) toplanır; istenirse ayrıntı satırları silinerek sıcak tablo küçük tutulur.
+# Geçmiş raporlar özetleri, güncel sorgular ise yalnızca son ayların ayrıntı kayıtlarını okur.
+# Yalnızca kapanmış (tamamlanan/iptal edilen) iş emirlerinin kayıtları silinir; açık iş emirlerinin ilerlemesi
+# (ProductionOrder.current_progress) ayrıntı kayıtlarından hesaplandığı için bu kayıtlar emir kapanana kadar kalır.
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time
+
+from django.db import transaction
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import ProductionLog, ProductionLogSummary
+from .oee import refresh_oee_days
+from .signals import invalidate_log_caches, stats_signals_suspended
+from .stats import refresh_operation_stats, refresh_work_center_stats
+
+# Kayıtları silinebilecek iş emri durumları.
+CLOSED_ORDER_STATUSES = ['COMPLETED', 'CANCELLED']
+
+SUMMARY_TOTALS = {
+    'log_count': Count('id'),
+    'planned_duration_total': Sum('planned_duration'),
+    'actual_duration_total': Sum('actual_duration'),
+    'quantity_produced_total': Sum('quantity_produced'),
+}
+
+
+@dataclass
+class ArchivedMonth:
+    month: date
+    summary_rows: int
+    purged_logs: int
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(month, count):
+    years, index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, index + 1, 1)
+
+
+def month_boundary(month):
+    """Ayın başladığı an (Yerel saat ile ayın ilk günü 00:00)."""
+    return timezone.make_aware(datetime.combine(month, time.min))
+
+
+def logs_in_month(month):
+    return ProductionLog.objects.filter(created_at__gte=month_boundary(month), created_at__lt=month_boundary(add_months(month, 1)))
+
+
+def archivable_months(before):
+    """before ayından önceki, ayrıntı kaydı hâlâ bulunan aylar."""
+    logs = ProductionLog.objects.filter(created_at__lt=month_boundary(before))
+    months = logs.annotate(month=TruncMonth('created_at', output_field=DateField())).values_list('month', flat=True)
+    return list(months.distinct().order_by('month'))
+
+
+def summarize_month(month):
+    """Ayın özet satırlarını ayrıntı kayıtlarından baştan oluşturur. (Tek gruplu sorgu + toplu kayıt)"""
+    rows = logs_in_month(month).values('work_center_id', 'operation_id', 'shift_id').annotate(**SUMMARY_TOTALS).order_by()
+    summaries = [ProductionLogSummary(month=month, **row) for row in rows]
+    with transaction.atomic():
+        ProductionLogSummary.objects.filter(month=month).delete()
+        ProductionLogSummary.objects.bulk_create(summaries, batch_size=1000)
+    return len(summaries)
+
+
+def purge_month(month, batch_size=5000):
+    """
+    Özetlenmiş ayın ayrıntı kayıtlarını parça parça siler. İş emri açık olan kayıtlar silinmez.
+    Silme sinyalleri kayıt başına istatistik yenilemesin diye askıya alınır; etkilenen makine ve operasyonlar en sonda bir kez yenilenir.
+    Askıdayken OEE günleri işaretlenmez. Silinen kayıtların makine-günleri silmeden önce hesaplanır; böylece bekleyen
+    işaretler ayrıntı kayıtları varken işlenir ve geçmiş OEE değerleri silinen kayıtlar yüzünden sıfırlanmaz.
+    """
+    logs = logs_in_month(month).filter(Q(production_order__isnull=True) | Q(production_order__status__in=CLOSED_ORDER_STATUSES))
+    refresh_oee_days(logs.annotate(day=TruncDate('created_at')).values_list('work_center_id', 'day').distinct())
+    work_center_ids = set(logs.values_list('work_center_id', flat=True).distinct())
+    operation_ids = set(logs.filter(operation__isnull=False).values_list('operation_id', flat=True).distinct())
+    order_ids = set(logs.filter(production_order__isnull=False).values_list('production_order_id', flat=True).distinct())
+
+    purged = 0
+    with stats_signals_suspended():
+        while True:
+            ids = list(logs.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            ProductionLog.objects.filter(pk__in=ids).delete()
+            purged += len(ids)
+
+    refresh_work_center_stats(work_center_ids)
+    refresh_operation_stats(operation_ids)
+    invalidate_log_caches(work_center_ids, order_ids)
+    return purged
+
+
+def archive_production_logs(keep_months=3, purge=False, today=None):
+    """
+    Son keep_months kapanmış ay ve içinde bulunulan ay dışındaki ayları özetler.
+    Daha önce özetlenmiş aylar tekrar özetlenmez: Ayın bir kısmı silinmiş olabilir, özet tüm ayı kapsar.
+    purge=True ise özetlenmiş ayların kapanmış iş emirlerine ait ayrıntı kayıtları silinir. Önceki çalışmalarda
+    açık olduğu için kalan kayıtlar, iş emri kapandıktan sonraki çalışmada silinir.
+    """
+    before = add_months(month_start(today or timezone.localdate()), -keep_months)
+    summarized = set(ProductionLogSummary.objects.filter(month__lt=before).values_list('month', flat=True).distinct())
+    archived = []
+    for month in archivable_months(before):
+        summary_rows = 0 if month in summarized else summarize_month(month)
+        purged_logs = purge_month(month) if purge else 0
+        if summary_rows or purged_logs:
+            archived.append(ArchivedMonth(month, summary_rows, purged_logs))
+    return archived
+
+
+def monthly_totals(start, end, work_center_ids=None):
+    """
+    [start, end) ayları için makine bazında aylık toplamlar: {(ay, makine_id): {log_count, planned_duration_total, ...}}
+    Özeti bulunan aylar özet tablosundan, diğerleri ayrıntı kayıtlarından tek gruplu sorguyla okunur.
+    """
+    summaries = ProductionLogSummary.objects.filter(month__gte=start, month__lt=end)
+    logs = ProductionLog.objects.filter(created_at__gte=month_boundary(start), created_at__lt=month_boundary(end))
+    if work_center_ids is not None:
+        summaries = summaries.filter(work_center_id__in=work_center_ids)
+        logs = logs.filter(work_center_id__in=work_center_ids)
+
+    totals = defaultdict(lambda: dict.fromkeys(SUMMARY_TOTALS, 0))
+    rows = summaries.values('month', 'work_center_id').annotate(**{field: Sum(field) for field in SUMMARY_TOTALS}).order_by()
+    for row in rows:
+        totals[(row.pop('month'), row.pop('work_center_id'))].update(row)
+
+    summarized = set(ProductionLogSummary.objects.filter(month__gte=start, month__lt=end).values_list('month', flat=True).distinct())
+    rows = (logs.annotate(month=TruncMonth('created_at', output_field=DateField()))
+            .values('month', 'work_center_id').annotate(**SUMMARY_TOTALS).order_by())
+    for row in rows:
+        if row['month'] not in summarized:
+            totals[(row.pop('month'), row.pop('work_center_id'))].update(row)
+    return dict(totals)
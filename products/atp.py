@@ -0,0 +1,190 @@
+# Teslim Tarihi Verme (ATP: Available-to-Promise / CTP: Capable-to-Promise)
+# Satış siparişi girilirken istenen teslim tarihinin tutulup tutulamayacağını hesaplar.
+# Her ürün için zaman çizelgesi (time-phased) tutulur: Açık satış siparişleri teslim tarihinde stoktan düşer,
+# devam eden iş emirleri (kalan miktar) bitiş tarihinde stoğa eklenir. Öngörülen Stok Bakiyesi (PAB) bu olayların
+# kümülatif toplamıdır.
+# Çizelgeler süreç içi bellekte tutulur ve ürün bazında yenilenir: Sipariş veya iş emri değiştiğinde sinyal yalnızca o
+# ürünü kirli (dirty) işaretler; ürün bir sonraki sorguda indeksli iki sorguyla yeniden okunur. Stok miktarı her sorguda
+# güncel okunur. Diğer süreçlerdeki (gunicorn worker) kopyalar en geç ATP_CACHE_SECONDS sonra yenilenir.
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .models import Product, ProductionOrder, SalesOrder
+
+ATP_CACHE_SECONDS = 300
+# Öngörülen bakiyeye giren (henüz bitmemiş) iş emri durumları. (MRP ile aynı)
+SUPPLY_STATUSES = ['PLANNED', 'IN_PROGRESS']
+ZERO = Decimal('0')
+
+
+@dataclass(frozen=True)
+class Promise:
+    product_id: int
+    quantity: Decimal
+    requested_date: date
+    # Verilebilecek en erken teslim tarihi. (None: Planlı üretim yetmiyor ve tedarik süresi tanımlı değil)
+    promise_date: date | None
+    # 'ATP': Mevcut stok ve planlı üretimden karşılanır. 'CTP': Yeni üretim/tedarik gerekir. (Tedarik süresi kadar sonra)
+    source: str | None
+    # İstenen tarihte sözü verilebilecek miktar.
+    available_on_requested: Decimal
+
+    @property
+    def is_feasible(self):
+        return self.promise_date is not None and self.promise_date <= self.requested_date
+
+
+class ProductTimeline:
+    """
+    Bir ürünün sipariş ve iş emri olaylarının tarih sıralı hali.
+    totals[i]: dates[i] gününe kadar (dahil) olayların kümülatif net değişimi.
+    floor[i] = min(totals[i:]) : i. günden sonra hiçbir günün bakiyesi bundan aşağı inmez.
+    """
+
+    def __init__(self, events):
+        # events: [(tarih, değişim, satış siparişi id veya None), ...]
+        self.events = events
+        by_date = {}
+        for day, change, _ in events:
+            by_date[day] = by_date.get(day, ZERO) + change
+        self.dates = sorted(by_date)
+        self.totals = []
+        total = ZERO
+        for day in self.dates:
+            total += by_date[day]
+            self.totals.append(total)
+        self.floor = list(self.totals)
+        for i in range(len(self.floor) - 2, -1, -1):
+            self.floor[i] = min(self.floor[i], self.floor[i + 1])
+        self.created = time.monotonic()
+
+    def without(self, sales_order_id):
+        """Bir satış siparişi hariç çizelge. (Düzenlenen siparişin kendi talebi sayılmasın diye)"""
+        return ProductTimeline([event for event in self.events if event[2] != sales_order_id])
+
+    def available(self, stock, day):
+        """
+        Verilen gün sözü verilebilecek miktar: O günden sonraki en düşük öngörülen bakiye.
+        (Bu günde verilen söz, sonraki tüm günlerin bakiyesini düşürür; hiçbir mevcut sipariş açıkta kalmamalıdır.)
+        """
+        i = bisect_right(self.dates, day)
+        balance = stock + (self.totals[i - 1] if i else ZERO)
+        if i < len(self.floor):
+            balance = min(balance, stock + self.floor[i])
+        return balance
+
+    def earliest(self, stock, quantity, day):
+        """available(gün) >= miktar olan en erken gün (>= day). Yoksa None. (İkili arama; available tarihle azalmaz)"""
+        if self.available(stock, day) >= quantity:
+            return day
+        start = bisect_right(self.dates, day)
+        # floor artan (azalmayan) bir dizidir; koşulu sağlayan ilk olay günü aranır.
+        low, high = start, len(self.dates)
+        while low < high:
+            middle = (low + high) // 2
+            if stock + self.floor[middle] >= quantity:
+                high = middle
+            else:
+                low = middle + 1
+        return self.dates[low] if low < len(self.dates) else None
+
+
+def _load_events(product_ids):
+    """Ürünlerin açık sipariş ve iş emri olaylarını (indeksli iki sorgu) okur. {ürün_id: [(tarih, değişim, sipariş_id), ...]}"""
+    events = {product_id: [] for product_id in product_ids}
+    orders = SalesOrder.objects.filter(is_shipped=False, product_id__in=product_ids).values_list(
+        'product_id', 'delivery_date', 'quantity', 'pk')
+    for product_id, day, quantity, pk in orders:
+        events[product_id].append((day, -quantity, pk))
+    supply = ProductionOrder.objects.filter(status__in=SUPPLY_STATUSES, product_id__in=product_ids).values_list(
+        'product_id', 'scheduled_end_date', 'due_date', 'planned_quantity', 'actual_quantity')
+    for product_id, scheduled_end, due_date, planned, actual in supply:
+        # Çizelgelenmiş iş emirleri çizelge bitişinde, diğerleri teslim tarihinde stoğa girer.
+        if planned > actual:
+            events[product_id].append((scheduled_end or due_date, planned - actual, None))
+    return events
+
+
+class ATPIndex:
+    """Ürün bazında çizelgelerin süreç içi önbelleği."""
+
+    def __init__(self):
+        self.timelines = {}
+        self.lock = threading.Lock()
+
+    def invalidate(self, product_ids=None):
+        with self.lock:
+            if product_ids is None:
+                self.timelines = {}
+            else:
+                for product_id in product_ids:
+                    self.timelines.pop(product_id, None)
+
+    def timelines_for(self, product_ids):
+        now = time.monotonic()
+        found, missing = {}, []
+        for product_id in product_ids:
+            timeline = self.timelines.get(product_id)
+            if timeline is None or now - timeline.created > ATP_CACHE_SECONDS:
+                missing.append(product_id)
+            else:
+                found[product_id] = timeline
+        if missing:
+            loaded = {product_id: ProductTimeline(events) for product_id, events in _load_events(missing).items()}
+            with self.lock:
+                self.timelines.update(loaded)
+            found.update(loaded)
+        return found
+
+    def warm(self, product_ids=None):
+        """Çizelgeleri önceden yükler. (Örn: Sunucu açılışında veya toplu veri aktarımından sonra)"""
+        if product_ids is None:
+            product_ids = list(Product.objects.filter(product_type='FINAL').values_list('pk', flat=True))
+        self.invalidate(product_ids)
+        return len(self.timelines_for(product_ids))
+
+
+_index = ATPIndex()
+
+
+def invalidate_atp(product_ids=None):
+    """Ürünlerin (None ise tümünün) çizelgesini kirli işaretler. Bir sonraki sorguda yeniden okunur."""
+    _index.invalidate(product_ids)
+
+
+def warm_atp(product_ids=None):
+    return _index.warm(product_ids)
+
+
+def promise(product_id, quantity, requested_date=None, exclude_order_id=None, today=None):
+    """
+    Verilen miktar için en erken teslim tarihini hesaplar. (Önbellek sıcakken ürün başına tek sorgu: güncel stok)
+    Önce mevcut stok ve planlı üretimle (ATP) bakılır; karşılanamıyorsa yeni üretim/tedarik için tedarik süresi
+    kadar sonrası (CTP) verilir. Tedarik süresi girilmemiş (0) ürünlerde yeni üretimin ne zaman geleceği bilinmediği
+    için CTP verilmez; ATP de yetmiyorsa tarih boş (None) döner. exclude_order_id: Düzenlenen siparişin kendi talebi hesaba katılmaz.
+    """
+    today = today or timezone.localdate()
+    requested_date = max(requested_date or today, today)
+    quantity = Decimal(quantity)
+    stock, lead_time = Product.objects.filter(pk=product_id).values_list('stock_quantity', 'lead_time').get()
+
+    timeline = _index.timelines_for([product_id])[product_id]
+    if exclude_order_id is not None:
+        timeline = timeline.without(exclude_order_id)
+
+    available = max(timeline.available(stock, requested_date), ZERO)
+    promise_date, source = timeline.earliest(stock, quantity, requested_date), 'ATP'
+    if promise_date is None:
+        source = None
+    # Yeni üretim tedarik süresi sonunda gelir; o günden itibaren söz verilen miktarı kendisi karşılar.
+    if lead_time:
+        capable_date = max(requested_date, today + timedelta(days=lead_time))
+        if promise_date is None or capable_date < promise_date:
+            promise_date, source = capable_date, 'CTP'
+    return Promise(product_id, quantity, requested_date, promise_date, source, available)
@@ -0,0 +1,272 @@
+# Performans Ölçüm (Benchmark) Altyapısı
+# Gerçekçi boyutta sentetik bir veri seti üretir ve sık kullanılan hesapların süresini ve sorgu sayısını ölçer.
+# Sonuçlar JSON olarak yazılır; sürümler arasında karşılaştırılarak performans gerilemeleri yakalanır.
+import random
+import time
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Sum
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .bom import rebuild_closure, update_low_level_codes
+from .costing import save_cost_snapshots
+from .models import (
+    BOM, BOMItem, Customer, Operation, Product, ProductionLog, ProductionOrder,
+    SalesOrder, Shift, StockTransaction, Warehouse, WorkCenter
+)
+from .mrp import ACTIVE_PRODUCTION_STATUSES, calculate_net_requirements, run_mrp
+from .stats import refresh_operation_stats, refresh_work_center_stats
+from .stock import end_of_day, post_transactions
+
+# scale=1.0 için veri seti boyutları.
+FULL_SIZES = {
+    'products': 50_000,
+    'boms': 5_000,
+    'bom_items_per_bom': 5,
+    'operations_per_bom': 3,
+    'work_centers': 50,
+    'production_orders': 20_000,
+    'sales_orders': 20_000,
+    'production_logs': 1_000_000,
+    'stock_transactions': 2_000_000,
+}
+
+CHUNK_SIZE = 50_000
+
+# Sorgu indeksleri (Meta.indexes) tanımlı modeller. --without-indexes karşılaştırmasında bu indeksler kaldırılır.
+INDEXED_MODELS = [ProductionLog, ProductionOrder, SalesOrder, StockTransaction]
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    wall_ms: float
+    queries: int
+    rows: int
+
+
+def dataset_sizes(scale):
+    sizes = {key: max(int(value * scale), 1) for key, value in FULL_SIZES.items()}
+    sizes['bom_items_per_bom'] = FULL_SIZES['bom_items_per_bom']
+    sizes['operations_per_bom'] = FULL_SIZES['operations_per_bom']
+    # Her reçetenin bir ana ürünü olmalı.
+    sizes['boms'] = min(sizes['boms'], sizes['products'] // 2)
+    return sizes
+
+
+def _bulk(model, objects):
+    model.objects.bulk_create(objects, batch_size=2000)
+
+
+def generate_dataset(sizes, seed=42):
+    """
+    Sentetik veri setini toplu kayıt (bulk_create) ile üretir. Toplu kayıt sinyalleri tetiklemediği için
+    türetilmiş tablolar (düzleştirilmiş ağaç, istatistikler, maliyet kartları) en sonda baştan hesaplanır.
+    """
+    rng = random.Random(seed)
+    today = timezone.localdate()
+
+    _bulk(WorkCenter, [WorkCenter(code=f"WC-{i}", name=f"Merkez {i}", daily_capacity_hours=Decimal('16'), hourly_rate=Decimal(rng.randint(50, 500)))
+                       for i in range(sizes['work_centers'])])
+    _bulk(Warehouse, [Warehouse(name=f"Depo {i}", warehouse_type=code) for i, code in enumerate(['RAW', 'WIP', 'FINAL', 'SCRAP'])])
+    _bulk(Shift, [Shift(name=name, start_time=f"{hour:02d}:00", end_time=f"{(hour + 8) % 24:02d}:00") for name, hour in [("Sabah", 0), ("Akşam", 8), ("Gece", 16)]])
+    customer = Customer.objects.create(name="Benchmark Müşterisi")
+
+    # İlk ürünler mamul, sonrakiler yarı mamul, kalanlar hammadde. Bileşen her zaman daha büyük sıradaki üründen seçilir (döngü oluşmaz).
+    boms = sizes['boms']
+    product_count = sizes['products']
+    for start in range(0, product_count, CHUNK_SIZE):
+        _bulk(Product, [
+            Product(
+                name=f"Ürün {i}", sku=f"BM-{i}",
+                product_type='FINAL' if i < boms // 2 else 'SEMI' if i < boms else 'RAW',
+                price=Decimal(rng.randint(1, 1000)), stock_quantity=Decimal(rng.randint(0, 500)),
+                min_stock_level=Decimal(rng.randint(0, 50)), lead_time=rng.randint(0, 20),
+            )
+            for i in range(start, min(start + CHUNK_SIZE, product_count))
+        ])
+
+    product_ids = list(Product.objects.order_by('id').values_list('id', flat=True))
+    work_center_ids = list(WorkCenter.objects.values_list('id', flat=True))
+    warehouse_ids = list(Warehouse.objects.values_list('id', flat=True))
+    shift_ids = list(Shift.objects.values_list('id', flat=True))
+
+    _bulk(BOM, [BOM(parent_product_id=product_ids[i]) for i in range(boms)])
+    bom_ids = dict(BOM.objects.values_list('parent_product_id', 'id'))
+    items, operations = [], []
+    for i in range(boms):
+        bom_id = bom_ids[product_ids[i]]
+        for child in rng.sample(range(i + 1, product_count), min(sizes['bom_items_per_bom'], product_count - i - 1)):
+            items.append(BOMItem(bom_id=bom_id, child_product_id=product_ids[child], quantity=Decimal(rng.randint(1, 5)), scrap_factor=Decimal(rng.choice([0, 0, 2, 5]))))
+        for step in range(sizes['operations_per_bom']):
+            operations.append(Operation(bom_id=bom_id, work_center_id=rng.choice(work_center_ids), step_number=step + 1, description=f"Adım {step + 1}",
+                                        setup_time=Decimal(rng.randint(0, 60)), cycle_time=Decimal(rng.randint(1, 10))))
+    _bulk(BOMItem, items)
+    _bulk(Operation, operations)
+
+    manufactured = product_ids[:boms]
+    finals = product_ids[:max(boms // 2, 1)]
+    _bulk(ProductionOrder, [
+        ProductionOrder(product_id=rng.choice(manufactured), planned_quantity=Decimal(rng.randint(10, 500)),
+                        start_date=today + timedelta(days=rng.randint(-30, 30)), due_date=today + timedelta(days=rng.randint(0, 90)),
+                        status=rng.choice(['DRAFT', 'PLANNED', 'PLANNED', 'IN_PROGRESS', 'COMPLETED']))
+        for _ in range(sizes['production_orders'])
+    ])
+    _bulk(SalesOrder, [
+        SalesOrder(customer=customer, product_id=rng.choice(finals), quantity=Decimal(rng.randint(1, 100)),
+                   delivery_date=today + timedelta(days=rng.randint(0, 120)), is_shipped=rng.random() < 0.3)
+        for _ in range(sizes['sales_orders'])
+    ])
+
+    order_rows = list(ProductionOrder.objects.values_list('id', 'product_id'))
+    operations_by_product = {}
+    for operation_id, product_id, wc_id in Operation.objects.values_list('id', 'bom__parent_product_id', 'work_center_id'):
+        operations_by_product.setdefault(product_id, []).append((operation_id, wc_id))
+
+    for start in range(0, sizes['production_logs'], CHUNK_SIZE):
+        logs = []
+        for _ in range(min(CHUNK_SIZE, sizes['production_logs'] - start)):
+            order_id, product_id = rng.choice(order_rows)
+            operation_id, wc_id = rng.choice(operations_by_product[product_id])
+            planned = Decimal(rng.randint(10, 120))
+            logs.append(ProductionLog(production_order_id=order_id, work_center_id=wc_id, operation_id=operation_id, shift_id=rng.choice(shift_ids),
+                                      planned_duration=planned, actual_duration=planned * Decimal(rng.randint(80, 130)) / 100,
+                                      quantity_produced=Decimal(rng.randint(0, 50))))
+        _bulk(ProductionLog, logs)
+
+    for start in range(0, sizes['stock_transactions'], CHUNK_SIZE):
+        post_transactions([
+            StockTransaction(product_id=rng.choice(product_ids), warehouse_id=rng.choice(warehouse_ids), quantity=Decimal(rng.randint(1, 20)),
+                             transaction_type=rng.choice(['IN', 'IN', 'OUT', 'SCRAP', 'ADJ']))
+            for _ in range(min(CHUNK_SIZE, sizes['stock_transactions'] - start))
+        ])
+
+    update_low_level_codes()
+    rebuild_closure()
+    refresh_work_center_stats()
+    refresh_operation_stats()
+    save_cost_snapshots()
+
+
+def drop_query_indexes():
+    """İndeksli ve indekssiz sorgu planlarını karşılaştırmak için modellerdeki sorgu indekslerini kaldırır."""
+    with connection.schema_editor() as editor:
+        for model in INDEXED_MODELS:
+            for index in model._meta.indexes:
+                editor.remove_index(model, index)
+
+
+def plan_queries():
+    """Sorgu planı (EXPLAIN) alınacak temsili sorgular. Kodda çalışan sorguların aynısıdır."""
+    work_center_id, last_log_id = ProductionLog.objects.order_by('-id').values_list('work_center_id', 'id').first()
+    product_id, warehouse_id = StockTransaction.objects.order_by('id').values_list('product_id', 'warehouse_id').first()
+    since = end_of_day(timezone.localdate() - timedelta(days=1))
+    return {
+        'mrp.open_demand': SalesOrder.objects.filter(is_shipped=False).values('product_id').annotate(total=Sum('quantity')).order_by(),
+        'mrp.in_production': (ProductionOrder.objects.filter(status__in=ACTIVE_PRODUCTION_STATUSES)
+                              .values('product_id').annotate(total=Sum('planned_quantity')).order_by()),
+        'stats.dropped_log': (ProductionLog.objects.filter(work_center_id=work_center_id, id__lte=last_log_id).order_by('-id')
+                              .values_list('planned_duration', 'actual_duration')[WorkCenter.EFFICIENCY_WINDOW:WorkCenter.EFFICIENCY_WINDOW + 1]),
+        # Pencere fonksiyonu (ROW_NUMBER) bu sıralı tarama üzerinde hesaplanır. (Pencere süzgeçli sorgularda Django EXPLAIN üretemiyor.)
+        'stats.window_scan': (ProductionLog.objects.filter(work_center_id__in=[work_center_id]).order_by('work_center_id', '-id')
+                              .values_list('planned_duration', 'actual_duration')),
+        'scheduling.planned_orders': ProductionOrder.objects.filter(status='PLANNED').order_by('due_date', 'id').values_list('id', 'due_date'),
+        'stock.product_history': StockTransaction.objects.filter(product_id=product_id, warehouse_id=warehouse_id, created_at__gte=since).values_list('quantity'),
+        'stock.movements_since': StockTransaction.objects.filter(created_at__gte=since).values_list('product_id', 'quantity'),
+    }
+
+
+def measure(name, func):
+    """Fonksiyonu çalıştırır; süreyi (ms), sorgu sayısını ve işlenen satır sayısını döner."""
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        rows = func()
+        elapsed = (time.perf_counter() - started) * 1000
+    return BenchmarkResult(name=name, wall_ms=round(elapsed, 2), queries=len(queries), rows=rows or 0)
+
+
+def _each(queryset, attribute):
+    def run():
+        count = 0
+        for obj in queryset:
+            getattr(obj, attribute)
+            count += 1
+        return count
+    return run
+
+
+def _changelist(client, model):
+    url = reverse(f'admin:products_{model._meta.model_name}_changelist')
+
+    def run():
+        response = client.get(url)
+        assert response.status_code == 200, f"{url}: {response.status_code}"
+        return 1
+    return run
+
+
+def run_benchmarks(sample=1000, seed=42):
+    """Sık kullanılan hesapları ölçer. sample: Nesne başına ölçülen hesaplarda kullanılacak kayıt sayısı."""
+    rng = random.Random(seed)
+    product_sample = Product.objects.order_by('id')[:sample]
+    order_sample = ProductionOrder.objects.select_related('product').order_by('id')[:sample]
+
+    user = get_user_model().objects.create_superuser('benchmark', 'benchmark@example.com', None)
+    client = Client()
+    client.force_login(user)
+
+    product_ids = list(Product.objects.values_list('id', flat=True))
+    warehouse_ids = list(Warehouse.objects.values_list('id', flat=True))
+
+    def single_postings():
+        for _ in range(sample):
+            StockTransaction.objects.create(product_id=rng.choice(product_ids), warehouse_id=rng.choice(warehouse_ids), quantity=Decimal('1'), transaction_type='IN')
+        return sample
+
+    def bulk_posting():
+        post_transactions([StockTransaction(product_id=rng.choice(product_ids), warehouse_id=rng.choice(warehouse_ids), quantity=Decimal('1'), transaction_type='OUT')
+                           for _ in range(sample * 10)])
+        return sample * 10
+
+    cases = [
+        ('net_requirement.property', _each(product_sample, 'net_requirement')),
+        ('net_requirement.bulk_all', lambda: len(calculate_net_requirements())),
+        ('net_requirement.run_mrp', lambda: len(run_mrp())),
+        ('estimated_total_cost.property', _each(order_sample, 'estimated_total_cost')),
+        ('efficiency_factor.all_work_centers', _each(WorkCenter.objects.all(), 'efficiency_factor')),
+        ('actual_cycle_time.all_operations', _each(Operation.objects.all(), 'actual_cycle_time')),
+        ('current_progress.property', _each(ProductionOrder.objects.order_by('id')[:sample], 'current_progress')),
+        ('current_progress.with_progress', _each(ProductionOrder.objects.with_progress().order_by('id')[:sample], 'current_progress')),
+        ('stock_posting.single', single_postings),
+        ('stock_posting.bulk', bulk_posting),
+    ]
+    for model in [Product, BOM, ProductionOrder, ProductionLog, WorkCenter, StockTransaction, SalesOrder]:
+        cases.append((f'admin.changelist.{model._meta.model_name}', _changelist(client, model)))
+    for name, queryset in plan_queries().items():
+        cases.append((f'query.{name}', lambda queryset=queryset: len(list(queryset))))
+
+    return [measure(name, func) for name, func in cases]
+
+
+def query_plans():
+    """Temsili sorguların veritabanı planlarını (EXPLAIN) döner. İndeks kullanımı sürümler arasında bu çıktıdan izlenir."""
+    return {name: queryset.explain() for name, queryset in plan_queries().items()}
+
+
+def results_document(sizes, results, scale, plans=None, indexes=True):
+    return {
+        'created_at': timezone.now().isoformat(),
+        'database': connection.vendor,
+        'scale': scale,
+        'indexes': indexes,
+        'dataset': sizes,
+        'results': [asdict(result) for result in results],
+        'plans': plans or {},
+    }
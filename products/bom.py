@@ -0,0 +1,250 @@
+# Çok Seviyeli Ürün Ağacı (BOM) Patlatma Motoru
+# BOM.items ile sadece tek seviye görülebiliyordu. Bu modül tüm BOM/BOMItem grafiğini tek sorguda belleğe alır,
+# alt seviye kodlarını (low-level code) hesaplar, döngüleri yakalar ve brüt ihtiyacı seviye seviye patlatır.
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+
+from .models import BOMClosure, BOMItem, Product
+
+ZERO = Decimal('0')
+ONE = Decimal('1')
+HUNDRED = Decimal('100')
+
+
+class BOMCycleError(Exception):
+    """Ürün ağacında bir ürün dolaylı olarak kendisini içeriyorsa fırlatılır."""
+
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+        super().__init__(f"Ürün ağacında döngü var. İlgili ürünler: {self.product_ids}")
+
+
+def required_quantity(quantity, scrap_factor):
+    """
+    Toplam İhtiyaç = Gerekli Miktar / (1 - (Fire Oranı / 100))
+    BOMItem.total_required_quantity ile aynı formüldür; ORM nesnesi gerektirmez.
+    """
+    if not scrap_factor:
+        return quantity
+    return quantity / (ONE - (scrap_factor / HUNDRED))
+
+
+class BOMGraph:
+    """
+    Ürün ağacının bellek içi hali.
+    edges: {ana_ürün_id: [(bileşen_id, fireli_miktar), ...]}
+    """
+
+    def __init__(self, edges):
+        self.edges = edges
+        self._order = None
+        self._low_level_codes = None
+
+    @classmethod
+    def load(cls, active_only=True, parent_ids=None):
+        """Tüm BOMItem satırlarını tek sorguda okuyarak grafiği kurar. parent_ids: Yalnızca bu ana ürünlerin kalemleri."""
+        items = BOMItem.objects.all()
+        if active_only:
+            items = items.filter(bom__is_active=True)
+        if parent_ids is not None:
+            items = items.filter(bom__parent_product_id__in=parent_ids)
+
+        edges = defaultdict(list)
+        rows = items.values_list('bom__parent_product_id', 'child_product_id', 'quantity', 'scrap_factor').order_by()
+        for parent_id, child_id, quantity, scrap_factor in rows:
+            edges[parent_id].append((child_id, required_quantity(quantity, scrap_factor)))
+        return cls(dict(edges))
+
+    @property
+    def product_ids(self):
+        """Grafikte ana ürün veya bileşen olarak geçen tüm ürünler."""
+        ids = set(self.edges)
+        for children in self.edges.values():
+            ids.update(child_id for child_id, _ in children)
+        return ids
+
+    def topological_order(self):
+        """
+        Ürünleri "ana ürün her zaman bileşeninden önce gelir" kuralına göre sıralar. (Kahn algoritması)
+        Sıralamaya giremeyen ürün kalırsa grafikte döngü vardır.
+        """
+        if self._order is not None:
+            return self._order
+
+        in_degree = defaultdict(int)
+        for children in self.edges.values():
+            for child_id, _ in children:
+                in_degree[child_id] += 1
+
+        nodes = self.product_ids
+        queue = [node for node in nodes if in_degree[node] == 0]
+        order = []
+        while queue:
+            node = queue.pop()
+            order.append(node)
+            for child_id, _ in self.edges.get(node, ()):
+                in_degree[child_id] -= 1
+                if in_degree[child_id] == 0:
+                    queue.append(child_id)
+
+        if len(order) != len(nodes):
+            raise BOMCycleError(nodes.difference(order))
+
+        self._order = order
+        return order
+
+    def low_level_codes(self):
+        """
+        Alt seviye kodu = Ürünün göründüğü en derin seviye. (Mamul: 0, onun bileşenleri: 1, ...)
+        Bir ürün birden fazla ağaçta farklı seviyelerde geçiyorsa en derini alınır.
+        """
+        if self._low_level_codes is not None:
+            return self._low_level_codes
+
+        codes = defaultdict(int)
+        for node in self.topological_order():
+            level = codes[node] + 1
+            for child_id, _ in self.edges.get(node, ()):
+                if codes[child_id] < level:
+                    codes[child_id] = level
+
+        self._low_level_codes = dict(codes)
+        return self._low_level_codes
+
+    def levels(self):
+        """Ürünleri alt seviye kodlarına göre gruplar: [[seviye 0 ürünleri], [seviye 1 ürünleri], ...]"""
+        codes = self.low_level_codes()
+        grouped = [[] for _ in range(max(codes.values(), default=-1) + 1)]
+        for product_id, code in codes.items():
+            grouped[code].append(product_id)
+        return grouped
+
+    def explode(self, requirements):
+        """
+        Brüt ihtiyacı tüm seviyelere dağıtır.
+        requirements: {ürün_id: miktar} (Örn: {bisiklet_id: 10})
+        Dönen değer: {ürün_id: toplam brüt ihtiyaç}. Başlangıçtaki ürünler de sonuçta yer alır.
+        Her ürün, alt seviye koduna göre bir kez işlendiği için ortak bileşenler tekrar tekrar gezilmez.
+        """
+        gross = defaultdict(lambda: ZERO)
+        for product_id, quantity in requirements.items():
+            gross[product_id] += Decimal(quantity)
+
+        for level in self.levels():
+            for parent_id in level:
+                parent_quantity = gross.get(parent_id)
+                if not parent_quantity:
+                    continue
+                for child_id, quantity in self.edges.get(parent_id, ()):
+                    gross[child_id] += parent_quantity * quantity
+
+        # Seviye listesinde olmayan (ağaçsız) ürünler de doğrudan sonuçta kalır.
+        return dict(gross)
+
+
+def update_low_level_codes(graph=None, batch_size=1000):
+    """Hesaplanan alt seviye kodlarını Product tablosuna yazar. Sadece değişen ürünler güncellenir."""
+    graph = graph or BOMGraph.load()
+    codes = graph.low_level_codes()
+
+    changed = []
+    for product_id, current in Product.objects.values_list('id', 'low_level_code').iterator(chunk_size=batch_size):
+        code = codes.get(product_id, 0)
+        if code != current:
+            changed.append(Product(pk=product_id, low_level_code=code))
+
+    Product.objects.bulk_update(changed, ['low_level_code'], batch_size=batch_size)
+    return len(changed)
+
+
+# --- DÜZLEŞTİRİLMİŞ ÜRÜN AĞACI (BOMClosure) ---
+
+def _compute_closure(order, edges, known):
+    """
+    order: Bileşeni her zaman ana üründen önce gelecek şekilde sıralı ürünler.
+    known: Yeniden hesaplanmayan ürünlerin mevcut kapanış satırları. {ürün_id: {bileşen_id: (miktar, seviye)}}
+    Kapanış(A) = Her doğrudan bileşen C için: miktar(A,C) * (C + Kapanış(C))
+    """
+    closure = {}
+    for parent_id in order:
+        rows = {}
+        for child_id, quantity in edges.get(parent_id, ()):
+            total, depth = rows.get(child_id, (ZERO, 1))
+            rows[child_id] = (total + quantity, 1)
+            child_rows = closure.get(child_id, known.get(child_id, {}))
+            for descendant_id, (child_quantity, child_depth) in child_rows.items():
+                total, depth = rows.get(descendant_id, (ZERO, child_depth + 1))
+                rows[descendant_id] = (total + quantity * child_quantity, min(depth, child_depth + 1))
+        closure[parent_id] = rows
+    return closure
+
+
+def _write_closure(closure, batch_size=1000):
+    rows = [
+        BOMClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, quantity=quantity, depth=depth)
+        for ancestor_id, descendants in closure.items()
+        for descendant_id, (quantity, depth) in descendants.items()
+    ]
+    BOMClosure.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def rebuild_closure(graph=None, batch_size=1000):
+    """Kapanış tablosunu tüm ürün ağacından baştan oluşturur. (İlk kurulum veya toplu veri aktarımı sonrası.)"""
+    graph = graph or BOMGraph.load()
+    order = list(reversed(graph.topological_order()))
+    closure = _compute_closure(order, graph.edges, {})
+    with transaction.atomic():
+        BOMClosure.objects.all().delete()
+        return _write_closure({k: v for k, v in closure.items() if v}, batch_size)
+
+
+def refresh_closure(product_ids):
+    """
+    Reçetesi değişen ürünler ve bunları (dolaylı olarak) kullanan tüm ana ürünlerin kapanış satırlarını yeniler.
+    Tüm ağaç değil, sadece etkilenen alt küme yeniden hesaplanır:
+    1. Etkilenen ürünler kapanış tablosundan tek sorguda bulunur.
+    2. Bu ürünlerin doğrudan bileşenleri tek sorguda okunur.
+    3. Etkilenmeyen bileşenlerin mevcut kapanış satırları tek sorguda okunur ve yeniden kullanılır.
+    """
+    product_ids = set(product_ids)
+    if not product_ids:
+        return 0
+
+    affected = product_ids | set(
+        BOMClosure.objects.filter(descendant_id__in=product_ids).values_list('ancestor_id', flat=True)
+    )
+
+    edges = defaultdict(list)
+    rows = BOMItem.objects.filter(bom__parent_product_id__in=affected, bom__is_active=True).values_list(
+        'bom__parent_product_id', 'child_product_id', 'quantity', 'scrap_factor').order_by()
+    for parent_id, child_id, quantity, scrap_factor in rows:
+        edges[parent_id].append((child_id, required_quantity(quantity, scrap_factor)))
+
+    outside_children = {child_id for children in edges.values() for child_id, _ in children} - affected
+    known = defaultdict(dict)
+    for ancestor_id, descendant_id, quantity, depth in BOMClosure.objects.filter(ancestor_id__in=outside_children).values_list(
+            'ancestor_id', 'descendant_id', 'quantity', 'depth'):
+        known[ancestor_id][descendant_id] = (quantity, depth)
+
+    # Etkilenen ürünler kendi aralarında sıralanır. Döngü varsa BOMCycleError fırlatılır ve kayıt geri alınır.
+    sub_graph = BOMGraph({parent_id: [(c, q) for c, q in children if c in affected] for parent_id, children in edges.items()})
+    ordered = [node for node in sub_graph.topological_order() if node in affected]
+    order = list(reversed(ordered)) + [node for node in affected if node not in sub_graph.product_ids]
+
+    closure = _compute_closure(order, edges, known)
+    with transaction.atomic():
+        BOMClosure.objects.filter(ancestor_id__in=affected).delete()
+        return _write_closure(closure)
+
+
+def flattened_bom(product_id):
+    """Bir ürünün tüm seviyelerdeki bileşenlerini ve 1 birim için gereken toplam miktarı döner. (Tek sorgu)"""
+    return dict(BOMClosure.objects.filter(ancestor_id=product_id).values_list('descendant_id', 'quantity'))
+
+
+def where_used(product_id):
+    """Bir bileşenin doğrudan veya dolaylı olarak kullanıldığı tüm ana ürünleri döner. (Tek indeksli sorgu)"""
+    return dict(BOMClosure.objects.filter(descendant_id=product_id).values_list('ancestor_id', 'quantity'))
@@ -0,0 +1,173 @@
+# Hesaplanan Özellik Önbelleği
+# Product.calculated_production_time, ProductionOrder.current_progress ve estimated_total_cost her okumada veritabanına
+# gidiyordu. Bu modül sonuçları (model, pk, sürüm) anahtarıyla saklar.
+# Geçersiz kılma (invalidation) sürüm ile yapılır: Bir kaydın sürümü değiştiğinde eski anahtarlar bir daha okunmaz,
+# LRU (en uzun süre kullanılmayan) sırasıyla veya süreleri dolunca bellekten düşer. Sürümler ProductionLog, BOM, BOMItem,
+# Operation ve WorkCenter sinyalleri ile değiştirilir (products/signals.py).
+# Varsayılan olarak süreç içi LRU önbellek kullanılır. Çok süreçli kurulumda Django önbelleği (örn. Redis) seçilebilir:
+#   PRODUCTS_CACHE = {'BACKEND': 'django', 'ALIAS': 'default', 'TIMEOUT': 300}
+# Not: WorkCenter.efficiency_factor ve Operation.actual_cycle_time artık saklanan alanlardan hesaplanır
+# (products/stats.py); sorgu çalıştırmadıkları için önbelleğe alınmazlar.
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+
+DEFAULTS = {
+    'BACKEND': 'local',
+    'ALIAS': 'default',
+    'MAX_SIZE': 10_000,
+    'TIMEOUT': 300,
+}
+_MISSING = object()
+
+
+class LRUCache:
+    """Süreç içi, boyut sınırlı önbellek. Doluyken en uzun süre okunmayan kayıt silinir."""
+
+    def __init__(self, max_size=10_000, timeout=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            item = self.data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            value, expires = item
+            if expires is not None and expires < time.monotonic():
+                del self.data[key]
+                return default
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.timeout if self.timeout else None
+        with self.lock:
+            self.data[key] = (value, expires)
+            self.data.move_to_end(key)
+            while len(self.data) > self.max_size:
+                self.data.popitem(last=False)
+
+    def set_many(self, mapping):
+        for key, value in mapping.items():
+            self.set(key, value)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+    def __len__(self):
+        return len(self.data)
+
+
+class DjangoCache:
+    """Django önbellek arka ucunu (CACHES) aynı arayüzle kullanır. Süreçler arasında paylaşılır."""
+
+    def __init__(self, alias='default', timeout=None):
+        from django.core.cache import caches
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key, default=None):
+        return self.cache.get(f'products:{key}', default)
+
+    def set(self, key, value):
+        self.cache.set(f'products:{key}', value, self.timeout)
+
+    def set_many(self, mapping):
+        self.cache.set_many({f'products:{key}': value for key, value in mapping.items()}, self.timeout)
+
+    def clear(self):
+        # Paylaşılan önbelleğin tamamı silinmez; sürümsüz kalan anahtarlar süreleri dolunca düşer.
+        pass
+
+
+class ModelCache:
+    """(model, pk) bazında sürümlenen hesaplanmış değerler. Okuma isabet/kaçırma (hit/miss) sayaçları tutulur."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _label(model):
+        return model._meta.concrete_model._meta.label_lower
+
+    def _version(self, label, pk):
+        return self.backend.get(f'v:{label}:{pk}', 0)
+
+    def get_or_set(self, model, pk, name, compute):
+        label = self._label(model)
+        key = f'{label}:{pk}:{name}:{self._version(label, pk)}'
+        value = self.backend.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = compute()
+        self.backend.set(key, value)
+        return value
+
+    def invalidate(self, model, pks):
+        """Kayıtların sürümünü değiştirir; eski değerler bir daha okunmaz. (Tek yazma)"""
+        label = self._label(model)
+        # Sürüm, süreçler arasında çakışmayacak şekilde zamandan üretilir.
+        version = time.time_ns()
+        self.backend.set_many({f'v:{label}:{pk}': version for pk in pks})
+
+    def clear(self):
+        self.backend.clear()
+        self.hits = self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+_lock = threading.Lock()
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                config = {**DEFAULTS, **getattr(settings, 'PRODUCTS_CACHE', {})}
+                if config['BACKEND'] == 'django':
+                    backend = DjangoCache(config['ALIAS'], config['TIMEOUT'])
+                else:
+                    backend = LRUCache(config['MAX_SIZE'], config['TIMEOUT'])
+                _cache = ModelCache(backend)
+    return _cache
+
+
+def invalidate(model, pks):
+    pks = {pk for pk in pks if pk is not None}
+    if not pks:
+        return
+    cache = get_cache()
+    cache.invalidate(model, pks)
+    # İşlem sürerken başka bir istek eski veriyi tekrar önbelleğe almış olabilir; işlem bitince sürüm bir kez daha değişir.
+    transaction.on_commit(lambda: cache.invalidate(model, pks))
+
+
+def cached_model_property(func):
+    """Model özelliğini (property) (model, pk, sürüm) anahtarıyla önbelleğe alır. Kaydedilmemiş nesnelerde her seferinde hesaplanır."""
+    @wraps(func)
+    def getter(self):
+        if self.pk is None:
+            return func(self)
+        return get_cache().get_or_set(type(self), self.pk, func.__name__, lambda: func(self))
+    return property(getter)
@@ -0,0 +1,108 @@
+# Kategori Ağacı
+# Kategoriler ağaç yolu (Category.path) ile saklanır; bir alt ağaçtaki tüm kategoriler tek sorguda bulunur.
+# Ağacın tamamı ayrıca süreç içi bellekte (in-process) tutulur: Alt ağaç ve kök kategori sorguları veritabanına gitmez.
+# Bellek, kategori kaydedildiğinde/silindiğinde sinyal ile temizlenir. Diğer süreçlerdeki (gunicorn worker) kopyalar
+# en geç TREE_CACHE_SECONDS sonra yenilenir.
+import threading
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Sum
+
+from .models import Category, Product
+
+TREE_CACHE_SECONDS = 300
+ZERO = Decimal('0')
+
+
+class CategoryTree:
+    """Tüm kategorilerin tek sorguda okunmuş hâli. Alt ağaç ve kök aramaları sözlükten yapılır."""
+
+    def __init__(self, rows):
+        # rows: (id, ad, yol) üçlüleri
+        self.names = {}
+        self.paths = {}
+        self.descendants = defaultdict(list)
+        for pk, name, path in rows:
+            self.names[pk] = name
+            self.paths[pk] = path
+            # Yoldaki her ata, bu kategoriyi alt ağacında içerir. (Kendisi dahil)
+            for ancestor in path.rstrip('/').split('/'):
+                if ancestor:
+                    self.descendants[int(ancestor)].append(pk)
+        self.created = time.monotonic()
+
+    @classmethod
+    def load(cls):
+        return cls(Category.objects.values_list('pk', 'name', 'path'))
+
+    def subtree_ids(self, category_id):
+        """Kategorinin kendisi ve tüm alt kategorileri."""
+        return self.descendants.get(category_id, [])
+
+    def root_id(self, category_id):
+        path = self.paths.get(category_id)
+        return int(path.split('/', 1)[0]) if path else None
+
+    def depth(self, category_id):
+        return self.paths[category_id].count('/') - 1
+
+    def ordered(self):
+        """Kategoriler ağaç sırasıyla (her seviye kendi içinde isme göre): [(id, seviye), ...]"""
+        children = defaultdict(list)
+        for pk, path in self.paths.items():
+            parts = path.rstrip('/').split('/')
+            children[int(parts[-2]) if len(parts) > 1 else None].append(pk)
+        result = []
+        stack = sorted(children[None], key=self.names.get, reverse=True)
+        while stack:
+            pk = stack.pop()
+            result.append((pk, self.depth(pk)))
+            stack.extend(sorted(children[pk], key=self.names.get, reverse=True))
+        return result
+
+
+_lock = threading.Lock()
+_tree = None
+
+
+def get_tree():
+    global _tree
+    tree = _tree
+    if tree is None or time.monotonic() - tree.created > TREE_CACHE_SECONDS:
+        with _lock:
+            if _tree is None or _tree is tree:
+                _tree = CategoryTree.load()
+            tree = _tree
+    return tree
+
+
+def invalidate_tree():
+    global _tree
+    _tree = None
+
+
+def subtree_ids(category_id):
+    """Kategorinin ve tüm alt kategorilerinin id'leri. (Bellekte; sorgu çalışmaz.)"""
+    return get_tree().subtree_ids(category_id)
+
+
+def subtree_query(category):
+    """Bellek kullanmadan, ağaç yolu ile tek sorguluk alt ağaç. (Örn: alt sorgu olarak kullanmak için)"""
+    return Category.objects.filter(path__startswith=category.path)
+
+
+def stock_value_by_top_category():
+    """
+    Stok değerini (Product.stock_value; FIFO/ortalama maliyet) en üst seviye kategorilere göre toplar.
+    Ürünler kategori bazında tek gruplu sorguyla toplanır, kategoriler bellekteki ağaçtan köklerine eşlenir.
+    Dönüş: [(kök kategori adı, değer), ...] büyükten küçüğe. Kategorisiz ürünler None adı altında toplanır.
+    """
+    tree = get_tree()
+    totals = defaultdict(lambda: ZERO)
+    rows = Product.objects.values('category_id').annotate(value=Sum('stock_value')).order_by()
+    for row in rows:
+        root = tree.root_id(row['category_id']) if row['category_id'] is not None else None
+        totals[root] += row['value'] or ZERO
+    return sorted(((tree.names.get(root), value) for root, value in totals.items()), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,106 @@
+# Standart Maliyet Toplama (Cost Rollup)
+# ProductionOrder.estimated_total_cost her iş emri için reçete kalemlerini, bileşenleri ve makineleri tek tek sorguluyordu.
+# Bu modül tüm reçeteleri birkaç toplu sorguyla belleğe alır ve maliyeti alttan üste (hammaddeden mamule) tek geçişte hesaplar.
+# Reçete kalemi, operasyon, bileşen fiyatı veya makine ücreti değişince ilgili maliyet kartları eskimiş (is_stale) işaretlenir
+# (products/signals.py); eskimiş kartlar bir sonraki rollup_costs çalışmasına kadar kullanılmaz.
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+
+from .bom import BOMGraph
+from .cache import invalidate
+from .models import BOM, BOMClosure, CostSnapshot, Operation, Product
+
+ZERO = Decimal('0')
+SIXTY = Decimal('60')
+
+
+def operation_costs(product_ids=None):
+    """
+    Her reçete için operasyon maliyetlerini tek sorguda toplar.
+    Dönen değer: {ürün_id: (birim işçilik maliyeti, hazırlık maliyeti)}
+    """
+    costs = defaultdict(lambda: [ZERO, ZERO])
+    operations = Operation.objects.filter(bom__is_active=True)
+    if product_ids is not None:
+        operations = operations.filter(bom__parent_product_id__in=product_ids)
+    rows = operations.values_list(
+        'bom__parent_product_id', 'setup_time', 'cycle_time', 'work_center__hourly_rate').order_by()
+    for product_id, setup_time, cycle_time, hourly_rate in rows:
+        # Dakikayı saate çevirip o makinenin (WorkCenter) saatlik ücretiyle çarpıyoruz.
+        costs[product_id][0] += (cycle_time / SIXTY) * hourly_rate
+        costs[product_id][1] += (setup_time / SIXTY) * hourly_rate
+    return {product_id: tuple(values) for product_id, values in costs.items()}
+
+
+def rollup_costs(graph=None, product_ids=None):
+    """
+    Tüm reçeteli ürünlerin birim maliyetini tüm seviyeler dahil hesaplar.
+    Yarı mamulün birim maliyeti (malzeme + işçilik), onu kullanan üst ürünün malzeme maliyetine girer.
+    Alt seviyelerin hazırlık maliyeti kendi iş emirlerine aittir, üst ürüne taşınmaz.
+    product_ids: Yalnızca bu ürünlerin reçeteleri. (Grafik de bu ürünlerle sınırlı olmalıdır.)
+    Dönen değer: {ürün_id: (birim malzeme, birim işçilik, hazırlık)}
+    """
+    graph = graph or BOMGraph.load(parent_ids=product_ids)
+    prices = dict(Product.objects.filter(pk__in=graph.product_ids).values_list('id', 'price'))
+    operations = operation_costs(product_ids)
+
+    unit_costs = {}
+    results = {}
+    # Bileşenler ana üründen önce hesaplanır. (Topolojik sıranın tersi)
+    for product_id in reversed(graph.topological_order()):
+        children = graph.edges.get(product_id)
+        if not children:
+            unit_costs[product_id] = prices.get(product_id, ZERO)
+            continue
+
+        material = sum((quantity * unit_costs[child_id] for child_id, quantity in children), ZERO)
+        labor, setup = operations.get(product_id, (ZERO, ZERO))
+        unit_costs[product_id] = material + labor
+        results[product_id] = (material, labor, setup)
+
+    # Bileşeni olmayan ama operasyonu olan reçeteler.
+    for product_id, (labor, setup) in operations.items():
+        results.setdefault(product_id, (ZERO, labor, setup))
+    return results
+
+
+def product_cost(product_id):
+    """
+    Tek ürünün maliyeti, rollup_costs ile aynı kuralla: Yalnızca ürün ve alt bileşenlerinin reçeteleri okunur.
+    Maliyet kartı olmayan veya eskimiş ürünlerde kullanılır. Dönen değer: (birim malzeme, birim işçilik, hazırlık)
+    """
+    product_ids = {product_id, *BOMClosure.objects.filter(ancestor_id=product_id).values_list('descendant_id', flat=True)}
+    return rollup_costs(product_ids=product_ids).get(product_id, (ZERO, ZERO, ZERO))
+
+
+def mark_costs_stale(product_ids):
+    """Ürünlerin ve onları (dolaylı olarak) kullanan tüm üst ürünlerin maliyet kartlarını eskimiş işaretler."""
+    product_ids = {product_id for product_id in product_ids if product_id is not None}
+    if not product_ids:
+        return 0
+    product_ids.update(BOMClosure.objects.filter(descendant_id__in=product_ids).values_list('ancestor_id', flat=True))
+    return CostSnapshot.objects.filter(product_id__in=product_ids, is_stale=False).update(is_stale=True)
+
+
+def save_cost_snapshots(batch_size=1000):
+    """Maliyetleri hesaplar ve ürün/reçete versiyonu başına CostSnapshot tablosuna yazar."""
+    results = rollup_costs()
+    versions = dict(BOM.objects.filter(parent_product_id__in=results.keys()).values_list('parent_product_id', 'version'))
+
+    rows = [
+        CostSnapshot(product_id=product_id, bom_version=versions[product_id], material_cost=material, labor_cost=labor, setup_cost=setup)
+        for product_id, (material, labor, setup) in results.items()
+    ]
+    with transaction.atomic():
+        CostSnapshot.objects.bulk_create(
+            rows,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['product', 'bom_version'],
+            update_fields=['material_cost', 'labor_cost', 'setup_cost', 'is_stale', 'calculated_at'],
+        )
+    # İş emri maliyetleri (estimated_total_cost) yeni maliyet kartlarından hesaplansın.
+    invalidate(Product, results.keys())
+    return len(rows)
@@ -0,0 +1,159 @@
+# Rapor Dışa Aktarımı (CSV / XLSX)
+# Milyonlarca satırlık tablolar belleğe yüklenmeden aktarılır: Satırlar values_list ile (model nesnesi oluşturmadan)
+# ve .iterator(chunk_size) ile parça parça okunur, CSV satırları üretildikçe istemciye/dosyaya yazılır.
+import csv
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from .models import Product, ProductionLog, QualityMeasurement, StockTransaction
+
+CHUNK_SIZE = 2000
+
+
+@dataclass(frozen=True)
+class Export:
+    model: type
+    # (Başlık, values_list alanı) çiftleri.
+    columns: tuple
+    # Tarih süzgecinin uygulanacağı alan. (Yoksa None)
+    date_field: str = None
+    filename: str = 'export'
+
+    @property
+    def headers(self):
+        return [header for header, _ in self.columns]
+
+    @property
+    def fields(self):
+        return [field for _, field in self.columns]
+
+
+EXPORTS = {
+    'production-logs': Export(
+        model=ProductionLog,
+        columns=(
+            ("Kayıt No", 'id'),
+            ("Kayıt Tarihi", 'created_at'),
+            ("Üretim Emri", 'production_order_id'),
+            ("Üretim Merkezi", 'work_center__code'),
+            ("Operasyon", 'operation__description'),
+            ("Vardiya", 'shift__name'),
+            ("Operatör Sicil No", 'operator__employee_id'),
+            ("Planlanan Süre (Dakika)", 'planned_duration'),
+            ("Gerçekleşen Süre (Dakika)", 'actual_duration'),
+            ("Üretilen Miktar", 'quantity_produced'),
+        ),
+        date_field='created_at',
+        filename='uretim-kayitlari',
+    ),
+    'stock-transactions': Export(
+        model=StockTransaction,
+        columns=(
+            ("Hareket No", 'id'),
+            ("İşlem Tarihi", 'created_at'),
+            ("SKU", 'product__sku'),
+            ("Ürün", 'product__name'),
+            ("Depo", 'warehouse__name'),
+            ("İşlem Tipi", 'transaction_type'),
+            ("Değişim Miktarı", 'quantity'),
+            ("Birim Maliyet", 'unit_cost'),
+            ("Notlar", 'notes'),
+        ),
+        date_field='created_at',
+        filename='stok-hareketleri',
+    ),
+    'quality-measurements': Export(
+        model=QualityMeasurement,
+        columns=(
+            ("Ölçüm No", 'id'),
+            ("Kalite Kontrol No", 'quality_check_id'),
+            ("Üretim Emri", 'quality_check__production_order_id'),
+            ("Parametre", 'parameter__name'),
+            ("Min. Değer", 'parameter__min_value'),
+            ("Max. Değer", 'parameter__max_value'),
+            ("Ölçülen Değer", 'measured_value'),
+        ),
+        filename='kalite-olcumleri',
+    ),
+    # Ay sonu stok değerlemesi: Ürünlerin güncel stok değerleri. (Geçmiş yeniden oynatılmaz.)
+    'stock-valuation': Export(
+        model=Product,
+        columns=(
+            ("SKU", 'sku'),
+            ("Ürün", 'name'),
+            ("Değerleme Yöntemi", 'valuation_method'),
+            ("Stok Miktarı", 'stock_quantity'),
+            ("Stok Değeri", 'stock_value'),
+        ),
+        filename='stok-degerleme',
+    ),
+}
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _cell(value):
+    # Tarihler yerel saate çevrilir; diğer değerler olduğu gibi yazılır.
+    if isinstance(value, datetime):
+        return timezone.localtime(value).strftime('%Y-%m-%d %H:%M:%S')
+    return '' if value is None else value
+
+
+def export_rows(name, start=None, end=None, chunk_size=CHUNK_SIZE):
+    """
+    Başlık satırı ve ardından veri satırlarını üretir (generator). [start, end] tarih aralığı isteğe bağlıdır.
+    Satırlar veritabanından parça parça okunur; bellekte en fazla chunk_size satır tutulur.
+    """
+    export = EXPORTS[name]
+    rows = export.model.objects.all()
+    if export.date_field:
+        if start:
+            rows = rows.filter(**{f'{export.date_field}__gte': _day_start(start)})
+        if end:
+            rows = rows.filter(**{f'{export.date_field}__lt': _day_start(end + timedelta(days=1))})
+
+    yield export.headers
+    for row in rows.order_by('pk').values_list(*export.fields).iterator(chunk_size=chunk_size):
+        yield [_cell(value) for value in row]
+
+
+class _Echo:
+    """csv.writer'ın yazdığı satırı saklamadan geri döndüren sahte dosya."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    """Satırları CSV metin parçalarına çevirir. (StreamingHttpResponse ve dosya yazımı için)"""
+    writer = csv.writer(_Echo())
+    # Excel'in Türkçe karakterleri doğru açması için UTF-8 BOM.
+    yield '\ufeff'
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_csv(rows, stream):
+    for line in csv_lines(rows):
+        stream.write(line)
+
+
+def write_xlsx(rows, path):
+    """
+    Satırları XLSX dosyasına yazar. openpyxl'in write_only modu satırları diske akıtır; bellek kullanımı sabit kalır.
+    openpyxl isteğe bağlı bir bağımlılıktır; yalnızca XLSX aktarımında gerekir.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ImportError("XLSX aktarımı için openpyxl gerekli: pip install openpyxl")
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
@@ -0,0 +1,152 @@
+# Toplu Stok Hareketi Aktarımı
+# El terminallerinden gelen 100 binlerce satırlık giriş/sarf dosyaları satır satır StockTransaction.save ile
+# yazıldığında her satır için 2 yazma yapılıyordu. Burada dosya akış (stream) olarak okunur, stok kodları
+# önceden yüklenmiş bir sözlükten doğrulanır ve hareketler parçalar halinde toplu (bulk) kaydedilir.
+import csv
+import json
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from .models import Product, StockTransaction, Warehouse
+from .stock import post_transactions
+
+TRANSACTION_TYPES = {code for code, _ in StockTransaction.TRANSACTION_TYPES}
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    imported: int = 0
+    errors: list = field(default_factory=list)  # [(satır no, hata mesajı), ...]
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+def read_csv(stream):
+    """Başlık satırı olan CSV dosyasını satır satır okur. Sütunlar: sku, quantity, transaction_type, warehouse, notes, unit_cost (isteğe bağlı)"""
+    yield from csv.DictReader(stream)
+
+
+def read_jsonl(stream):
+    """
+    Her satırı bir JSON nesnesi olan (JSON Lines) dosyayı satır satır okur.
+    Okunamayan satırlar için ValueError nesnesi döner; hata o satıra yazılır, aktarım durmaz.
+    """
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield ValueError(f"Geçersiz JSON: {exc}")
+            continue
+        yield row if isinstance(row, dict) else ValueError("Satır bir JSON nesnesi olmalı.")
+
+
+READERS = {
+    'csv': read_csv,
+    'jsonl': read_jsonl,
+}
+
+
+def _decimal(value, field_name, label):
+    """
+    Değeri Decimal'e çevirir. Sonlu olmalı ve StockTransaction alanının basamak sınırına (max_digits) sığmalıdır.
+    (Sığmayan değerler toplu kayıt sırasında tüm parçayı düşürürdü.)
+    """
+    field = StockTransaction._meta.get_field(field_name)
+    try:
+        number = Decimal(str(value).strip())
+        if number.is_finite():
+            number = number.quantize(Decimal(1).scaleb(-field.decimal_places))
+    except InvalidOperation:
+        raise ValueError(f"Geçersiz {label}: {value!r}")
+    if not number.is_finite() or abs(number) >= 10 ** (field.max_digits - field.decimal_places):
+        raise ValueError(f"Geçersiz {label}: {value!r}")
+    return number
+
+
+def _build_transaction(row, products, warehouses):
+    if isinstance(row, ValueError):
+        raise row
+
+    # JSON satırlarında değerler metin olmayabilir.
+    sku = str(row.get('sku') or '').strip()
+    product_id = products.get(sku)
+    if product_id is None:
+        raise ValueError(f"Bilinmeyen stok kodu: {sku!r}")
+
+    transaction_type = str(row.get('transaction_type') or '').strip().upper()
+    if transaction_type not in TRANSACTION_TYPES:
+        raise ValueError(f"Geçersiz işlem tipi: {transaction_type!r}")
+
+    quantity = _decimal(row.get('quantity'), 'quantity', "miktar")
+
+    warehouse_id = row.get('warehouse') or None
+    if warehouse_id is not None:
+        try:
+            warehouse_id = int(warehouse_id)
+        except (TypeError, ValueError):
+            warehouse_id = None
+        if warehouse_id not in warehouses:
+            raise ValueError(f"Bilinmeyen depo: {row.get('warehouse')!r}")
+
+    # Giriş maliyeti boş bırakılırsa değerleme sırasında ortalama maliyet veya birim fiyat kullanılır.
+    unit_cost = row.get('unit_cost')
+    if unit_cost not in (None, ''):
+        unit_cost = _decimal(unit_cost, 'unit_cost', "birim maliyet")
+        if unit_cost < 0:
+            raise ValueError(f"Geçersiz birim maliyet: {row.get('unit_cost')!r}")
+    else:
+        unit_cost = None
+
+    return StockTransaction(
+        product_id=product_id,
+        warehouse_id=warehouse_id,
+        quantity=quantity,
+        transaction_type=transaction_type,
+        notes=str(row.get('notes') or '')[:255],
+        unit_cost=unit_cost,
+    )
+
+
+def import_transactions(stream, fmt='csv', chunk_size=5000, strict=False):
+    """
+    Dosyadaki stok hareketlerini parçalar halinde kaydeder.
+    Her parça kendi veritabanı işleminde (transaction) yazılır; bellekte en fazla bir parça tutulur.
+    strict=True ise ilk hatalı satırda durur, aksi halde hatalı satırlar atlanıp raporlanır.
+    """
+    started = time.perf_counter()
+    result = ImportResult()
+
+    # Stok kodu -> ürün id eşleşmesi bir kez yüklenir. (Satır başına sorgu yapılmaz.)
+    products = dict(Product.objects.values_list('sku', 'id'))
+    warehouses = set(Warehouse.objects.values_list('id', flat=True))
+
+    chunk = []
+    for line_number, row in enumerate(READERS[fmt](stream), start=1):
+        result.rows += 1
+        try:
+            chunk.append(_build_transaction(row, products, warehouses))
+        except ValueError as exc:
+            if strict:
+                raise ValueError(f"Satır {line_number}: {exc}") from exc
+            result.errors.append((line_number, str(exc)))
+            continue
+
+        if len(chunk) >= chunk_size:
+            post_transactions(chunk)
+            result.imported += len(chunk)
+            chunk = []
+
+    if chunk:
+        post_transactions(chunk)
+        result.imported += len(chunk)
+
+    result.elapsed = time.perf_counter() - started
+    return result
@@ -0,0 +1,239 @@
+# Saha Terminali Veri Girişi (Asenkron)
+# Operatör terminalleri her çevrimde bir üretim kaydı gönderir. Bu istekleri admin formu yerine asenkron bir uç nokta karşılar.
+# Aynı anda gelen istekler bellekte kısa bir süre (varsayılan 50 ms) biriktirilir ve tek bir bulk_create ile yazılır.
+# Toplu kayıt sinyalleri tetiklemediği için makine/operasyon istatistikleri, OEE işaretleri ve önbellek her yazımda bir kez güncellenir.
+# ASGI sunucusu ile çalıştırılmalıdır: uvicorn config.asgi:application
+import asyncio
+import json
+import weakref
+from decimal import Decimal, InvalidOperation
+from hmac import compare_digest
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from .models import Employee, Operation, ProductionLog, ProductionOrder, Shift, WorkCenter
+from .oee import local_date, mark_dirty
+from .signals import invalidate_log_caches
+from .stats import record_operation_logs, record_work_center_logs
+
+MAX_EVENTS_PER_REQUEST = 10_000
+
+# Olay alanı -> (model alanı, ilişkili model). Zorunlu olmayanlar boş bırakılabilir.
+RELATIONS = {
+    'work_center': WorkCenter,
+    'operation': Operation,
+    'production_order': ProductionOrder,
+    'operator': Employee,
+    'shift': Shift,
+}
+DECIMALS = ['planned_duration', 'actual_duration', 'quantity_produced']
+REQUIRED = ['work_center', 'planned_duration', 'actual_duration']
+
+
+# --- DOĞRULAMA ---
+
+def _decimal(value, field):
+    """
+    Değeri ProductionLog alanının ondalık basamağına yuvarlar. Alanın basamak sınırına (max_digits) sığmayan değerler
+    reddedilir; aksi halde hata ancak toplu kayıt sırasında çıkar ve tüm parça düşerdi.
+    """
+    model_field = ProductionLog._meta.get_field(field)
+    try:
+        number = Decimal(str(value))
+        if number.is_finite():
+            number = number.quantize(Decimal(1).scaleb(-model_field.decimal_places))
+    except InvalidOperation:
+        raise ValueError(f"{field} sayı olmalı.")
+    if not number.is_finite():
+        raise ValueError(f"{field} sayı olmalı.")
+    if number < 0:
+        raise ValueError(f"{field} negatif olamaz.")
+    if number >= 10 ** (model_field.max_digits - model_field.decimal_places):
+        raise ValueError(f"{field} çok büyük.")
+    return number
+
+
+def parse_event(event):
+    """Tek bir olayı (dict) kaydedilmemiş ProductionLog nesnesine çevirir. Hatalıysa ValueError fırlatır."""
+    if not isinstance(event, dict):
+        raise ValueError("Olay bir JSON nesnesi olmalı.")
+    missing = [field for field in REQUIRED if event.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f"Eksik alan: {', '.join(missing)}")
+
+    values = {}
+    for field in RELATIONS:
+        value = event.get(field)
+        if value not in (None, ''):
+            if isinstance(value, bool) or not isinstance(value, int):
+                raise ValueError(f"{field} bir kayıt numarası (id) olmalı.")
+            values[f'{field}_id'] = value
+    for field in DECIMALS:
+        if event.get(field) not in (None, ''):
+            values[field] = _decimal(event[field], field)
+    return ProductionLog(**values)
+
+
+def check_references(logs):
+    """Olaylardaki kayıt numaralarının veritabanında olup olmadığını model başına tek sorguyla kontrol eder."""
+    errors = []
+    for field, model in RELATIONS.items():
+        ids = {getattr(log, f'{field}_id') for log in logs} - {None}
+        if not ids:
+            continue
+        missing = ids - set(model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        for index, log in enumerate(logs):
+            if getattr(log, f'{field}_id') in missing:
+                errors.append({'index': index, 'error': f"{field}={getattr(log, f'{field}_id')} bulunamadı."})
+    return errors
+
+
+# --- YAZMA ---
+
+def write_logs(logs, batch_size=1000):
+    """
+    Kayıtları toplu yazar; etkilenen makine ve operasyonların istatistik pencerelerini ve OEE günlerini bir kez günceller.
+    Tek veritabanı işlemidir; hata olursa hiçbiri kaydedilmez.
+    """
+    with transaction.atomic():
+        ProductionLog.objects.bulk_create(logs, batch_size=batch_size)
+        # Pencereler artımlı güncellenir. (Makine/operasyon başına sınırlı okuma + tek güncelleme; geçmiş taranmaz.)
+        record_work_center_logs(logs)
+        record_operation_logs(logs)
+        mark_dirty((log.work_center_id, local_date(log.created_at)) for log in logs)
+    invalidate_log_caches({log.work_center_id for log in logs}, {log.production_order_id for log in logs})
+    return len(logs)
+
+
+class LogBuffer:
+    """
+    Aynı olay döngüsünde (event loop) gelen kayıtları biriktirir. max_delay saniye dolduğunda veya max_size kayda
+    ulaşıldığında hepsini tek seferde yazar. Her istek kendi kayıtları yazılana kadar bekler. Toplu yazım başarısız olursa
+    istekler ayrı ayrı yazılır; hata yalnızca hatalı kaydı gönderen isteğe iletilir.
+    """
+
+    def __init__(self, max_size=5000, max_delay=0.05):
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.pending = []
+        self.count = 0
+        self.timer = None
+
+    async def submit(self, logs):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((logs, future))
+        self.count += len(logs)
+        if self.count >= self.max_size:
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.max_delay, self.flush)
+        return await future
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending, self.count = self.pending, [], 0
+        if batch:
+            asyncio.ensure_future(self._write(batch))
+
+    async def _write(self, batch):
+        logs = [log for request_logs, _ in batch for log in request_logs]
+        try:
+            await sync_to_async(write_logs)(logs)
+        except Exception as exc:
+            if len(batch) == 1:
+                _resolve(batch[0][1], exc)
+                return
+            # Hatalı kaydın hangi isteğe ait olduğu bilinmez (örn. kontrolden sonra silinen makine). Geçerli olayları
+            # gönderen istemciler hata almasın diye her isteğin kayıtları ayrı ayrı tekrar yazılır.
+            for request_logs, future in batch:
+                for log in request_logs:
+                    log.pk = None
+                    log._state.adding = True
+                try:
+                    await sync_to_async(write_logs)(request_logs)
+                except Exception as request_exc:
+                    _resolve(future, request_exc)
+                else:
+                    _resolve(future, len(request_logs))
+        else:
+            for request_logs, future in batch:
+                _resolve(future, len(request_logs))
+
+
+def _resolve(future, result):
+    if future.done():
+        return
+    if isinstance(result, Exception):
+        future.set_exception(result)
+    else:
+        future.set_result(result)
+
+
+# Her olay döngüsünün kendi tamponu olur. (ASGI sunucusunda işçi başına bir döngü çalışır.)
+_buffers = weakref.WeakKeyDictionary()
+
+
+def get_buffer():
+    loop = asyncio.get_running_loop()
+    if loop not in _buffers:
+        _buffers[loop] = LogBuffer(
+            max_size=getattr(settings, 'PRODUCTION_LOG_BUFFER_SIZE', 5000),
+            max_delay=getattr(settings, 'PRODUCTION_LOG_BUFFER_DELAY', 0.05),
+        )
+    return _buffers[loop]
+
+
+# --- UÇ NOKTA ---
+
+async def _authorized(request):
+    token = getattr(settings, 'PRODUCTS_API_TOKEN', None)
+    header = request.headers.get('Authorization', '')
+    if token and header.startswith('Token ') and compare_digest(header[len('Token '):], token):
+        return True
+    user = await request.auser()
+    return user.is_authenticated and user.is_staff
+
+
+@csrf_exempt
+async def ingest_production_logs(request):
+    """
+    POST /products/api/production-logs/ingest/
+    Gövde: {"events": [{"work_center": 1, "operation": 4, "production_order": 12, "operator": 3, "shift": 1,
+                        "planned_duration": 12.5, "actual_duration": 13.1, "quantity_produced": 20}, ...]}
+    Hatalı olay varsa hiçbiri kaydedilmez ve 400 ile olay sırası (index) ve hata mesajı döner.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': "Yalnızca POST desteklenir."}, status=405)
+    if not await _authorized(request):
+        return JsonResponse({'error': "Yetkisiz erişim."}, status=401)
+
+    try:
+        payload = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({'error': "Geçersiz JSON."}, status=400)
+    events = payload.get('events') if isinstance(payload, dict) else payload
+    if not isinstance(events, list) or not events:
+        return JsonResponse({'error': "'events' boş olmayan bir liste olmalı."}, status=400)
+    if len(events) > MAX_EVENTS_PER_REQUEST:
+        return JsonResponse({'error': f"Tek istekte en fazla {MAX_EVENTS_PER_REQUEST} olay gönderilebilir."}, status=400)
+
+    logs, errors = [], []
+    for index, event in enumerate(events):
+        try:
+            logs.append(parse_event(event))
+        except ValueError as exc:
+            errors.append({'index': index, 'error': str(exc)})
+    if not errors:
+        errors = await sync_to_async(check_references)(logs)
+    if errors:
+        return JsonResponse({'errors': errors}, status=400)
+
+    accepted = await get_buffer().submit(logs)
+    return JsonResponse({'accepted': accepted}, status=201)
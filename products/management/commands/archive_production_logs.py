@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from products.archive import archive_production_logs
+
+
+class Command(BaseCommand):
+    help = ("Kapanmış ayların üretim kayıtlarını makine/operasyon/vardiya bazında aylık özetlere toplar. "
+            "--purge verilirse özetlenen ayların ayrıntı kayıtları silinir. Ayda bir çalıştırılması önerilir.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-months', type=int, default=3, help="Ayrıntısı korunacak son kapanmış ay sayısı. (İçinde bulunulan ay her zaman korunur.)")
+        parser.add_argument('--purge', action='store_true', help="Özetlenen ayların ayrıntı kayıtlarını sil. (Açık iş emirlerinin kayıtları emir kapanana kadar korunur.)")
+
+    def handle(self, *args, **options):
+        archived = archive_production_logs(keep_months=max(options['keep_months'], 0), purge=options['purge'])
+        for item in archived:
+            self.stdout.write(f"{item.month:%Y-%m}: {item.summary_rows} özet satırı, {item.purged_logs} kayıt silindi.")
+        self.stdout.write(self.style.SUCCESS(f"{len(archived)} ay arşivlendi."))
@@ -0,0 +1,48 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from products.benchmarks import (
+    dataset_sizes, drop_query_indexes, generate_dataset, query_plans, results_document, run_benchmarks
+)
+
+
+class Command(BaseCommand):
+    help = ("Geçici bir test veritabanında sentetik veri seti üretir, sık kullanılan hesapların süresini ve "
+            "sorgu sayısını ölçer ve sonuçları JSON olarak yazar.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=0.01,
+                            help="Veri seti ölçeği. 1.0 = 50 bin ürün, 5 bin reçete, 1 milyon üretim kaydı, 2 milyon stok hareketi.")
+        parser.add_argument('--sample', type=int, default=1000, help="Nesne başına ölçülen hesaplarda kullanılacak kayıt sayısı.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default='benchmark-results.json', help="Sonuç dosyası.")
+        parser.add_argument('--without-indexes', action='store_true',
+                            help="Sorgu indekslerini kaldırarak ölç. (İndeksli çalıştırmayla sorgu planlarını karşılaştırmak için.)")
+
+    def handle(self, *args, **options):
+        # Gerçek veritabanına dokunulmaz; ayarlardaki veritabanı türünde geçici bir test veritabanı kullanılır.
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            sizes = dataset_sizes(options['scale'])
+            started = time.perf_counter()
+            generate_dataset(sizes, seed=options['seed'])
+            self.stdout.write(f"Veri seti üretildi. ({time.perf_counter() - started:.1f} sn)")
+
+            if options['without_indexes']:
+                drop_query_indexes()
+            plans = query_plans()
+            results = run_benchmarks(sample=options['sample'], seed=options['seed'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        for result in results:
+            self.stdout.write(f"{result.name:45} {result.wall_ms:>12.2f} ms {result.queries:>8} sorgu {result.rows:>8} satır")
+
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(results_document(sizes, results, options['scale'], plans=plans, indexes=not options['without_indexes']), output, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Sonuçlar {options['output']} dosyasına yazıldı."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from products.categories import stock_value_by_top_category
+
+
+class Command(BaseCommand):
+    help = "Stok değerini (FIFO / hareketli ortalama maliyet) en üst seviye kategorilere göre listeler."
+
+    def handle(self, *args, **options):
+        rows = stock_value_by_top_category()
+        for name, value in rows:
+            self.stdout.write(f"{name or '(Kategorisiz)':40} {value:>20,.2f}")
+        self.stdout.write(self.style.SUCCESS(f"Toplam: {sum(value for _, value in rows):,.2f}"))
@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.importers import READERS, import_transactions
+
+
+class Command(BaseCommand):
+    help = "CSV veya JSONL dosyasındaki stok hareketlerini toplu olarak aktarır. (Dosya yerine '-' verilirse standart girdiden okur.)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Aktarılacak dosya (.csv veya .jsonl)")
+        parser.add_argument('--format', choices=sorted(READERS), help="Dosya biçimi. Verilmezse dosya uzantısından anlaşılır.")
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Tek seferde yazılacak satır sayısı.")
+        parser.add_argument('--strict', action='store_true', help="İlk hatalı satırda aktarımı durdur.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or Path(path).suffix.lstrip('.').lower()
+        if fmt not in READERS:
+            raise CommandError(f"Dosya biçimi anlaşılamadı: {path}. --format ile belirtin.")
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            result = import_transactions(stream, fmt=fmt, chunk_size=options['chunk_size'], strict=options['strict'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        for line_number, message in result.errors[:20]:
+            self.stderr.write(f"Satır {line_number}: {message}")
+        if len(result.errors) > 20:
+            self.stderr.write(f"... ve {len(result.errors) - 20} hata daha.")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.imported}/{result.rows} satır aktarıldı, {len(result.errors)} hatalı satır. "
+            f"({result.elapsed:.2f} sn, {result.rows_per_second:.0f} satır/sn)"
+        ))
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.bom import BOMCycleError, rebuild_closure
+
+
+class Command(BaseCommand):
+    help = "Düzleştirilmiş ürün ağacı (BOMClosure) tablosunu tüm reçetelerden baştan oluşturur."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            count = rebuild_closure()
+        except BOMCycleError as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"{count} satır oluşturuldu. ({elapsed:.2f} sn)"))
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.valuation import inventory_value, rebuild_valuation
+
+
+class Command(BaseCommand):
+    help = "Stok değerlerini ve FIFO maliyet katmanlarını stok hareketi geçmişinden yeniden oluşturur. (İlk kurulum veya değerleme yöntemi değişikliği sonrası)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--product', type=int, action='append', dest='products', help="Yalnızca bu ürün(ler). (Birden fazla verilebilir)")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = rebuild_valuation(options['products'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{count} ürünün stok değeri yeniden hesaplandı. Toplam stok değeri: {inventory_value():,.2f} ({elapsed:.2f} sn)"
+        ))
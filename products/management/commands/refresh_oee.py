@@ -0,0 +1,27 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.oee import mark_range_dirty, refresh_all_oee
+
+
+class Command(BaseCommand):
+    help = ("Değişen makine-günlerin OEE değerlerini yeniden hesaplar. --from/--to verilirse aralıktaki tüm günler "
+            "yeniden hesaplanır. (İlk kurulum için) Sık aralıklarla (örn. 5 dakikada bir) çalıştırılması önerilir.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', type=date.fromisoformat, help="Başlangıç günü (YYYY-AA-GG).")
+        parser.add_argument('--to', dest='end', type=date.fromisoformat, help="Bitiş günü (YYYY-AA-GG). Varsayılan: bugün.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Tek seferde hesaplanacak makine-gün sayısı.")
+
+    def handle(self, *args, **options):
+        if options['start']:
+            end = options['end'] or date.today()
+            if end < options['start']:
+                raise CommandError("--to, --from tarihinden önce olamaz.")
+            mark_range_dirty(options['start'], end)
+
+        started = time.perf_counter()
+        count = refresh_all_oee(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{count} makine-gün yeniden hesaplandı. ({time.perf_counter() - started:.2f} sn)"))
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.bom import BOMCycleError
+from products.costing import save_cost_snapshots
+
+
+class Command(BaseCommand):
+    help = "Tüm reçetelerin standart maliyetini alttan üste hesaplar ve maliyet kartlarını (CostSnapshot) günceller."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            count = save_cost_snapshots()
+        except BOMCycleError as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"{count} maliyet kartı güncellendi. ({elapsed:.2f} sn)"))
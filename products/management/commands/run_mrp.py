@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.models import Product
+from products.mrp import BUCKET_DAYS, regenerate_time_phased, replan_net_change, run_mrp
+
+
+class Command(BaseCommand):
+    help = "Tüm ürünler (veya seçilen ürün tipleri) için net ihtiyacı toplu hesaplar ve MRP sonuç tablosuna yazar."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', dest='product_types', action='append', help="Sadece bu ürün tipini hesapla (Örn: --type FINAL --type SEMI).")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Sonuç tablosuna yazarken kullanılacak parti boyutu.")
+        parser.add_argument('--time-phased', action='store_true',
+                            help="Zaman fazlı MRP: İhtiyacı kovalara dağıtır, tedarik süresini uygular, taslak üretim emirleri ve satın alma önerileri oluşturur.")
+        parser.add_argument('--bucket', choices=sorted(BUCKET_DAYS), default='day', help="Zaman fazlı MRP kova büyüklüğü.")
+        parser.add_argument('--horizon', type=int, default=180, help="Zaman fazlı MRP planlama ufku (gün).")
+        parser.add_argument('--net-change', action='store_true',
+                            help="Zaman fazlı MRP'yi yalnızca son çalışmadan sonra değişen ürünler ve alt bileşenleri için çalıştır.")
+
+    def handle(self, *args, **options):
+        if options['time_phased'] or options['net_change']:
+            return self.handle_time_phased(options)
+
+        products = Product.objects.all()
+        if options['product_types']:
+            products = products.filter(product_type__in=options['product_types'])
+
+        started = time.perf_counter()
+        results = run_mrp(products, batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+
+        short = sum(1 for result in results.values() if result.net_requirement > 0)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(results)} ürün hesaplandı, {short} üründe net ihtiyaç var. ({elapsed:.2f} sn)"
+        ))
+
+    def handle_time_phased(self, options):
+        # Bileşen ihtiyacı üst ürünlerin emirlerinden geldiği için tüm seviyeler birlikte planlanmalıdır.
+        if options['product_types']:
+            raise CommandError("--type zaman fazlı MRP ile kullanılamaz; tüm ürün seviyeleri birlikte planlanır.")
+
+        started = time.perf_counter()
+        run = replan_net_change if options['net_change'] else regenerate_time_phased
+        plan, (production_orders, purchases) = run(bucket=options['bucket'], horizon=options['horizon'], batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+
+        if plan is None:
+            self.stdout.write(self.style.SUCCESS(f"Son çalışmadan sonra değişen ürün yok. ({elapsed:.2f} sn)"))
+            return
+        scope = "tüm ürünler" if plan.product_ids is None else f"{len(plan.product_ids)} ürün"
+        past_due = sum(1 for order in plan.orders if order.past_due)
+        self.stdout.write(self.style.SUCCESS(
+            f"Planlanan: {scope}. {production_orders} taslak üretim emri, {purchases} satın alma önerisi oluşturuldu "
+            f"({past_due} öneri tedarik süresi nedeniyle gecikmeli). ({elapsed:.2f} sn)"
+        ))
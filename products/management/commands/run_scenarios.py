@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.models import WorkCenter
+from products.scenarios import Scenario, ScenarioModel
+
+
+class Command(BaseCommand):
+    help = ("Talep ve kapasite senaryolarını (what-if) tüm ürünler için hesaplar; eksik ürünleri ve aşırı yüklenen üretim merkezlerini listeler. "
+            "numpy gerektirir: pip install numpy")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--demand', type=float, default=1.0, help="Talep çarpanı. (Örn: 1.15 = %%15 artış)")
+        parser.add_argument('--capacity', action='append', default=[], metavar='KOD=ÇARPAN',
+                            help="Üretim merkezi kapasite çarpanı. (Örn: WC-3=0.67) Birden fazla verilebilir.")
+        parser.add_argument('--horizon', type=int, default=30, help="Kapasite ufku (gün).")
+        parser.add_argument('--top', type=int, default=20, help="Listelenecek en fazla eksik ürün sayısı.")
+
+    def handle(self, *args, **options):
+        codes = dict(WorkCenter.objects.values_list('code', 'id'))
+        capacity = {}
+        for value in options['capacity']:
+            code, _, factor = value.partition('=')
+            if code not in codes:
+                raise CommandError(f"Bilinmeyen üretim merkezi: {code}")
+            try:
+                capacity[codes[code]] = float(factor)
+            except ValueError:
+                raise CommandError(f"Geçersiz kapasite çarpanı: {value}")
+
+        started = time.perf_counter()
+        try:
+            model = ScenarioModel.load(horizon=options['horizon'])
+        except ImportError as exc:
+            raise CommandError(str(exc))
+        loaded = time.perf_counter()
+        baseline, scenario = model.evaluate([
+            Scenario("Mevcut Durum"),
+            Scenario("Senaryo", demand_factor=options['demand'], capacity=capacity),
+        ])
+        elapsed = time.perf_counter() - loaded
+
+        names = {wc_id: code for code, wc_id in codes.items()}
+        for result in (baseline, scenario):
+            self.stdout.write(f"{result.name}: {len(result.shortages)} eksik ürün, {len(result.overloaded)} aşırı yüklü üretim merkezi")
+        shortages = sorted(scenario.shortages.items(), key=lambda item: item[1], reverse=True)[:options['top']]
+        for product_id, quantity in shortages:
+            self.stdout.write(f"  Ürün {product_id:>8}: {quantity:>14,.2f} eksik (Mevcut durumda: {baseline.shortages.get(product_id, 0):,.2f})")
+        for wc_id, ratio in sorted(scenario.overloaded.items(), key=lambda item: item[1], reverse=True):
+            self.stdout.write(f"  {names[wc_id]:>10}: %{ratio * 100:.0f} doluluk")
+        self.stdout.write(self.style.SUCCESS(
+            f"Veri yükleme {loaded - started:.2f} sn, senaryo hesabı {elapsed * 1000:.1f} ms."
+        ))
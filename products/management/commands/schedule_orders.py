@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.scheduling import save_schedule, schedule_orders
+
+
+class Command(BaseCommand):
+    help = "PLANNED durumundaki iş emirlerini üretim merkezlerinin günlük kapasitesine göre çizelgeler."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backward', action='store_true', help="Teslim tarihinden geriye doğru çizelgele. (Varsayılan: ileri)")
+        parser.add_argument('--horizon', type=int, default=365, help="Çizelgeleme ufku (gün).")
+        parser.add_argument('--dry-run', action='store_true', help="Sonuçları veritabanına yazma.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        scheduled, unscheduled = schedule_orders(backward=options['backward'], horizon=options['horizon'])
+        if not options['dry_run']:
+            save_schedule(scheduled, unscheduled)
+        elapsed = time.perf_counter() - started
+
+        late = sum(1 for item in scheduled if item.is_late)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(scheduled)} iş emri çizelgelendi ({late} gecikmeli), {len(unscheduled)} iş emri ufka sığmadı. ({elapsed:.2f} sn)"
+        ))
@@ -0,0 +1,16 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from products.stock import take_stock_snapshot
+
+
+class Command(BaseCommand):
+    help = "Gün sonu depo bakiyelerini stok fotoğrafı (StockSnapshot) olarak kaydeder. Her gece çalıştırılması önerilir."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, help="Fotoğrafı alınacak gün (YYYY-AA-GG). Varsayılan: dün.")
+
+    def handle(self, *args, **options):
+        count = take_stock_snapshot(options['date'])
+        self.stdout.write(self.style.SUCCESS(f"{count} depo bakiyesi kaydedildi."))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.bom import BOMCycleError, BOMGraph, update_low_level_codes
+
+
+class Command(BaseCommand):
+    help = "Ürün ağacını tek sorguda yükler, döngü kontrolü yapar ve ürünlerin alt seviye kodlarını günceller."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        graph = BOMGraph.load()
+        try:
+            changed = update_low_level_codes(graph)
+        except BOMCycleError as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(graph.levels())} seviye bulundu, {changed} ürünün alt seviye kodu güncellendi. ({elapsed:.2f} sn)"
+        ))
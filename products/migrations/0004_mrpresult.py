@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_alter_bom_options_alter_bomitem_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MRPResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('open_demand', models.DecimalField(decimal_places=4, default=0, max_digits=16, verbose_name='Açık Talep')),
+                ('in_production', models.DecimalField(decimal_places=4, default=0, max_digits=16, verbose_name='Üretimdeki Miktar')),
+                ('net_requirement', models.DecimalField(decimal_places=4, default=0, max_digits=16, verbose_name='Net İhtiyaç')),
+                ('calculated_at', models.DateTimeField(auto_now=True, verbose_name='Hesaplama Tarihi')),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='mrp_result', to='products.product', verbose_name='Ürün')),
+            ],
+            options={
+                'verbose_name': 'MRP Sonucu',
+                'verbose_name_plural': 'MRP Sonuçları',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_mrpresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='low_level_code',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Alt Seviye Kodu'),
+        ),
+    ]
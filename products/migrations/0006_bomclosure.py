@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_low_level_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BOMClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=10, max_digits=30, verbose_name='Toplam Miktar')),
+                ('depth', models.PositiveIntegerField(verbose_name='Seviye')),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='closure_descendants', to='products.product', verbose_name='Ana Ürün')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='closure_ancestors', to='products.product', verbose_name='Bileşen')),
+            ],
+            options={
+                'verbose_name': 'Düzleştirilmiş Ürün Ağacı',
+                'verbose_name_plural': 'Düzleştirilmiş Ürün Ağaçları',
+                'indexes': [models.Index(fields=['descendant', 'ancestor'], name='bom_closure_where_used_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='unique_bom_closure_pair')],
+            },
+        ),
+    ]
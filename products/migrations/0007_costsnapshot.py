@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_bomclosure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CostSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bom_version', models.CharField(max_length=10, verbose_name='Reçete Versiyonu')),
+                ('material_cost', models.DecimalField(decimal_places=4, default=0, max_digits=16, verbose_name='Birim Malzeme Maliyeti')),
+                ('labor_cost', models.DecimalField(decimal_places=4, default=0, max_digits=16, verbose_name='Birim İşçilik Maliyeti')),
+                ('setup_cost', models.DecimalField(decimal_places=4, default=0, max_digits=16, verbose_name='Hazırlık Maliyeti')),
+                ('calculated_at', models.DateTimeField(auto_now=True, verbose_name='Hesaplama Tarihi')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_snapshots', to='products.product', verbose_name='Ürün')),
+            ],
+            options={
+                'verbose_name': 'Maliyet Kartı',
+                'verbose_name_plural': 'Maliyet Kartları',
+                'constraints': [models.UniqueConstraint(fields=('product', 'bom_version'), name='unique_cost_snapshot_version')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:52
+
+import django.db.models.deletion
+import django.db.models.functions
+from django.db import migrations, models
+
+
+def backfill_warehouse_stock(apps, schema_editor):
+    # Mevcut stok hareketlerinden depo bazında bakiyeleri oluşturur.
+    StockTransaction = apps.get_model('products', 'StockTransaction')
+    WarehouseStock = apps.get_model('products', 'WarehouseStock')
+    signed = models.Case(
+        models.When(transaction_type__in=['OUT', 'SCRAP'], then=-models.functions.Abs('quantity')),
+        default=models.functions.Abs('quantity'),
+    )
+    rows = (StockTransaction.objects.filter(warehouse__isnull=False)
+            .values('product_id', 'warehouse_id').annotate(total=models.Sum(signed)).order_by())
+    WarehouseStock.objects.bulk_create(
+        [WarehouseStock(product_id=row['product_id'], warehouse_id=row['warehouse_id'], quantity=row['total']) for row in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_costsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WarehouseStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=4, default=0, max_digits=12, verbose_name='Stok Miktarı')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='warehouse_stocks', to='products.product', verbose_name='Ürün')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stocks', to='products.warehouse', verbose_name='Depo')),
+            ],
+            options={
+                'verbose_name': 'Depo Stoğu',
+                'verbose_name_plural': 'Depo Stokları',
+                'constraints': [models.UniqueConstraint(fields=('product', 'warehouse'), name='unique_warehouse_stock')],
+            },
+        ),
+        migrations.RunPython(backfill_warehouse_stock, migrations.RunPython.noop),
+    ]
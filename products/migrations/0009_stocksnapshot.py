@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_warehousestock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Tarih')),
+                ('quantity', models.DecimalField(decimal_places=4, default=0, max_digits=12, verbose_name='Gün Sonu Miktarı')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='products.product', verbose_name='Ürün')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='products.warehouse', verbose_name='Depo')),
+            ],
+            options={
+                'verbose_name': 'Stok Fotoğrafı',
+                'verbose_name_plural': 'Stok Fotoğrafları',
+                'indexes': [models.Index(fields=['date'], name='stock_snapshot_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'warehouse', 'date'), name='unique_stock_snapshot_day')],
+            },
+        ),
+    ]
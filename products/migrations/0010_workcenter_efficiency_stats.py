@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:54
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_efficiency_stats(apps, schema_editor):
+    # Mevcut makineler için son 100 üretim kaydından verimlilik penceresini oluşturur.
+    WorkCenter = apps.get_model('products', 'WorkCenter')
+    ProductionLog = apps.get_model('products', 'ProductionLog')
+    for work_center in WorkCenter.objects.all():
+        logs = list(ProductionLog.objects.filter(work_center_id=work_center.pk).order_by('-id').values_list('planned_duration', 'actual_duration')[:100])
+        if not logs:
+            continue
+        work_center.efficiency_log_count = len(logs)
+        work_center.efficiency_planned_total = sum((planned for planned, _ in logs), Decimal('0'))
+        work_center.efficiency_actual_total = sum((actual for _, actual in logs), Decimal('0'))
+        if work_center.efficiency_actual_total == 0:
+            work_center.efficiency_factor = Decimal('1.00')
+        else:
+            ratio = work_center.efficiency_planned_total / work_center.efficiency_actual_total
+            work_center.efficiency_factor = min(ratio, Decimal('1.20')).quantize(Decimal('0.01'))
+        work_center.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_stocksnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workcenter',
+            name='efficiency_actual_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14, verbose_name='Toplam Gerçekleşen Süre'),
+        ),
+        migrations.AddField(
+            model_name='workcenter',
+            name='efficiency_log_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Verimlilik Kayıt Sayısı'),
+        ),
+        migrations.AddField(
+            model_name='workcenter',
+            name='efficiency_planned_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14, verbose_name='Toplam Planlanan Süre'),
+        ),
+        migrations.RunPython(backfill_efficiency_stats, migrations.RunPython.noop),
+    ]
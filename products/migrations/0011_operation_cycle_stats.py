@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:54
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_cycle_stats(apps, schema_editor):
+    # Mevcut operasyonlar için son 50 üretim kaydından çevrim süresi penceresini oluşturur.
+    Operation = apps.get_model('products', 'Operation')
+    ProductionLog = apps.get_model('products', 'ProductionLog')
+    for operation in Operation.objects.all():
+        logs = list(ProductionLog.objects.filter(operation_id=operation.pk).order_by('-id').values_list('actual_duration', 'quantity_produced')[:50])
+        if not logs:
+            continue
+        operation.cycle_log_count = len(logs)
+        operation.cycle_duration_total = sum((duration for duration, _ in logs), Decimal('0'))
+        operation.cycle_duration_sq_total = sum((duration * duration for duration, _ in logs), Decimal('0'))
+        operation.cycle_quantity_total = sum((quantity for _, quantity in logs), Decimal('0'))
+        operation.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_workcenter_efficiency_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='operation',
+            name='cycle_duration_sq_total',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=24, verbose_name='Süre Kareleri Toplamı'),
+        ),
+        migrations.AddField(
+            model_name='operation',
+            name='cycle_duration_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14, verbose_name='Toplam Gerçekleşen Süre'),
+        ),
+        migrations.AddField(
+            model_name='operation',
+            name='cycle_log_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Kayıt Sayısı'),
+        ),
+        migrations.AddField(
+            model_name='operation',
+            name='cycle_quantity_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14, verbose_name='Toplam Üretilen Miktar'),
+        ),
+        migrations.RunPython(backfill_cycle_stats, migrations.RunPython.noop),
+    ]
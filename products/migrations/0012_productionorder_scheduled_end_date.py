@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_operation_cycle_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productionorder',
+            name='scheduled_end_date',
+            field=models.DateField(blank=True, null=True, verbose_name='Çizelgelenen Bitiş'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_productionorder_scheduled_end_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productionlog',
+            index=models.Index(fields=['work_center', '-id'], name='production_log_wc_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productionlog',
+            index=models.Index(fields=['operation', '-id'], name='production_log_op_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productionlog',
+            index=models.Index(fields=['work_center', 'created_at'], name='production_log_wc_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productionorder',
+            index=models.Index(condition=models.Q(('status__in', ['PLANNED', 'IN_PROGRESS'])), fields=['product', 'due_date'], name='production_order_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productionorder',
+            index=models.Index(fields=['status', 'due_date'], name='prod_order_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesorder',
+            index=models.Index(condition=models.Q(('is_shipped', False)), fields=['product', 'delivery_date'], name='sales_order_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stocktransaction',
+            index=models.Index(fields=['product', 'warehouse', 'created_at'], name='stock_tx_product_wh_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stocktransaction',
+            index=models.Index(fields=['created_at'], name='stock_tx_created_idx'),
+        ),
+    ]
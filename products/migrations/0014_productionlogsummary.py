@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0013_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductionLogSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='Ay')),
+                ('log_count', models.PositiveIntegerField(default=0, verbose_name='Kayıt Sayısı')),
+                ('planned_duration_total', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Toplam Planlanan Süre (Dakika)')),
+                ('actual_duration_total', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Toplam Gerçekleşen Süre (Dakika)')),
+                ('quantity_produced_total', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Toplam Üretilen Miktar')),
+                ('operation', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='log_summaries', to='products.operation', verbose_name='Operasyon')),
+                ('shift', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='products.shift', verbose_name='Vardiya')),
+                ('work_center', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='log_summaries', to='products.workcenter', verbose_name='Üretim Merkezi')),
+            ],
+            options={
+                'verbose_name': 'Aylık Üretim Özeti',
+                'verbose_name_plural': 'Aylık Üretim Özetleri',
+                'indexes': [models.Index(fields=['month', 'work_center'], name='log_summary_month_wc_idx')],
+            },
+        ),
+    ]
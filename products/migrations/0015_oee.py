@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0014_productionlogsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OEEDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Tarih')),
+                ('planned_minutes', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Planlanan Süre (Dakika)')),
+                ('downtime_minutes', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Duruş Süresi (Dakika)')),
+                ('ideal_minutes', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='İdeal Süre (Dakika)')),
+                ('produced_quantity', models.DecimalField(decimal_places=4, default=0, max_digits=16, verbose_name='Üretilen Miktar')),
+                ('good_quantity', models.DecimalField(decimal_places=4, default=0, max_digits=16, verbose_name='Sağlam Miktar')),
+                ('availability', models.DecimalField(decimal_places=4, default=0, max_digits=5, verbose_name='Kullanılabilirlik')),
+                ('performance', models.DecimalField(decimal_places=4, default=0, max_digits=5, verbose_name='Performans')),
+                ('quality', models.DecimalField(decimal_places=4, default=0, max_digits=5, verbose_name='Kalite')),
+                ('oee', models.DecimalField(decimal_places=4, default=0, max_digits=5, verbose_name='OEE')),
+                ('shift', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='products.shift', verbose_name='Vardiya')),
+                ('work_center', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='oee_days', to='products.workcenter', verbose_name='Üretim Merkezi')),
+            ],
+            options={
+                'verbose_name': 'Günlük OEE',
+                'verbose_name_plural': 'Günlük OEE Değerleri',
+                'indexes': [models.Index(fields=['date', 'work_center'], name='oee_daily_date_wc_idx'), models.Index(fields=['work_center', 'date'], name='oee_daily_wc_date_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='OEEDirtyDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Tarih')),
+                ('work_center', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='products.workcenter', verbose_name='Üretim Merkezi')),
+            ],
+            options={
+                'verbose_name': 'Bekleyen OEE Günü',
+                'verbose_name_plural': 'Bekleyen OEE Günleri',
+                'constraints': [models.UniqueConstraint(fields=('work_center', 'date'), name='unique_oee_dirty_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:09
+
+from django.db import migrations, models
+
+
+def backfill_category_paths(apps, schema_editor):
+    # Mevcut kategorilerin ağaç yollarını kökten başlayarak seviye seviye oluşturur.
+    Category = apps.get_model('products', 'Category')
+    children = {}
+    for pk, parent_id in Category.objects.values_list('pk', 'parent_id'):
+        children.setdefault(parent_id, []).append(pk)
+
+    changed = []
+    stack = [(pk, '', 0) for pk in children.get(None, [])]
+    while stack:
+        pk, parent_path, depth = stack.pop()
+        path = f"{parent_path}{pk}/"
+        changed.append(Category(pk=pk, path=path, depth=depth))
+        stack.extend((child, path, depth + 1) for child in children.get(pk, []))
+    Category.objects.bulk_update(changed, ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0015_oee'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Seviye'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255, verbose_name='Ağaç Yolu'),
+        ),
+        migrations.RunPython(backfill_category_paths, migrations.RunPython.noop),
+    ]
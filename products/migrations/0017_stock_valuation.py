@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_stock_values(apps, schema_editor):
+    # Mevcut stok, birim fiyattan açılış bakiyesi olarak değerlenir. (Geçmişten hesap için: rebuild_stock_valuation)
+    Product = apps.get_model('products', 'Product')
+    Product.objects.filter(stock_quantity__gt=0).update(stock_value=F('price') * F('stock_quantity'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0016_category_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='stock_value',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=16, verbose_name='Stok Değeri'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='valuation_method',
+            field=models.CharField(choices=[('AVG', 'Hareketli Ortalama'), ('FIFO', 'FIFO (İlk Giren İlk Çıkar)')], default='AVG', max_length=4, verbose_name='Değerleme Yöntemi'),
+        ),
+        migrations.AddField(
+            model_name='stocktransaction',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=14, null=True, verbose_name='Birim Maliyet'),
+        ),
+        migrations.CreateModel(
+            name='CostLayer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=4, max_digits=12, verbose_name='Giriş Miktarı')),
+                ('remaining_quantity', models.DecimalField(decimal_places=4, max_digits=12, verbose_name='Kalan Miktar')),
+                ('unit_cost', models.DecimalField(decimal_places=4, max_digits=14, verbose_name='Birim Maliyet')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='products.product', verbose_name='Ürün')),
+                ('source', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cost_layers', to='products.stocktransaction', verbose_name='Giriş Hareketi')),
+            ],
+            options={
+                'verbose_name': 'Maliyet Katmanı',
+                'verbose_name_plural': 'Maliyet Katmanları',
+                'indexes': [models.Index(condition=models.Q(('remaining_quantity__gt', 0)), fields=['product', 'id'], name='cost_layer_open_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_stock_values, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0017_stock_valuation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=4, max_digits=16, verbose_name='Miktar')),
+                ('order_date', models.DateField(verbose_name='Sipariş Tarihi')),
+                ('due_date', models.DateField(verbose_name='İhtiyaç Tarihi')),
+                ('calculated_at', models.DateTimeField(auto_now_add=True, verbose_name='Hesaplama Tarihi')),
+            ],
+            options={
+                'verbose_name': 'Satın Alma Önerisi',
+                'verbose_name_plural': 'Satın Alma Önerileri',
+            },
+        ),
+        migrations.AddField(
+            model_name='productionorder',
+            name='mrp_generated',
+            field=models.BooleanField(default=False, editable=False, verbose_name='MRP Önerisi'),
+        ),
+        migrations.AddIndex(
+            model_name='productionorder',
+            index=models.Index(condition=models.Q(('mrp_generated', True), ('status', 'DRAFT')), fields=['product'], name='production_order_mrp_idx'),
+        ),
+        migrations.AddField(
+            model_name='purchasesuggestion',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='purchase_suggestions', to='products.product', verbose_name='Ürün'),
+        ),
+        migrations.AddIndex(
+            model_name='purchasesuggestion',
+            index=models.Index(fields=['product', 'due_date'], name='purchase_suggestion_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0018_time_phased_mrp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MRPChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reason', models.CharField(blank=True, max_length=30, verbose_name='Değişiklik Kaynağı')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='İşaretlenme Tarihi')),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='mrp_change', to='products.product', verbose_name='Ürün')),
+            ],
+            options={
+                'verbose_name': 'MRP Değişiklik Kaydı',
+                'verbose_name_plural': 'MRP Değişiklik Kayıtları',
+            },
+        ),
+    ]
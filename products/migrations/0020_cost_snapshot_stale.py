@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0019_mrp_change_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='costsnapshot',
+            name='is_stale',
+            field=models.BooleanField(default=False, verbose_name='Eskimiş mi?'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0020_cost_snapshot_stale'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productionorder',
+            name='scheduled_start_date',
+            field=models.DateField(blank=True, null=True, verbose_name='Çizelgelenen Başlangıç'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models # models veritabanı eklenir.
 from decimal import Decimal # Matematiksel hassasiyet için eklenir.
 from datetime import date
+from .cache import cached_model_property, get_cache
 
 # Django'ya Category adında bir veritabanı tablosu oluşturtulur.
 class Category(models.Model):
@@ -15,6 +16,11 @@ class Category(models.Model):
     description = models.TextField(blank=True, null=True, verbose_name="Açıklama")
     # Kategorinin kullanımda olup olmadığını belirlenir.
     is_active = models.BooleanField(default=True, verbose_name="Aktif mi?")
+    # Ağaç Yolu (Materialized Path): Kökten bu kategoriye kadar olan id'ler. Örn: "3/17/42/"
+    # Bir kategorinin tüm alt kategorileri tek sorguda bulunur: path__startswith="3/17/"
+    path = models.CharField(max_length=255, default='', editable=False, db_index=True, verbose_name="Ağaç Yolu")
+    # Kök kategoriler 0. seviyededir.
+    depth = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name="Seviye")
 
     # Model ayarları yapılır. -Django İngilizce duyarlıdır.-
     class Meta:
@@ -26,6 +32,53 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+    def _tree_path(self):
+        parent_path = Category.objects.filter(pk=self.parent_id).values_list('path', flat=True).first() if self.parent_id else ''
+        return f"{parent_path}{self.pk}/"
+
+    # Bir kategori kendi alt kategorisinin altına taşınamaz. (Döngü oluşur.)
+    def clean(self):
+        from django.core.exceptions import ValidationError
+
+        if self.pk and self.parent_id:
+            parent_path = Category.objects.filter(pk=self.parent_id).values_list('path', flat=True).first() or ''
+            if f"/{parent_path}".find(f"/{self.pk}/") != -1:
+                raise ValidationError({'parent': "Kategori kendi alt kategorisinin altına taşınamaz."})
+
+    # Ağaç yolu her kayıtta güncellenir. Kategori taşındıysa tüm alt kategorilerin yolu tek UPDATE ile düzeltilir.
+    # Bellekteki kategori ağacı, yollar yazılıp işlem tamamlandıktan sonra temizlenir; aksi halde araya giren bir istek
+    # eski yolları tekrar belleğe alabilirdi.
+    def save(self, *args, **kwargs):
+        from django.db import transaction
+        from django.db.models import F, Value
+        from django.db.models.functions import Concat, Substr
+        from .categories import invalidate_tree
+
+        with transaction.atomic():
+            transaction.on_commit(invalidate_tree)
+            if self.pk is None:
+                super().save(*args, **kwargs)
+                self.path = self._tree_path()
+                self.depth = self.path.count('/') - 1
+                Category.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+                return
+
+            old_path = Category.objects.filter(pk=self.pk).values_list('path', flat=True).first()
+            new_path = self._tree_path()
+            if old_path and new_path != old_path and new_path.startswith(old_path):
+                raise ValueError("Kategori kendi alt kategorisinin altına taşınamaz.")
+            self.path = new_path
+            self.depth = new_path.count('/') - 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'path', 'depth'}
+            super().save(*args, **kwargs)
+
+            if old_path and old_path != new_path:
+                Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                    path=Concat(Value(new_path), Substr('path', len(old_path) + 1), output_field=models.CharField()),
+                    depth=F('depth') + (self.depth - (old_path.count('/') - 1)),
+                )
+
 
 class Product(models.Model):
     # Ölçü Birimleri
@@ -80,6 +133,24 @@ class Product(models.Model):
     lead_time = models.PositiveIntegerField(default=0, verbose_name="Tedarik Süresi (Gün)")
     # Kritik stok seviyesi. Bu seviyenin altına düşülünce sistem uyarı verir.
     min_stock_level = models.DecimalField(max_digits=12, decimal_places=4, default=0, verbose_name="Minimum Stok Seviyesi")
+    # Alt Seviye Kodu (Low-Level Code): Ürünün herhangi bir ürün ağacında göründüğü en derin seviye.
+    # MRP, ürünleri bu koda göre sıralayarak her ürünü tek seferde hesaplar. (products/bom.py tarafından hesaplanır.)
+    low_level_code = models.PositiveIntegerField(default=0, editable=False, verbose_name="Alt Seviye Kodu")
+    # Stok Değerleme Yöntemi: FIFO (İlk giren ilk çıkar) veya Hareketli Ortalama.
+    VALUATION_METHODS = [
+        ('AVG', 'Hareketli Ortalama'),
+        ('FIFO', 'FIFO (İlk Giren İlk Çıkar)'),
+    ]
+    valuation_method = models.CharField(max_length=4, choices=VALUATION_METHODS, default='AVG', verbose_name="Değerleme Yöntemi")
+    # Stok Değeri: Eldeki stoğun maliyet değeri. Her stok hareketinde artımlı güncellenir. (products/valuation.py)
+    stock_value = models.DecimalField(max_digits=16, decimal_places=4, default=0, editable=False, verbose_name="Stok Değeri")
+
+    # Ortalama Birim Maliyet = Stok Değeri / Stok Miktarı
+    @property
+    def average_cost(self):
+        if self.stock_quantity > 0:
+            return (self.stock_value / self.stock_quantity).quantize(Decimal('0.0001'))
+        return self.price
 
     # Akıllı Talep Hesabı
     # Bu özellik, Net İhtiyacı otonomlaştırır.
@@ -88,16 +159,22 @@ class Product(models.Model):
         """
         Net İhtiyaç = (Toplam Satış Siparişleri + Emniyet Stoku) - (Mevcut Stok + Devam Eden Üretim)
         Bu fonksiyon, MRP (Malzeme İhtiyaç Planlaması) içindir.
+        Hesap toplu MRP servisine (products/mrp.py) devredilmiştir.
         """
-        # 1. Sevk edilmemiş toplam müşteri talebi
-        total_demand = sum(order.quantity for order in self.salesorder_set.filter(is_shipped=False))
+        # 1. MRP servisi bu ürünü bir listeyle birlikte hesapladıysa o değer kullanılır.
+        if hasattr(self, '_net_requirement'):
+            return self._net_requirement
 
-        # 2. Şu an üretimde olan miktar
-        in_production = sum(order.planned_quantity - order.actual_quantity for order in self.productionorder_set.filter(status__in=['PLANNED', 'IN_PROGRESS']))
+        # 2. Son MRP sonucu select_related ile geldiyse ek sorgu çalışmaz.
+        # (hasattr kullanılmaz: Önbellekte yoksa ilişkiyi okumak için ayrı sorgu çalıştırırdı.)
+        if Product.mrp_result.is_cached(self):
+            result = getattr(self, 'mrp_result', None)
+            if result is not None:
+                return result.net_requirement
 
-        # Formülasyon
-        requirement = (total_demand + self.min_stock_level) - (self.stock_quantity + in_production)
-        return max(requirement, Decimal('0'))  # İhtiyaç negatif çıkamaz.
+        # 3. Son MRP sonucu varsa o, yoksa bu ürün için anlık hesap kullanılır. (Tek sorgu)
+        from .mrp import product_net_requirement
+        return product_net_requirement(self)
 
 
     # Otonom Stok Kontrolü
@@ -111,16 +188,33 @@ class Product(models.Model):
         return "GÜVENLİ."
 
     # Otonom Rota Süresi Hesabı
-    @property
+    # Sonuç önbellekte tutulur (products/cache.py). Rota, reçete, makine veya üretim kaydı değiştiğinde yenilenir.
+    @cached_model_property
     def calculated_production_time(self):
         """Operasyonlardaki süreleri ve makine verimliliklerini toplayarak gerçekçi üretim süresini (dakika) hesaplar."""
-        if hasattr(self, 'bom_header'):
-             total = sum(
-                (op.setup_time + op.cycle_time) / op.work_center.efficiency_factor
-                for op in self.bom_header.operations.all()
-             )
+        if not hasattr(self, 'bom_header'):
+            return 0
+        # Verimlilik artık WorkCenter üzerinde bir alan olduğu için makineler tek JOIN ile gelir.
+        # Elle 0 girilmiş verimlilik %100 sayılır.
+        total = sum(
+            ((op.setup_time + op.cycle_time) / (op.work_center.efficiency_factor or 1)
+             for op in self.bom_header.operations.select_related('work_center')),
+            Decimal('0')
+        )
         return round(total, 2)
-        return 0
+
+    # Stokla birlikte oluşturulan ürünün açılış bakiyesi birim fiyattan değerlenir; FIFO ürünlerde açılış katmanı açılır.
+    # Aksi halde ilk çıkışlar değeri olmayan stoktan düşülür ve stok değeri eksiye iner. (products/valuation.py)
+    def save(self, *args, **kwargs):
+        from django.db import transaction
+
+        opening = self._state.adding and self.stock_quantity > 0 and not self.stock_value
+        if opening:
+            self.stock_value = (Decimal(str(self.stock_quantity)) * Decimal(str(self.price))).quantize(Decimal('0.0001'))
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if opening and self.valuation_method == 'FIFO':
+                CostLayer.objects.create(product=self, quantity=self.stock_quantity, remaining_quantity=self.stock_quantity, unit_cost=self.price)
 
     class Meta:
         verbose_name = "Üretim"  # Tekil ismi
@@ -151,6 +245,13 @@ class BOM(models.Model):
     def __str__(self):
         return f"BOM: {self.parent_product.name} (v{self.version})"
 
+    # Düzleştirilmiş ürün ağacı kayıt sinyalinde güncellenir (products/signals.py). Güncelleme döngü bulursa
+    # (örn. pasif reçete tekrar aktifleştirildiğinde) reçetenin kaydı da geri alınır.
+    def save(self, *args, **kwargs):
+        from django.db import transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 # Ürün Ağacı Kalemi Oluşturma
 class BOMItem(models.Model):
     # ForeignKey: Bir ürün ağacı başlığının altında birçok farklı malzeme olabilir.
@@ -181,6 +282,25 @@ class BOMItem(models.Model):
         multiplier = Decimal('1') - (self.scrap_factor / Decimal('100'))
         return self.quantity / multiplier
 
+    # Bir ürün kendisinin veya kendi alt bileşenlerinden birinin bileşeni olamaz. (Döngü oluşur.)
+    # Kontrol düzleştirilmiş ürün ağacından (BOMClosure) tek sorguyla yapılır.
+    def clean(self):
+        from django.core.exceptions import ValidationError
+
+        # getattr: Reçete henüz seçilmemişse (admin satır içi formu) kontrol reçete kaydında yapılır.
+        parent_id = getattr(getattr(self, 'bom', None), 'parent_product_id', None)
+        if parent_id is None or self.child_product_id is None:
+            return
+        if self.child_product_id == parent_id or BOMClosure.objects.filter(ancestor_id=self.child_product_id, descendant_id=parent_id).exists():
+            raise ValidationError({'child_product': "Bu bileşen ana ürünü zaten (dolaylı olarak) içeriyor; ürün ağacında döngü oluşur."})
+
+    # Kayıt ve düzleştirilmiş ürün ağacının güncellenmesi (products/signals.py) tek işlemde yapılır.
+    # Döngü bulunursa (BOMCycleError) kalem de kaydedilmez.
+    def save(self, *args, **kwargs):
+        from django.db import transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Ürün Ağacı Kalemi"  # Tekil ismi
         verbose_name_plural = "Ürün Ağacı Kalemleri"  # Çoğul ismi
@@ -201,39 +321,26 @@ class WorkCenter(models.Model):
         verbose_name_plural = "Üretim Merkezleri"  # Çoğul ismi
 
     # Otonom Verimlilik Hesabı
-    # Property: Kullanıcının girmesine gerek kalmadan, sistemdeki geçmiş kayıtlara bakarak verimliliği hesaplar.
-    @property
-    def efficiency_factor(self):
-        """
-        Verimlilik = Toplam Planlanan Süre / Toplam Gerçekleşen Süre
-        Bu fonksiyon, bu makinede yapılan son 100 üretimin verilerini analiz eder.
-        """
-        # Makineye ait geçmiş üretim kayıtları çekilir.
-        logs = self.production_logs.all().order_by('-id')[:100]  # Son 100 kayıt
-
-        if not logs:
-            return Decimal('0.80')  # Hiç veri yoksa varsayılan olarak %80 kabul et.
-
-        total_planned = sum(log.planned_duration for log in logs)
-        total_actual = sum(log.actual_duration for log in logs)
-
-        if total_actual == 0:
-            return Decimal('1.00')
-
-        # Verimlilik oranının hesaplanması
-        efficiency = total_planned / total_actual
-        return min(efficiency, Decimal('1.20'))  # Maksimum %120 ile sınırlanır.
-
-    def __str__(self):
-        return f"{self.name} (Verimlilik: %{self.efficiency_factor * 100:.1f})"
+    # Verimlilik = Son 100 üretim kaydındaki Toplam Planlanan Süre / Toplam Gerçekleşen Süre
+    # Eskiden her okumada son 100 kayıt taranıyordu. Artık her yeni ProductionLog kaydında pencere toplamları
+    # (products/stats.py) güncellenir ve sonuç aşağıdaki alana yazılır. Okumak ek sorgu gerektirmez.
+    EFFICIENCY_WINDOW = 100  # Son 100 kayıt
+    MAX_EFFICIENCY = Decimal('1.20')  # Maksimum %120 ile sınırlanır.
+    MIN_EFFICIENCY = Decimal('0.01')  # Minimum %1 (Süreler verimliliğe bölünür.)
 
     # Verimlilik Faktörü: Makinenin ne kadar efektif çalıştığını gösterir.
+    # Hiç üretim kaydı yoksa elle girilen değer kullanılır.
     efficiency_factor = models.DecimalField(
         max_digits=3,
         decimal_places=2,
         default=0.90,
         verbose_name="Verimlilik Faktörü"
     )
+    # Verimlilik penceresindeki (son 100 kayıt) kayıt sayısı ve süre toplamları.
+    efficiency_log_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Verimlilik Kayıt Sayısı")
+    efficiency_planned_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False, verbose_name="Toplam Planlanan Süre")
+    efficiency_actual_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False, verbose_name="Toplam Gerçekleşen Süre")
+
     def __str__(self):
         return f"{self.name} (Verimlilik: %{self.efficiency_factor * 100:.1f})"
 
@@ -252,7 +359,16 @@ class Operation(models.Model):
     # İşlem Süresi (Dakika/Adet): Bir adet ürünün makinede kalma süresi.
     cycle_time = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="İşlem Süresi (Dakika/Adet)")
 
-    # Otonom Çevrim (İşlem) Süresi Hesabı
+    # Otonom Çevrim (İşlem) Süresi İstatistikleri
+    # Son 50 üretim kaydının toplamları, her yeni ProductionLog kaydında products/stats.py tarafından güncellenir.
+    # Böylece binlerce operasyonun rota süresi analizi tek tablo okumasıyla yapılır.
+    CYCLE_WINDOW = 50  # Son 50 kayıt
+    cycle_log_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Kayıt Sayısı")
+    cycle_duration_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False, verbose_name="Toplam Gerçekleşen Süre")
+    # Varyans hesabı için sürelerin karelerinin toplamı.
+    cycle_duration_sq_total = models.DecimalField(max_digits=24, decimal_places=4, default=0, editable=False, verbose_name="Süre Kareleri Toplamı")
+    cycle_quantity_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False, verbose_name="Toplam Üretilen Miktar")
+
     # Property: Geçmiş üretim kayıtlarına bakarak birim başına düşen gerçek süreyi hesaplar.
     @property
     def actual_cycle_time(self):
@@ -260,24 +376,25 @@ class Operation(models.Model):
         Gerçekleşen Çevrim Süresi = (Toplam Harcanan Süre - Toplam Hazırlık) / Toplam Üretilen Miktar
         Bu fonksiyon, sahadaki gerçek süreyi hesaplar.
         """
-        # Bir operasyona ait son 50 kayıt çekilir.
-        logs = self.logs.all().order_by('-id')[:50]
-
-        if not logs:
-            return self.cycle_time  # Veri yoksa standart süreyi döndürür.
-        total_actual_time = sum(log.actual_duration for log in logs)
-        total_quantity = sum(log.quantity_produced for log in logs)
         # Her kayıt için bir hazırlık süresi düştüğümüzü varsayıyoruz.
         # Eğer operatör makineyi sabah açtı ve 100 adet üretip kaydı kapattıysa; 1 adet ProductionLog demektir.
         # Eğer operatör 100 adetlik işi 3 farklı güne bölüp 3 ayrı kayıt (log) attıysa; 3 kez hazırlık süresi.
-        # logs.count() ifadesi "Kaç kez hazırlık/kurulum yapıldı?" sorusunun cevabıdır.
-        total_setup_overhead = logs.count() * self.setup_time
+        # cycle_log_count "Kaç kez hazırlık/kurulum yapıldı?" sorusunun cevabıdır.
+        total_setup_overhead = self.cycle_log_count * self.setup_time
 
-        if total_quantity > 0:
+        if self.cycle_quantity_total > 0:
             # Formül: Net Üretim Süresi / Toplam Miktar
-            return (total_actual_time - total_setup_overhead) / total_quantity
+            return (self.cycle_duration_total - total_setup_overhead) / self.cycle_quantity_total
+
+        return self.cycle_time  # Veri yoksa standart süreyi döndürür.
 
-        return self.cycle_time
+    # Kayıt başına gerçekleşen sürenin varyansı. Varyans = Kareler Ortalaması - Ortalamanın Karesi
+    @property
+    def duration_variance(self):
+        if self.cycle_log_count == 0:
+            return Decimal('0')
+        mean = self.cycle_duration_total / self.cycle_log_count
+        return max(self.cycle_duration_sq_total / self.cycle_log_count - mean * mean, Decimal('0'))
 
     class Meta:
         # Operasyonları işlem sırasına göre otomatik dizer.
@@ -285,8 +402,8 @@ class Operation(models.Model):
         verbose_name = "Operasyon"
         verbose_name_plural = "Operasyonlar"
 
-        def __str__(self):
-            return f"{self.bom.parent_product.name} - Adım {self.step_number}: {self.description}"
+    def __str__(self):
+        return f"{self.bom.parent_product.name} - Adım {self.step_number}: {self.description}"
 
 # VARDİYA: Üretimin hangi zaman diliminde yapıldığını takip eder.
 class Shift(models.Model):
@@ -357,6 +474,13 @@ class ProductionLog(models.Model):
     def __str__(self):
         return f"{self.work_center.name} Kaydı - {self.created_at}"
 
+# Üretim emri sorguları için yardımcı metotlar.
+class ProductionOrderQuerySet(models.QuerySet):
+    def with_progress(self):
+        """Her iş emrinin üretilen toplam miktarını sorguya ekler. (current_progress ek sorgu çalıştırmaz.)"""
+        return self.annotate(produced_quantity_total=models.Sum('logs__quantity_produced'))
+
+
 # Üretim Emri: Üretimin planlandığı ve takip edildiği ana modül.
 class ProductionOrder(models.Model):
     # Üretim durumlarını tanımlıyoruz.
@@ -379,6 +503,15 @@ class ProductionOrder(models.Model):
     due_date = models.DateField(verbose_name="Teslim Tarihi (Deadline)")
     # Üretimin şu anki durumu.
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='DRAFT', verbose_name="Durum")
+    # Sonlu kapasite çizelgelemesinin (products/scheduling.py) hesapladığı başlangıç ve bitiş günleri.
+    # Planlanan başlangıç (start_date) çizelgelemenin en erken başlangıç girdisidir; çizelgeleme onu değiştirmez.
+    scheduled_start_date = models.DateField(null=True, blank=True, verbose_name="Çizelgelenen Başlangıç")
+    scheduled_end_date = models.DateField(null=True, blank=True, verbose_name="Çizelgelenen Bitiş")
+    # Zaman fazlı MRP'nin (products/mrp.py) önerdiği taslak emir mi? Her MRP çalışmasında bu taslaklar yeniden oluşturulur.
+    # Planlamacı onaylayıp durumunu değiştirene kadar taslaktır.
+    mrp_generated = models.BooleanField(default=False, editable=False, verbose_name="MRP Önerisi")
+
+    objects = ProductionOrderQuerySet.as_manager()
 
     # Property: Gecikme olup olmadığını kontrol eder.
     @property
@@ -392,10 +525,17 @@ class ProductionOrder(models.Model):
     @property
     def current_progress(self):
         # Loglardan gelen gerçekleşen miktara göre ilerleme yüzdesini hesaplar.
-        # self.logs.all(): Bu üretim emrine bağlı olan tüm ProductionLog (üretim kayıtlarını) getirir.
-        # log.quantity_produced for log in ...: Her bir kaydın içine girer ve "Bu kayıtta kaç adet üretilmiş?" diye bakar.
-        # sum(...): Operatörlerin farklı zamanlarda girdiği tüm miktarları toplar.
-        actual = sum(log.quantity_produced for log in self.logs.all())
+        # Sum('quantity_produced'): Operatörlerin farklı zamanlarda girdiği tüm miktarları veritabanında toplar.
+        # Liste ekranlarında toplam, with_progress() ile ana sorguya eklenir; satır başına ek sorgu çalışmaz.
+        # Tek nesne okumalarında toplam önbellekten gelir; iş emrinin üretim kayıtları değişince yenilenir.
+        if hasattr(self, 'produced_quantity_total'):
+            actual = self.produced_quantity_total or 0
+        elif self.pk is None:
+            actual = 0
+        else:
+            actual = get_cache().get_or_set(ProductionOrder, self.pk, 'produced_quantity', lambda: (
+                self.logs.aggregate(total=models.Sum('quantity_produced'))['total'] or 0
+            ))
         # 0'a bölmesini engeller:
         if self.planned_quantity > 0:
             # actual değişkeni, o ana kadar üretilmiş toplam sağlam ürün miktarını verir.
@@ -408,25 +548,33 @@ class ProductionOrder(models.Model):
     def estimated_total_cost(self):
         """
         Her operasyonun süresini, o operasyonun yapıldığı makinenin saatlik ücretiyle çarpar.
+        Maliyet toplama (rollup_costs) çalıştırılmışsa güncel reçete versiyonunun maliyet kartı kullanılır.
+        Maliyet yalnızca ürüne ve miktara bağlıdır; önbellekte ürün anahtarı altında tutulur ve reçete/rota değişince yenilenir.
         """
-        # 1. Malzeme Maliyeti (BOM'dan fireli hesaplama ile gelir)
-        mat_cost = sum(i.total_required_quantity * i.child_product.price for i in self.product.bom_header.items.all())
+        if self.product_id is None:
+            return self._estimate_total_cost()
+        return get_cache().get_or_set(Product, self.product_id, f'order_cost:{self.planned_quantity}', self._estimate_total_cost)
+
+    def _estimate_total_cost(self):
+        # Güncel reçete versiyonuna ait güncel (eskimemiş) maliyet kartı varsa tek sorguyla hesaplanır.
+        snapshot = CostSnapshot.objects.filter(
+            product_id=self.product_id, product__bom_header__version=models.F('bom_version'), is_stale=False).first()
+        if snapshot is not None:
+            return snapshot.total_cost(self.planned_quantity)
 
-        # 2. İşçilik ve Makine Maliyeti
-        labor_cost = Decimal('0')
         # hasattr: Eğer bu ürünün bir reçetesi varsa hesapla yoksa hata verme.
         # her ürünün reçetesi olmayabilir, bu yüzden hasattr kullanılır. Reçetesi yoksa hata vermez, diğerine geçer.
-        if hasattr(self.product, 'bom_header'):
-            for op in self.product.bom_header.operations.all():
-                # Operasyon Süresi (Hazırlık + İşlem)
-                op_duration_minutes = op.setup_time + (op.cycle_time * self.planned_quantity)
+        if not hasattr(self.product, 'bom_header'):
+            return Decimal('0')
 
-                # Dakikayı saate çevirip o makinenin (WorkCenter) saatlik ücretiyle çarpıyoruz.
-                op_cost = (op_duration_minutes / Decimal('60')) * op.work_center.hourly_rate
-                labor_cost += op_cost
+        # Kart yoksa maliyet kartıyla aynı kuralla yalnızca bu ürünün alt ağacı için hesaplanır:
+        # Malzeme = Bileşenlerin fireli miktarı * birim maliyeti (Yarı mamullerde alt seviyelerin malzeme + işçiliği)
+        # İşçilik = İşlem süresi * makinenin saatlik ücreti, Hazırlık = İş emri başına bir kez.
+        from .costing import product_cost
+        material, labor, setup = product_cost(self.product_id)
 
-        # Toplam Maliyet: (Malzeme * Miktar) + Operasyonların Toplam Maliyeti
-        return (mat_cost * self.planned_quantity) + labor_cost
+        # Toplam Maliyet: (Malzeme + İşçilik) * Miktar + Hazırlık
+        return (material + labor) * self.planned_quantity + setup
 
     def __str__(self):
         return f"İş Emri #{self.id} - %{self.current_progress}"
@@ -434,6 +582,14 @@ class ProductionOrder(models.Model):
     class Meta:
         verbose_name = "Üretim Emri"
         verbose_name_plural = "Üretim Emirleri"
+        indexes = [
+            # MRP: Ürün başına devam eden (PLANNED/IN_PROGRESS) iş emirleri. Kısmi indeks; biten emirler indekse girmez.
+            models.Index(fields=['product', 'due_date'], condition=models.Q(status__in=['PLANNED', 'IN_PROGRESS']), name='production_order_active_idx'),
+            # Çizelgeleme: Duruma göre süzüp teslim tarihine göre sıralama.
+            models.Index(fields=['status', 'due_date'], name='prod_order_status_due_idx'),
+            # MRP: Yeniden planlanan ürünlerin eski taslak önerileri silinir.
+            models.Index(fields=['product'], condition=models.Q(status='DRAFT', mrp_generated=True), name='production_order_mrp_idx'),
+        ]
 
 # Üretim Kaydı (Loglar)
 class ProductionLog(models.Model):
@@ -451,6 +607,13 @@ class ProductionLog(models.Model):
     class Meta:
         verbose_name = "Üretim Kaydı"  # Tekil ismi
         verbose_name_plural = "Üretim Kayıtları"  # Çoğul ismi
+        indexes = [
+            # Makine/operasyon başına en yeni kayıtlar (verimlilik ve çevrim süresi pencereleri).
+            models.Index(fields=['work_center', '-id'], name='production_log_wc_recent_idx'),
+            models.Index(fields=['operation', '-id'], name='production_log_op_recent_idx'),
+            # Makine başına tarih aralığı sorguları.
+            models.Index(fields=['work_center', 'created_at'], name='production_log_wc_time_idx'),
+        ]
     def __str__(self):
         return f"{self.work_center.name} - {self.created_at}"
 
@@ -473,23 +636,49 @@ class StockTransaction(models.Model):
     # Bu hareket hangi iş emri veya satın alma ile ilgili?
     notes = models.CharField(max_length=255, blank=True, verbose_name="Notlar")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="İşlem Tarihi")
+    # Birim Maliyet: Girişlerde satın alma/üretim maliyeti (Boş bırakılırsa ortalama maliyet veya birim fiyat kullanılır).
+    # Çıkışlarda değerleme yöntemine göre sistem tarafından hesaplanır.
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4, null=True, blank=True, verbose_name="Birim Maliyet")
+
+    # Çıkış yönlü (stoktan düşen) hareket tipleri.
+    OUTGOING_TYPES = ['OUT', 'SCRAP']
+
+    # Stoğa etkisi: Çıkışlar eksi, diğerleri artı yönlüdür.
+    @property
+    def signed_quantity(self):
+        if self.transaction_type in self.OUTGOING_TYPES:
+            return -abs(self.quantity)
+        return abs(self.quantity)
 
     # *args (sıralı) ve **kwargs (isimli) argümanları; Django'nun orijinal kaydet metodudur.
     # gelebilecek ekstra parametreleri (örn: güncelleme) güvenli ve kaybetmeden aktarmak için kullanılan esnek taşıma sağlar.
     def save(self, *args, **kwargs):
         # Her hareket oluşturulduğunda ana stok miktarını otomatik güncelle!
         # Bu işlem stok takibini otonom hale getirir.
-        if self.transaction_type in ['OUT', 'SCRAP']:
-            self.product.stock_quantity -= abs(self.quantity)
-        else:
-            self.product.stock_quantity += abs(self.quantity)
-
-        self.product.save()
-        super().save(*args, **kwargs)
+        # Stok, veritabanında F() ile artırılır (products/stock.py). Aynı anda çalışan işlemler birbirinin güncellemesini ezmez.
+        # Mevcut bir hareketin düzenlenmesi stoğu tekrar değiştirmez; düzeltme için yeni bir ADJ hareketi girilir.
+        # Stok değeri de aynı işlemde güncellenir: Maliyet, stok miktarı değişmeden önce hesaplanır (products/valuation.py).
+        from django.db import transaction
+        from .stock import apply_stock_deltas
+        from .valuation import plan_valuation
+
+        adding = self._state.adding
+        with transaction.atomic():
+            valuation = plan_valuation([self]) if adding else None
+            super().save(*args, **kwargs)
+            if adding:
+                valuation.save()
+                apply_stock_deltas([self])
 
     class Meta:
         verbose_name = "Stok Hareketi"
         verbose_name_plural = "Stok Hareketleri"
+        indexes = [
+            # Ürün/depo bazında belirli bir tarihten sonraki hareketler (geçmiş stok sorguları).
+            models.Index(fields=['product', 'warehouse', 'created_at'], name='stock_tx_product_wh_time_idx'),
+            # Gün sonu fotoğrafı: Belirli bir andan sonraki tüm hareketler.
+            models.Index(fields=['created_at'], name='stock_tx_created_idx'),
+        ]
 
 
 # KALİTE KONTROL: Üretilen ürünlerin standartlara uygunluğunu denetler.
@@ -569,6 +758,10 @@ class SalesOrder(models.Model):
     class Meta:
         verbose_name = "Sipariş Talebi"
         verbose_name_plural = "Sipariş Talepleri"
+        indexes = [
+            # MRP: Ürün başına açık (sevk edilmemiş) siparişler. Kısmi indeks; sevk edilenler indekse girmez.
+            models.Index(fields=['product', 'delivery_date'], condition=models.Q(is_shipped=False), name='sales_order_open_idx'),
+        ]
     def __str__(self):
         return f"Sipariş #{self.id} - {self.customer.name}"
 
@@ -634,4 +827,240 @@ class QualityMeasurement(models.Model):
         return f"[{self.quality_check}] {self.measured_value}"
 
 
+# MRP SONUÇ TABLOSU: Son MRP çalışmasında her ürün için hesaplanan net ihtiyaç.
+# Product.net_requirement bu tabloyu önbellek olarak kullanır.
+class MRPResult(models.Model):
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name="mrp_result", verbose_name="Ürün")
+    # Sevk edilmemiş satış siparişlerinin toplamı.
+    open_demand = models.DecimalField(max_digits=16, decimal_places=4, default=0, verbose_name="Açık Talep")
+    # Planlanan ve üretimdeki iş emirlerinden beklenen miktar.
+    in_production = models.DecimalField(max_digits=16, decimal_places=4, default=0, verbose_name="Üretimdeki Miktar")
+    net_requirement = models.DecimalField(max_digits=16, decimal_places=4, default=0, verbose_name="Net İhtiyaç")
+    calculated_at = models.DateTimeField(auto_now=True, verbose_name="Hesaplama Tarihi")
+
+    class Meta:
+        verbose_name = "MRP Sonucu"
+        verbose_name_plural = "MRP Sonuçları"
+    def __str__(self):
+        return f"{self.product_id}: {self.net_requirement}"
+
+
+# NET DEĞİŞİM MRP: Son MRP çalışmasından sonra planını etkileyen bir değişiklik olan ürünler.
+# Satış siparişi, iş emri, stok hareketi, ürün ve reçete sinyalleri ile işaretlenir; "run_mrp --net-change" yalnızca
+# bu ürünleri ve alt bileşenlerini yeniden planlar.
+class MRPChangeLog(models.Model):
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name="mrp_change", verbose_name="Ürün")
+    # İlk değişikliğin kaynağı. (Örn: SalesOrder) Ürün tekrar işaretlenirse değişmez.
+    reason = models.CharField(max_length=30, blank=True, verbose_name="Değişiklik Kaynağı")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="İşaretlenme Tarihi")
+
+    class Meta:
+        verbose_name = "MRP Değişiklik Kaydı"
+        verbose_name_plural = "MRP Değişiklik Kayıtları"
+    def __str__(self):
+        return f"{self.product_id} ({self.reason})"
+
+
+# SATIN ALMA ÖNERİSİ: Zaman fazlı MRP'nin hammaddeler (RAW) için önerdiği tedarik.
+# Mamul ve yarı mamuller için taslak üretim emri (ProductionOrder, mrp_generated=True) oluşturulur.
+class PurchaseSuggestion(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="purchase_suggestions", verbose_name="Ürün")
+    quantity = models.DecimalField(max_digits=16, decimal_places=4, verbose_name="Miktar")
+    # Sipariş Tarihi = İhtiyaç Tarihi - Tedarik Süresi
+    order_date = models.DateField(verbose_name="Sipariş Tarihi")
+    due_date = models.DateField(verbose_name="İhtiyaç Tarihi")
+    calculated_at = models.DateTimeField(auto_now_add=True, verbose_name="Hesaplama Tarihi")
+
+    class Meta:
+        verbose_name = "Satın Alma Önerisi"
+        verbose_name_plural = "Satın Alma Önerileri"
+        indexes = [
+            models.Index(fields=['product', 'due_date'], name='purchase_suggestion_idx'),
+        ]
+    def __str__(self):
+        return f"{self.product_id}: {self.quantity} ({self.order_date})"
+
+
+# DÜZLEŞTİRİLMİŞ ÜRÜN AĞACI (Kapanış Tablosu)
+# Her ana ürün için tüm alt seviyelerdeki bileşenler ve 1 birim ana ürün için gereken toplam (fireli) miktar.
+# "Bu hammadde hangi mamullerde kullanılıyor?" sorusu ağacı gezmeden tek sorguda cevaplanır.
+# BOM ve BOMItem kaydedildiğinde/silindiğinde products/signals.py tarafından güncellenir.
+class BOMClosure(models.Model):
+    ancestor = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="closure_descendants", verbose_name="Ana Ürün")
+    descendant = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="closure_ancestors", verbose_name="Bileşen")
+    # 1 birim ana ürün için gereken toplam miktar. (Farklı yollardan gelen ihtiyaçlar toplanır.)
+    quantity = models.DecimalField(max_digits=30, decimal_places=10, verbose_name="Toplam Miktar")
+    # Bileşenin ana ürüne en kısa yoldan uzaklığı. (Doğrudan bileşen: 1)
+    depth = models.PositiveIntegerField(verbose_name="Seviye")
+
+    class Meta:
+        verbose_name = "Düzleştirilmiş Ürün Ağacı"
+        verbose_name_plural = "Düzleştirilmiş Ürün Ağaçları"
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='unique_bom_closure_pair'),
+        ]
+        indexes = [
+            # Nerede kullanılıyor (where-used) sorguları için.
+            models.Index(fields=['descendant', 'ancestor'], name='bom_closure_where_used_idx'),
+        ]
+    def __str__(self):
+        return f"{self.ancestor_id} > {self.descendant_id} ({self.quantity})"
+
+
+# STANDART MALİYET KARTI: Ürün ve reçete versiyonu başına hesaplanan birim maliyetler.
+# products/costing.py tüm reçeteleri alttan üste tek geçişte hesaplayarak bu tabloyu doldurur.
+class CostSnapshot(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="cost_snapshots", verbose_name="Ürün")
+    bom_version = models.CharField(max_length=10, verbose_name="Reçete Versiyonu")
+    # 1 birim için tüm alt seviyeler dahil malzeme maliyeti.
+    material_cost = models.DecimalField(max_digits=16, decimal_places=4, default=0, verbose_name="Birim Malzeme Maliyeti")
+    # 1 birim için işlem süresinden (cycle_time) gelen işçilik ve makine maliyeti.
+    labor_cost = models.DecimalField(max_digits=16, decimal_places=4, default=0, verbose_name="Birim İşçilik Maliyeti")
+    # İş emri başına bir kez oluşan hazırlık (setup) maliyeti. Miktardan bağımsızdır.
+    setup_cost = models.DecimalField(max_digits=16, decimal_places=4, default=0, verbose_name="Hazırlık Maliyeti")
+    # Kart hesaplandıktan sonra reçete kalemi, operasyon, bileşen fiyatı veya makine ücreti değişti mi?
+    # Eskimiş kartlar kullanılmaz; rollup_costs bir sonraki çalışmada yeniden hesaplar.
+    is_stale = models.BooleanField(default=False, verbose_name="Eskimiş mi?")
+    calculated_at = models.DateTimeField(auto_now=True, verbose_name="Hesaplama Tarihi")
+
+    # Toplam Maliyet = (Birim Malzeme + Birim İşçilik) * Miktar + Hazırlık Maliyeti
+    def total_cost(self, quantity):
+        return (self.material_cost + self.labor_cost) * quantity + self.setup_cost
+
+    class Meta:
+        verbose_name = "Maliyet Kartı"
+        verbose_name_plural = "Maliyet Kartları"
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'bom_version'], name='unique_cost_snapshot_version'),
+        ]
+    def __str__(self):
+        return f"{self.product_id} v{self.bom_version}: {self.material_cost + self.labor_cost}"
+
+
+# DEPO STOĞU: Ürünün her depodaki güncel miktarı.
+# Product.stock_quantity tüm depoların toplamıdır; bu tablo depo kırılımını tutar. (products/stock.py tarafından güncellenir.)
+class WarehouseStock(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="warehouse_stocks", verbose_name="Ürün")
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="stocks", verbose_name="Depo")
+    quantity = models.DecimalField(max_digits=12, decimal_places=4, default=0, verbose_name="Stok Miktarı")
+
+    class Meta:
+        verbose_name = "Depo Stoğu"
+        verbose_name_plural = "Depo Stokları"
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'warehouse'], name='unique_warehouse_stock'),
+        ]
+    def __str__(self):
+        return f"{self.product_id} @ {self.warehouse_id}: {self.quantity}"
 
+
+# GÜNLÜK STOK FOTOĞRAFI: Gün sonunda her ürünün her depodaki miktarı.
+# "X tarihinde stok neydi?" sorusu tüm geçmişi toplamak yerine en yakın fotoğraftan sonraki hareketlerle cevaplanır.
+class StockSnapshot(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="stock_snapshots", verbose_name="Ürün")
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="stock_snapshots", verbose_name="Depo")
+    # Fotoğrafın ait olduğu gün. Miktar o günün sonundaki bakiyedir.
+    date = models.DateField(verbose_name="Tarih")
+    quantity = models.DecimalField(max_digits=12, decimal_places=4, default=0, verbose_name="Gün Sonu Miktarı")
+
+    class Meta:
+        verbose_name = "Stok Fotoğrafı"
+        verbose_name_plural = "Stok Fotoğrafları"
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'warehouse', 'date'], name='unique_stock_snapshot_day'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='stock_snapshot_date_idx'),
+        ]
+    def __str__(self):
+        return f"{self.product_id} @ {self.warehouse_id} ({self.date}): {self.quantity}"
+
+
+# AYLIK ÜRETİM ÖZETİ: Kapanmış ayların üretim kayıtlarının makine/operasyon/vardiya bazında toplamları.
+# "archive_production_logs" komutu ile doldurulur. Geçmiş raporlar milyonlarca satır yerine bu özetleri okur.
+class ProductionLogSummary(models.Model):
+    # Özetin ait olduğu ay. (Ayın ilk günü)
+    month = models.DateField(verbose_name="Ay")
+    work_center = models.ForeignKey(WorkCenter, on_delete=models.CASCADE, related_name="log_summaries", verbose_name="Üretim Merkezi")
+    operation = models.ForeignKey(Operation, on_delete=models.SET_NULL, null=True, related_name="log_summaries", verbose_name="Operasyon")
+    shift = models.ForeignKey(Shift, on_delete=models.SET_NULL, null=True, verbose_name="Vardiya")
+    log_count = models.PositiveIntegerField(default=0, verbose_name="Kayıt Sayısı")
+    planned_duration_total = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name="Toplam Planlanan Süre (Dakika)")
+    actual_duration_total = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name="Toplam Gerçekleşen Süre (Dakika)")
+    quantity_produced_total = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name="Toplam Üretilen Miktar")
+
+    class Meta:
+        verbose_name = "Aylık Üretim Özeti"
+        verbose_name_plural = "Aylık Üretim Özetleri"
+        indexes = [
+            models.Index(fields=['month', 'work_center'], name='log_summary_month_wc_idx'),
+        ]
+    def __str__(self):
+        return f"{self.work_center_id} - {self.month:%Y-%m}"
+
+
+# GÜNLÜK OEE: Makine ve vardiya bazında günlük Toplam Ekipman Verimliliği (Kullanılabilirlik x Performans x Kalite).
+# products/oee.py yalnızca değişen günleri (OEEDirtyDay) gruplu sorgularla yeniden hesaplayarak bu tabloyu doldurur.
+class OEEDaily(models.Model):
+    work_center = models.ForeignKey(WorkCenter, on_delete=models.CASCADE, related_name="oee_days", verbose_name="Üretim Merkezi")
+    # Vardiyasız kayıtlar makinenin günlük kapasitesi üzerinden tek satırda toplanır.
+    shift = models.ForeignKey(Shift, on_delete=models.CASCADE, null=True, verbose_name="Vardiya")
+    date = models.DateField(verbose_name="Tarih")
+    # Planlanan Üretim Süresi: Vardiya süresi (Vardiyasız kayıtlar için makinenin günlük kapasitesi).
+    planned_minutes = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Planlanan Süre (Dakika)")
+    downtime_minutes = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Duruş Süresi (Dakika)")
+    # İdeal Süre: Üretilen miktar için operasyon kartına göre gereken süre (ProductionLog.planned_duration toplamı).
+    ideal_minutes = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="İdeal Süre (Dakika)")
+    produced_quantity = models.DecimalField(max_digits=16, decimal_places=4, default=0, verbose_name="Üretilen Miktar")
+    good_quantity = models.DecimalField(max_digits=16, decimal_places=4, default=0, verbose_name="Sağlam Miktar")
+    availability = models.DecimalField(max_digits=5, decimal_places=4, default=0, verbose_name="Kullanılabilirlik")
+    performance = models.DecimalField(max_digits=5, decimal_places=4, default=0, verbose_name="Performans")
+    quality = models.DecimalField(max_digits=5, decimal_places=4, default=0, verbose_name="Kalite")
+    oee = models.DecimalField(max_digits=5, decimal_places=4, default=0, verbose_name="OEE")
+
+    class Meta:
+        verbose_name = "Günlük OEE"
+        verbose_name_plural = "Günlük OEE Değerleri"
+        indexes = [
+            models.Index(fields=['date', 'work_center'], name='oee_daily_date_wc_idx'),
+            models.Index(fields=['work_center', 'date'], name='oee_daily_wc_date_idx'),
+        ]
+    def __str__(self):
+        return f"{self.work_center_id} {self.date} - %{self.oee * 100:.1f}"
+
+
+# OEE'si yeniden hesaplanacak makine-gün çiftleri. Üretim, bakım ve kalite kayıtlarının sinyalleri ile işaretlenir.
+class OEEDirtyDay(models.Model):
+    work_center = models.ForeignKey(WorkCenter, on_delete=models.CASCADE, verbose_name="Üretim Merkezi")
+    date = models.DateField(verbose_name="Tarih")
+
+    class Meta:
+        verbose_name = "Bekleyen OEE Günü"
+        verbose_name_plural = "Bekleyen OEE Günleri"
+        constraints = [
+            models.UniqueConstraint(fields=['work_center', 'date'], name='unique_oee_dirty_day'),
+        ]
+    def __str__(self):
+        return f"{self.work_center_id} {self.date}"
+
+
+# MALİYET KATMANI: FIFO ile değerlenen ürünlerin her girişi ayrı bir katmandır.
+# Çıkışlarda en eski katmandan başlanarak kalan miktar düşülür; tüm geçmiş yeniden oynatılmaz.
+class CostLayer(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="cost_layers", verbose_name="Ürün")
+    # Katmanı oluşturan giriş hareketi. (Açılış bakiyesi katmanlarında boştur.)
+    source = models.ForeignKey(StockTransaction, on_delete=models.SET_NULL, null=True, blank=True, related_name="cost_layers", verbose_name="Giriş Hareketi")
+    quantity = models.DecimalField(max_digits=12, decimal_places=4, verbose_name="Giriş Miktarı")
+    remaining_quantity = models.DecimalField(max_digits=12, decimal_places=4, verbose_name="Kalan Miktar")
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4, verbose_name="Birim Maliyet")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Oluşturulma Tarihi")
+
+    class Meta:
+        verbose_name = "Maliyet Katmanı"
+        verbose_name_plural = "Maliyet Katmanları"
+        indexes = [
+            # Çıkışlarda yalnızca açık (kalanı olan) katmanlar okunur.
+            models.Index(fields=['product', 'id'], condition=models.Q(remaining_quantity__gt=0), name='cost_layer_open_idx'),
+        ]
+    def __str__(self):
+        return f"{self.product_id}: {self.remaining_quantity}/{self.quantity} x {self.unit_cost}"
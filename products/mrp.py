@@ -0,0 +1,394 @@
+# MRP (Malzeme İhtiyaç Planlaması) Servisi
+# Product.net_requirement her ürün için 2 ayrı sorgu çalıştırıyordu. (20 bin ürün = 40 bin sorgu)
+# Bu servis aynı hesabı ürün bazında gruplanmış birkaç toplu (Sum) sorgu ile yapar.
+# Zaman fazlı MRP (aşağıda) ihtiyacı gün/hafta kovalarına dağıtır, tedarik süresi kadar öne çeker ve taslak emir önerir.
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import ROUND_UP, Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from .bom import BOMGraph
+from .models import BOMClosure, MRPChangeLog, MRPResult, Product, ProductionOrder, PurchaseSuggestion, SalesOrder
+
+# Net ihtiyaç hesabında "yoldaki üretim" sayılan iş emri durumları.
+ACTIVE_PRODUCTION_STATUSES = ['PLANNED', 'IN_PROGRESS']
+
+ZERO = Decimal('0')
+
+
+@dataclass(frozen=True)
+class NetRequirement:
+    """Tek bir ürün için MRP sonuç satırı."""
+    product_id: int
+    open_demand: Decimal
+    in_production: Decimal
+    stock_quantity: Decimal
+    min_stock_level: Decimal
+
+    @property
+    def net_requirement(self):
+        # Net İhtiyaç = (Açık Talep + Emniyet Stoku) - (Mevcut Stok + Devam Eden Üretim)
+        requirement = (self.open_demand + self.min_stock_level) - (self.stock_quantity + self.in_production)
+        return max(requirement, ZERO)  # İhtiyaç negatif çıkamaz.
+
+
+def open_demand_by_product(products=None):
+    """Sevk edilmemiş satış siparişlerini ürün bazında tek sorguda toplar."""
+    orders = SalesOrder.objects.filter(is_shipped=False)
+    if products is not None:
+        orders = orders.filter(product__in=products)
+    rows = orders.values('product_id').annotate(total=Sum('quantity')).order_by()
+    return {row['product_id']: row['total'] or ZERO for row in rows}
+
+
+def in_production_by_product(products=None):
+    """Planlanan ve üretimdeki iş emirlerinin kalan miktarını ürün bazında tek sorguda toplar."""
+    orders = ProductionOrder.objects.filter(status__in=ACTIVE_PRODUCTION_STATUSES)
+    if products is not None:
+        orders = orders.filter(product__in=products)
+    remaining = ExpressionWrapper(F('planned_quantity') - F('actual_quantity'), output_field=DecimalField(max_digits=16, decimal_places=4))
+    rows = orders.values('product_id').annotate(total=Sum(remaining)).order_by()
+    return {row['product_id']: row['total'] or ZERO for row in rows}
+
+
+def calculate_net_requirements(products=None):
+    """
+    Verilen ürünler (QuerySet) veya tüm ürünler için net ihtiyacı hesaplar.
+    Ürün sayısından bağımsız olarak 3 sorgu çalışır. {product_id: NetRequirement} döner.
+    """
+    if products is None:
+        products = Product.objects.all()
+
+    product_rows = list(products.values_list('id', 'stock_quantity', 'min_stock_level'))
+    # Tüm ürünler isteniyorsa filtreye gerek yoktur. Filtre varsa alt sorgu (subquery) olarak gönderilir.
+    product_filter = products.values('pk') if products.query.where else None
+
+    demand = open_demand_by_product(product_filter)
+    in_production = in_production_by_product(product_filter)
+
+    return {
+        product_id: NetRequirement(
+            product_id=product_id,
+            open_demand=demand.get(product_id, ZERO),
+            in_production=in_production.get(product_id, ZERO),
+            stock_quantity=stock_quantity,
+            min_stock_level=min_stock_level,
+        )
+        for product_id, stock_quantity, min_stock_level in product_rows
+    }
+
+
+def _product_total(orders, expression):
+    """Ana sorgudaki ürün için toplam (alt sorgu)."""
+    rows = orders.filter(product_id=OuterRef('pk')).values('product_id').annotate(total=Sum(expression)).values('total')
+    return Subquery(rows, output_field=DecimalField(max_digits=16, decimal_places=4))
+
+
+def product_net_requirement(product):
+    """
+    Tek ürünün net ihtiyacı: Son MRP sonucu varsa o, yoksa talep ve devam eden üretimden anlık hesap.
+    Sonuç, talep ve üretim toplamları tek sorguda okunur. Stok ve emniyet stoku nesnenin kendisinden alınır.
+    """
+    remaining = ExpressionWrapper(F('planned_quantity') - F('actual_quantity'), output_field=DecimalField(max_digits=16, decimal_places=4))
+    stored, demand, in_production = Product.objects.filter(pk=product.pk).values_list(
+        'mrp_result__net_requirement',
+        _product_total(SalesOrder.objects.filter(is_shipped=False), 'quantity'),
+        _product_total(ProductionOrder.objects.filter(status__in=ACTIVE_PRODUCTION_STATUSES), remaining),
+    ).get()
+    if stored is not None:
+        return stored
+    return NetRequirement(
+        product_id=product.pk,
+        open_demand=demand or ZERO,
+        in_production=in_production or ZERO,
+        stock_quantity=product.stock_quantity,
+        min_stock_level=product.min_stock_level,
+    ).net_requirement
+
+
+def attach_net_requirements(products):
+    """
+    Ürün listesindeki her nesneye net ihtiyacı yerleştirir.
+    Böylece liste ekranlarında product.net_requirement ek sorgu çalıştırmaz.
+    """
+    products = list(products)
+    results = calculate_net_requirements(Product.objects.filter(pk__in=[p.pk for p in products]))
+    for product in products:
+        product._net_requirement = results[product.pk].net_requirement
+    return products
+
+
+def run_mrp(products=None, batch_size=1000):
+    """
+    MRP çalıştırır ve sonuçları MRPResult tablosuna yazar.
+    Product.net_requirement bir sonraki okumada bu tablodaki değeri kullanır.
+    """
+    results = calculate_net_requirements(products)
+    rows = [
+        MRPResult(
+            product_id=result.product_id,
+            open_demand=result.open_demand,
+            in_production=result.in_production,
+            net_requirement=result.net_requirement,
+        )
+        for result in results.values()
+    ]
+    with transaction.atomic():
+        MRPResult.objects.bulk_create(
+            rows,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['product'],
+            update_fields=['open_demand', 'in_production', 'net_requirement', 'calculated_at'],
+        )
+    return results
+
+
+# --- ZAMAN FAZLI MRP ---
+# Brüt ihtiyaç (satış siparişleri + üst ürünlerin planlı emirleri) kovalara dağıtılır ve kova kova planlanan
+# girişlerle (devam eden iş emirleri) netleştirilir. Öngörülen stok emniyet stoğunun altına düştüğü kovada eksik miktar
+# kadar (lot-for-lot) emir önerilir; emrin başlangıcı tedarik süresi (Product.lead_time) kadar öne çekilir.
+# Ürünler alt seviye koduna göre işlenir: Bir ürünün önerileri, bileşenlerinin brüt ihtiyacına başlangıç kovasında eklenir.
+
+BUCKET_DAYS = {'day': 1, 'week': 7}
+# Önerilen miktarlar veritabanı hassasiyetine yukarı yuvarlanır.
+QUANTITY = Decimal('0.0001')
+
+
+class Buckets:
+    """Planlama ufkunun gün veya hafta kovaları. Kova 0 başlangıç günüdür (haftalıkta haftanın pazartesisi)."""
+
+    def __init__(self, start, bucket='day', horizon=180):
+        self.days = BUCKET_DAYS[bucket]
+        if bucket == 'week':
+            start -= timedelta(days=start.weekday())
+        self.start = start
+        self.count = -(-horizon // self.days)
+
+    @property
+    def end(self):
+        return self.date(self.count)
+
+    def index(self, day):
+        # Geciken (geçmiş tarihli) ihtiyaç ve girişler ilk kovaya alınır.
+        return max((day - self.start).days // self.days, 0)
+
+    def date(self, index):
+        return self.start + timedelta(days=index * self.days)
+
+    def offset(self, lead_time):
+        """Tedarik süresinin (gün) kova karşılığı. (Yukarı yuvarlanır)"""
+        return -(-lead_time // self.days)
+
+
+@dataclass(frozen=True)
+class PlannedOrder:
+    product_id: int
+    quantity: Decimal
+    # Başlangıç (hammaddede sipariş) tarihi ve ihtiyaç tarihi.
+    release_date: date
+    due_date: date
+    # Hammadde ise satın alma önerisi, değilse taslak üretim emri olur.
+    purchase: bool
+    # Tedarik süresi geriye doğru başlangıç tarihini geçiyorsa, emir bugün başlasa bile gecikir.
+    past_due: bool
+
+
+@dataclass
+class TimePhasedPlan:
+    orders: list
+    # Planlanan ürünler. None: Tüm ürünler (tam yenileme)
+    product_ids: set
+    buckets: Buckets
+
+
+def _external_demand(graph, scope, buckets):
+    """
+    Bu çalışmada önerilmeyecek, mevcut iş emirlerinden bileşenlere gelen brüt ihtiyaç (emrin başlangıç kovasında).
+    {ürün_id: {kova: miktar}}
+      - Kesinleşmiş (planlanan/üretimdeki) emirlerin üretilmemiş kalanı. (Emir girişi sayılır; bileşenleri de tüketir.)
+      - Kısmi planlamada kapsam dışındaki üst ürünlerin MRP taslakları.
+    """
+    demand = defaultdict(lambda: defaultdict(lambda: ZERO))
+    firm = ProductionOrder.objects.filter(status__in=ACTIVE_PRODUCTION_STATUSES, planned_quantity__gt=F('actual_quantity'))
+    if scope is not None:
+        parents = {parent_id for parent_id, children in graph.edges.items() if any(child_id in scope for child_id, _ in children)}
+        if not parents:
+            return demand
+        firm = firm.filter(product_id__in=parents)
+    remaining = ExpressionWrapper(F('planned_quantity') - F('actual_quantity'), output_field=DecimalField(max_digits=16, decimal_places=4))
+    rows = list(firm.annotate(remaining=remaining).values_list('product_id', 'remaining', 'start_date'))
+    if scope is not None and parents - scope:
+        rows += ProductionOrder.objects.filter(status='DRAFT', mrp_generated=True, product_id__in=parents - scope).values_list(
+            'product_id', 'planned_quantity', 'start_date')
+    for parent_id, quantity, start_date in rows:
+        for child_id, per_unit in graph.edges.get(parent_id, ()):
+            if scope is None or child_id in scope:
+                demand[child_id][buckets.index(start_date)] += quantity * per_unit
+    return demand
+
+
+def plan_time_phased(product_ids=None, bucket='day', horizon=180, start=None, graph=None):
+    """
+    Zaman fazlı MRP hesaplar; veritabanına yazmaz. (Yazmak için: save_time_phased)
+    product_ids verilirse yalnızca bu ürünler planlanır. Kapsam, ürünlerin tüm alt bileşenlerini içermelidir;
+    kapsam dışındaki üst ürünlerin mevcut taslakları bileşen ihtiyacı olarak alınır. Kesinleşmiş iş emirlerinin
+    üretilmemiş kalanı her zaman bileşen ihtiyacıdır.
+    Ürün sayısından bağımsız olarak birkaç toplu sorgu çalışır.
+    """
+    buckets = Buckets(start or timezone.localdate(), bucket, horizon)
+    graph = graph or BOMGraph.load()
+    codes = graph.low_level_codes()
+
+    products = Product.objects.all()
+    orders = SalesOrder.objects.filter(is_shipped=False, delivery_date__lt=buckets.end)
+    supply = ProductionOrder.objects.filter(status__in=ACTIVE_PRODUCTION_STATUSES)
+    scope = None
+    if product_ids is not None:
+        scope = set(product_ids)
+        products = products.filter(pk__in=scope)
+        orders = orders.filter(product_id__in=scope)
+        supply = supply.filter(product_id__in=scope)
+
+    gross = _external_demand(graph, scope, buckets)
+    for product_id, delivery_date, quantity in orders.values_list('product_id', 'delivery_date', 'quantity'):
+        gross[product_id][buckets.index(delivery_date)] += quantity
+
+    # Planlanan girişler: Devam eden iş emirlerinin kalan miktarı, çizelge bitişinde (yoksa teslim tarihinde).
+    receipts = defaultdict(lambda: defaultdict(lambda: ZERO))
+    for product_id, scheduled_end, due_date, planned, actual in supply.values_list(
+            'product_id', 'scheduled_end_date', 'due_date', 'planned_quantity', 'actual_quantity'):
+        if planned > actual:
+            receipts[product_id][buckets.index(scheduled_end or due_date)] += planned - actual
+
+    rows = sorted(products.values_list('pk', 'product_type', 'stock_quantity', 'min_stock_level', 'lead_time'),
+                  key=lambda row: codes.get(row[0], 0))
+    planned_orders = []
+    for product_id, product_type, stock, safety_stock, lead_time in rows:
+        requirements, arrivals = gross.get(product_id, {}), receipts.get(product_id, {})
+        periods = set(requirements) | set(arrivals)
+        if stock < safety_stock:
+            periods.add(0)
+        offset = buckets.offset(lead_time)
+        children = graph.edges.get(product_id, ())
+
+        balance = stock
+        for period in sorted(periods):
+            balance += arrivals.get(period, ZERO) - requirements.get(period, ZERO)
+            if balance >= safety_stock:
+                continue
+            quantity = (safety_stock - balance).quantize(QUANTITY, rounding=ROUND_UP)
+            balance += quantity
+            release = period - offset
+            planned_orders.append(PlannedOrder(
+                product_id=product_id,
+                quantity=quantity,
+                release_date=buckets.date(max(release, 0)),
+                due_date=buckets.date(period),
+                purchase=product_type == 'RAW',
+                past_due=release < 0,
+            ))
+            # Bileşenler emrin başlangıç kovasında gerekir.
+            for child_id, per_unit in children:
+                if scope is None or child_id in scope:
+                    gross[child_id][max(release, 0)] += quantity * per_unit
+    return TimePhasedPlan(planned_orders, scope, buckets)
+
+
+def save_time_phased(plan, batch_size=1000):
+    """
+    Planlanan ürünlerin önceki MRP taslaklarını ve satın alma önerilerini siler, yenilerini toplu oluşturur.
+    Planlamacının onayladığı (durumu DRAFT'tan çıkan) emirlere dokunulmaz.
+    """
+    drafts = ProductionOrder.objects.filter(status='DRAFT', mrp_generated=True)
+    suggestions = PurchaseSuggestion.objects.all()
+    if plan.product_ids is not None:
+        drafts = drafts.filter(product_id__in=plan.product_ids)
+        suggestions = suggestions.filter(product_id__in=plan.product_ids)
+
+    production_orders = [
+        ProductionOrder(product_id=order.product_id, planned_quantity=order.quantity, start_date=order.release_date,
+                        due_date=order.due_date, status='DRAFT', mrp_generated=True)
+        for order in plan.orders if not order.purchase
+    ]
+    purchases = [
+        PurchaseSuggestion(product_id=order.product_id, quantity=order.quantity, order_date=order.release_date, due_date=order.due_date)
+        for order in plan.orders if order.purchase
+    ]
+    with transaction.atomic():
+        drafts.delete()
+        suggestions.delete()
+        ProductionOrder.objects.bulk_create(production_orders, batch_size=batch_size)
+        PurchaseSuggestion.objects.bulk_create(purchases, batch_size=batch_size)
+    return len(production_orders), len(purchases)
+
+
+# --- NET DEĞİŞİM (NET-CHANGE) MRP ---
+# Gün içinde tek bir sipariş değiştiğinde tüm kataloğu yeniden planlamak yerine, değişen ürünler MRPChangeLog tablosuna
+# işaretlenir (products/signals.py). Net değişim çalışması yalnızca bu ürünleri ve tüm alt bileşenlerini (BOMClosure)
+# yeniden planlar. Kapsam dışındaki üst ürünlerin mevcut taslakları bileşen ihtiyacı olarak kullanılır.
+
+# İşaretli ürün ve alt bileşen sayısı bunu aşarsa tam yenileme yapılır. (Kısmi sorguların parametre sınırı için)
+NET_CHANGE_LIMIT = 10_000
+
+_state = threading.local()
+
+
+@contextmanager
+def mrp_changes_suspended():
+    """MRP'nin kendi yazdığı taslakların silinmesi/oluşturulması ürünleri tekrar işaretlemesin diye. (Yalnızca çalışan thread için)"""
+    previous = getattr(_state, 'suspended', False)
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
+
+def mark_mrp_dirty(product_ids, reason=''):
+    """Ürünleri net değişim MRP'si için işaretler. Zaten işaretli olanlar yok sayılır."""
+    if getattr(_state, 'suspended', False):
+        return
+    rows = [MRPChangeLog(product_id=product_id, reason=reason) for product_id in set(product_ids) if product_id is not None]
+    MRPChangeLog.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def regenerate_time_phased(bucket='day', horizon=180, start=None, batch_size=1000):
+    """
+    Tüm ürünleri yeniden planlar. Bekleyen değişiklik kayıtları bu çalışmaya dahil olduğu için baştan temizlenir;
+    çalışma sırasında gelen yeni değişiklikler bir sonraki net değişim çalışmasında işlenir.
+    """
+    MRPChangeLog.objects.all().delete()
+    plan = plan_time_phased(bucket=bucket, horizon=horizon, start=start)
+    with mrp_changes_suspended():
+        counts = save_time_phased(plan, batch_size)
+    return plan, counts
+
+
+def replan_net_change(bucket='day', horizon=180, start=None, batch_size=1000):
+    """
+    İşaretli ürünleri ve alt bileşenlerini yeniden planlar. Değişiklik yoksa (None, (0, 0)) döner.
+    İşaretler planlama ile aynı veritabanı işleminde alınır; hata olursa işaretler geri gelir.
+    """
+    with transaction.atomic():
+        claimed = list(MRPChangeLog.objects.select_for_update().values_list('pk', 'product_id'))
+        if not claimed:
+            return None, (0, 0)
+        MRPChangeLog.objects.filter(pk__lte=max(pk for pk, _ in claimed)).delete()
+        dirty = {product_id for _, product_id in claimed}
+
+        scope = None
+        if len(dirty) <= NET_CHANGE_LIMIT:
+            scope = dirty | set(BOMClosure.objects.filter(ancestor_id__in=dirty).values_list('descendant_id', flat=True))
+            if len(scope) > NET_CHANGE_LIMIT:
+                scope = None
+        plan = plan_time_phased(scope, bucket=bucket, horizon=horizon, start=start)
+        with mrp_changes_suspended():
+            counts = save_time_phased(plan, batch_size)
+    return plan, counts
@@ -0,0 +1,204 @@
+# OEE (Toplam Ekipman Verimliliği) Hesabı
+# OEE = Kullanılabilirlik x Performans x Kalite
+#   Kullanılabilirlik = (Planlanan Süre - Duruş) / Planlanan Süre
+#   Performans       = İdeal Süre (üretilen miktar için operasyon kartındaki süre) / Çalışma Süresi   (En fazla %100)
+#   Kalite           = Sağlam Miktar / Üretilen Miktar   (İş emrinin kalite kontrol onay oranı ile)
+# Değerler makine, vardiya ve gün bazında birkaç gruplu sorguyla hesaplanır ve OEEDaily tablosunda saklanır.
+# Yeni kayıt geldiğinde yalnızca etkilenen makine-günler (OEEDirtyDay) yeniden hesaplanır.
+# Planlanan süre, kaydı olmasa da her vardiya için sayılır. Vardiyası girilmemiş üretim kayıtları da bakım kayıtları gibi
+# kayıt saatinin düştüğü vardiyaya yazılır; hiçbir vardiyaya düşmeyen kayıtlar makinenin günlük kapasitesiyle ayrı satırda toplanır.
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+
+from .models import Maintenance, OEEDaily, OEEDirtyDay, ProductionLog, QualityCheck, Shift, WorkCenter
+
+ZERO = Decimal('0')
+ONE = Decimal('1')
+MINUTES_PER_DAY = 24 * 60
+RATIO = Decimal('0.0001')
+
+
+def day_start(day):
+    """Günün başladığı an (Yerel saat ile 00:00)."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def local_date(moment):
+    return timezone.localtime(moment).date()
+
+
+def shift_minutes(shift):
+    """Vardiya süresi (dakika). Gece yarısını geçen vardiyalar da doğru hesaplanır."""
+    start = shift.start_time.hour * 60 + shift.start_time.minute
+    end = shift.end_time.hour * 60 + shift.end_time.minute
+    return Decimal((end - start) % MINUTES_PER_DAY or MINUTES_PER_DAY)
+
+
+def shift_for_hour(shifts, hour):
+    """Verilen saatte çalışan vardiya. (Bakım kayıtlarının vardiyası yoktur; kayıt saatinden bulunur.)"""
+    minute = hour * 60
+    for shift in shifts:
+        start = shift.start_time.hour * 60 + shift.start_time.minute
+        if (minute - start) % MINUTES_PER_DAY < shift_minutes(shift):
+            return shift.pk
+    return None
+
+
+# --- DEĞİŞEN GÜNLERİN İŞARETLENMESİ ---
+
+def mark_dirty(pairs):
+    """(makine_id, tarih) çiftlerini yeniden hesaplanmak üzere işaretler. Zaten işaretli olanlar yok sayılır."""
+    rows = [OEEDirtyDay(work_center_id=work_center_id, date=day) for work_center_id, day in set(pairs) if work_center_id is not None]
+    OEEDirtyDay.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def mark_order_dirty(production_order_id):
+    """Kalite kontrolü değişen iş emrinin üretim yapılan tüm makine-günlerini işaretler."""
+    rows = (ProductionLog.objects.filter(production_order_id=production_order_id)
+            .annotate(day=TruncDate('created_at')).values_list('work_center_id', 'day').distinct())
+    mark_dirty(rows)
+
+
+def mark_range_dirty(start, end, work_center_ids=None):
+    """[start, end] aralığındaki tüm makine-günleri işaretler. (İlk kurulum ve toplu düzeltmeler için)"""
+    work_centers = WorkCenter.objects.values_list('pk', flat=True)
+    if work_center_ids is not None:
+        work_centers = work_centers.filter(pk__in=work_center_ids)
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    mark_dirty((work_center_id, day) for work_center_id in work_centers for day in days)
+
+
+# --- HESAPLAMA ---
+
+def _ratio(numerator, denominator, cap=None):
+    if not denominator:
+        return ZERO
+    value = numerator / denominator
+    if cap is not None:
+        value = min(value, cap)
+    return max(value, ZERO).quantize(RATIO)
+
+
+def _scope(queryset, pairs):
+    """Sorguyu işaretli makineler ve günlerin kapsadığı zaman aralığı ile sınırlar."""
+    days = [day for _, day in pairs]
+    return queryset.filter(
+        work_center_id__in={work_center_id for work_center_id, _ in pairs},
+        created_at__gte=day_start(min(days)),
+        created_at__lt=day_start(max(days) + timedelta(days=1)),
+    )
+
+
+def compute_oee(pairs):
+    """
+    Verilen (makine_id, tarih) çiftleri için vardiya bazında OEEDaily nesnelerini hesaplar. (Kaydetmez.)
+    Üretim, kalite ve bakım kayıtları gruplu sorgularla okunur; kayıt başına sorgu çalışmaz.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return []
+    shifts = list(Shift.objects.all())
+    minutes_by_shift = {shift.pk: shift_minutes(shift) for shift in shifts}
+    daily_capacity = {pk: hours * 60 for pk, hours in WorkCenter.objects.filter(pk__in={wc for wc, _ in pairs}).values_list('pk', 'daily_capacity_hours')}
+
+    # key: (makine_id, vardiya_id, tarih) -> [duruş, ideal süre, üretilen, sağlam]
+    totals = defaultdict(lambda: [ZERO, ZERO, ZERO, ZERO])
+    # Kaydı olmayan vardiyaların da planlanan süresi vardır. (Vardiya tanımlı değilse günlük kapasite)
+    for work_center_id, day in pairs:
+        for shift_id in (minutes_by_shift or [None]):
+            totals[(work_center_id, shift_id, day)]
+
+    # 1) Üretim: Makine/vardiya/gün/saat/iş emri bazında ideal süre ve üretilen miktar.
+    log_rows = (_scope(ProductionLog.objects, pairs).annotate(day=TruncDate('created_at'), hour=ExtractHour('created_at'))
+                .values_list('work_center_id', 'shift_id', 'day', 'hour', 'production_order_id')
+                .annotate(ideal=Sum('planned_duration'), produced=Sum('quantity_produced')).order_by())
+    log_rows = [row for row in log_rows if (row[0], row[2]) in pairs]
+
+    # 2) Kalite: İş emri bazında onay oranı. Kontrol edilmemiş iş emirlerinin tüm üretimi sağlam kabul edilir.
+    order_ids = {row[4] for row in log_rows if row[4] is not None}
+    quality = {
+        order_id: approved / checked
+        for order_id, checked, approved in QualityCheck.objects.filter(production_order_id__in=order_ids)
+        .values_list('production_order_id').annotate(Sum('checked_quantity'), Sum('approved_quantity')).order_by()
+        if checked
+    }
+    for work_center_id, shift_id, day, hour, order_id, ideal, produced in log_rows:
+        # Vardiyası girilmemiş kayıt, saatinin düştüğü vardiyaya yazılır. (Duruşla aynı kural)
+        if shift_id is None:
+            shift_id = shift_for_hour(shifts, hour)
+        row = totals[(work_center_id, shift_id, day)]
+        row[1] += ideal or ZERO
+        row[2] += produced or ZERO
+        row[3] += (produced or ZERO) * quality.get(order_id, ONE)
+
+    # 3) Duruş: Bakım kayıtları makine/gün/saat bazında toplanır ve saatin düştüğü vardiyaya yazılır.
+    downtime_rows = (_scope(Maintenance.objects, pairs)
+                     .annotate(day=TruncDate('created_at'), hour=ExtractHour('created_at'))
+                     .values_list('work_center_id', 'day', 'hour').annotate(Sum('downtime_minutes')).order_by())
+    for work_center_id, day, hour, downtime in downtime_rows:
+        if (work_center_id, day) in pairs:
+            totals[(work_center_id, shift_for_hour(shifts, hour), day)][0] += downtime or ZERO
+
+    results = []
+    for (work_center_id, shift_id, day), (downtime, ideal, produced, good) in totals.items():
+        planned = minutes_by_shift[shift_id] if shift_id is not None else daily_capacity.get(work_center_id, ZERO)
+        run_time = max(planned - downtime, ZERO)
+        availability = _ratio(run_time, planned)
+        performance = _ratio(ideal, run_time, cap=ONE)
+        quality_rate = _ratio(good, produced) if produced else ONE
+        results.append(OEEDaily(
+            work_center_id=work_center_id, shift_id=shift_id, date=day,
+            planned_minutes=planned, downtime_minutes=downtime, ideal_minutes=ideal,
+            produced_quantity=produced, good_quantity=good.quantize(RATIO),
+            availability=availability, performance=performance, quality=quality_rate,
+            oee=(availability * performance * quality_rate).quantize(RATIO),
+        ))
+    return results
+
+
+def _save_oee(pairs, clear_marks=False):
+    rows = compute_oee(pairs)
+    # Eski değerler (ve istenirse işaretler) gün başına tek sorguda silinir.
+    work_centers_by_day = defaultdict(set)
+    for work_center_id, day in pairs:
+        work_centers_by_day[day].add(work_center_id)
+    for day, work_center_ids in work_centers_by_day.items():
+        OEEDaily.objects.filter(date=day, work_center_id__in=work_center_ids).delete()
+        if clear_marks:
+            OEEDirtyDay.objects.filter(date=day, work_center_id__in=work_center_ids).delete()
+    OEEDaily.objects.bulk_create(rows, batch_size=1000)
+
+
+def refresh_oee(batch_size=1000):
+    """
+    İşaretli makine-günlerin OEE değerlerini yeniden hesaplar ve işaretleri temizler.
+    İşaretler hesaplamadan önce alınır; hesaplama sırasında gelen yeni kayıtlar bir sonraki çalıştırmada işlenir.
+    """
+    with transaction.atomic():
+        dirty = list(OEEDirtyDay.objects.select_for_update().values_list('pk', 'work_center_id', 'date')[:batch_size])
+        if not dirty:
+            return 0
+        OEEDirtyDay.objects.filter(pk__in=[pk for pk, _, _ in dirty]).delete()
+        pairs = {(work_center_id, day) for _, work_center_id, day in dirty}
+        _save_oee(pairs)
+    return len(pairs)
+
+
+def refresh_oee_days(pairs):
+    """
+    Verilen makine-günleri hemen hesaplar ve işaretlerini temizler.
+    Sinyalleri askıya alan toplu işlemler (arşivde ayrıntı kayıtlarının silinmesi) günleri kayıt başına işaretlemez;
+    etkilenen günler kayıtlar silinmeden önce bu fonksiyonla hesaplanır.
+    """
+    pairs = {(work_center_id, day) for work_center_id, day in pairs if work_center_id is not None}
+    if not pairs:
+        return 0
+    with transaction.atomic():
+        _save_oee(pairs, clear_marks=True)
+    return len(pairs)
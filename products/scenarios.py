@@ -0,0 +1,195 @@
+# Senaryo Analizi (What-If)
+# Planlamacılar "Talep %15 artarsa ve WC-3 bir vardiya kaybederse ne olur?" sorusunu tüm ürünler için sorabilsin diye
+# ürünler, ürün ağacı, açık siparişler, iş emirleri ve kapasiteler bir kez okunur ve NumPy dizilerine yüklenir.
+# Ürün ağacı seyrek (COO: ana ürün, bileşen, miktar) dizilerle tutulur. Seviyeler alt seviye kodlarından gelir; her seviye
+# tek bir vektör işlemiyle patlatılır. Birden fazla senaryo aynı anda (satır başına bir senaryo) hesaplanır.
+# NumPy isteğe bağlı bir bağımlılıktır; yalnızca bu modül (ve run_scenarios komutu) kullanıldığında gerekir: pip install numpy
+from dataclasses import dataclass, field
+
+from .bom import BOMGraph
+from .mrp import in_production_by_product, open_demand_by_product
+from .models import Operation, Product, WorkCenter
+from .scheduling import MINUTES_PER_HOUR
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("Senaryo analizi için numpy gerekli: pip install numpy")
+    return numpy
+
+
+@dataclass
+class Scenario:
+    """
+    demand_factor: Tüm açık taleplerin çarpanı. (1.15 = %15 artış)
+    product_demand: {ürün_id: çarpan} Ürün bazında ayrıca uygulanacak talep çarpanları.
+    capacity: {üretim_merkezi_id: çarpan} Kapasite çarpanları. (Üç vardiyalı bir merkez bir vardiya kaybederse 2/3)
+    """
+    name: str
+    demand_factor: float = 1.0
+    product_demand: dict = field(default_factory=dict)
+    capacity: dict = field(default_factory=dict)
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    # {ürün_id: eksik miktar} Stok ve devam eden üretimle karşılanamayan net ihtiyaç. (Sadece eksiği olan ürünler)
+    shortages: dict
+    # {üretim_merkezi_id: (yük dakika, kapasite dakika)}
+    load: dict
+
+    @property
+    def overloaded(self):
+        """Yükü kapasitesini aşan üretim merkezleri. {üretim_merkezi_id: doluluk oranı}"""
+        return {wc_id: load / capacity if capacity else float('inf')
+                for wc_id, (load, capacity) in self.load.items() if load > capacity}
+
+
+class ScenarioModel:
+    """
+    Planlama verilerinin dizi hâli. Bir kez load() ile okunur, ardından evaluate() veritabanına gitmeden
+    istenen sayıda senaryoyu hesaplar.
+    """
+
+    def __init__(self, product_ids, stock, safety_stock, in_production, demand, levels,
+                 work_center_ids, capacity, efficiency, routing, horizon, firm_demand=None):
+        np = _numpy()
+        self.product_ids = np.asarray(product_ids, dtype=np.int64)
+        self.index = {product_id: i for i, product_id in enumerate(product_ids)}
+        self.stock = stock
+        self.safety_stock = safety_stock
+        self.in_production = in_production
+        self.demand = demand
+        # Kesinleşmiş (planlanan/üretimdeki) iş emirlerinin kalanı için gereken bileşenler. Talep çarpanlarından etkilenmez.
+        self.firm_demand = np.zeros(len(product_ids)) if firm_demand is None else firm_demand
+        # levels: Her seviye için (ana ürün indeksleri, bileşen indeksleri, miktarlar) seyrek kenar dizileri.
+        self.levels = levels
+        self.work_center_ids = np.asarray(work_center_ids, dtype=np.int64)
+        self.work_center_index = {wc_id: i for i, wc_id in enumerate(work_center_ids)}
+        self.capacity = capacity
+        self.efficiency = efficiency
+        # routing: (ürün indeksleri, üretim merkezi indeksleri, hazırlık, birim süre) operasyon dizileri.
+        self.routing = routing
+        self.horizon = horizon
+
+    @classmethod
+    def load(cls, horizon=30):
+        """
+        Tüm planlama verisini toplu sorgularla okur. horizon: Kapasitenin hesaplanacağı gün sayısı.
+        Talep ve devam eden üretim, MRP'deki (products/mrp.py) ile aynı şekilde toplanır.
+        """
+        np = _numpy()
+        rows = list(Product.objects.order_by('pk').values_list('pk', 'stock_quantity', 'min_stock_level'))
+        product_ids = [pk for pk, _, _ in rows]
+        index = {pk: i for i, pk in enumerate(product_ids)}
+        stock = np.array([float(quantity) for _, quantity, _ in rows])
+        safety_stock = np.array([float(level) for _, _, level in rows])
+
+        demand = np.zeros(len(rows))
+        for product_id, quantity in open_demand_by_product().items():
+            demand[index[product_id]] = float(quantity)
+        in_production = np.zeros(len(rows))
+        for product_id, quantity in in_production_by_product().items():
+            in_production[index[product_id]] = float(quantity)
+
+        # Kenarlar ana ürünün alt seviye koduna göre gruplanır; bir seviyenin tüm kenarları birlikte patlatılır.
+        graph = BOMGraph.load()
+        codes = graph.low_level_codes()
+        grouped = {}
+        for parent_id, children in graph.edges.items():
+            edges = grouped.setdefault(codes.get(parent_id, 0), ([], [], []))
+            for child_id, quantity in children:
+                edges[0].append(index[parent_id])
+                edges[1].append(index[child_id])
+                edges[2].append(float(quantity))
+        levels = [
+            (np.array(parents, dtype=np.int64), np.array(children, dtype=np.int64), np.array(quantities))
+            for _, (parents, children, quantities) in sorted(grouped.items())
+        ]
+        # Kesinleşmiş iş emirleri stoğu artırır ama bileşenlerini de tüketir: Kalan miktar bir seviye patlatılır.
+        # (Bileşenin kendi eksiği, net ihtiyaç hesabında alt seviyelere patlatılır.)
+        firm_demand = np.zeros(len(rows))
+        for parents, children, quantities in levels:
+            np.add.at(firm_demand, children, np.maximum(in_production[parents], 0) * quantities)
+
+        work_centers = list(WorkCenter.objects.order_by('pk').values_list('pk', 'daily_capacity_hours', 'efficiency_factor'))
+        work_center_ids = [pk for pk, _, _ in work_centers]
+        wc_index = {pk: i for i, pk in enumerate(work_center_ids)}
+        capacity = np.array([float(hours) * MINUTES_PER_HOUR * horizon for _, hours, _ in work_centers])
+        efficiency = np.array([float(factor or 1) for _, _, factor in work_centers])
+
+        operations = list(Operation.objects.filter(bom__is_active=True).values_list(
+            'bom__parent_product_id', 'work_center_id', 'setup_time', 'cycle_time').order_by())
+        routing = (
+            np.array([index[product_id] for product_id, _, _, _ in operations], dtype=np.int64),
+            np.array([wc_index[wc_id] for _, wc_id, _, _ in operations], dtype=np.int64),
+            np.array([float(setup_time) for _, _, setup_time, _ in operations]),
+            np.array([float(cycle_time) for _, _, _, cycle_time in operations]),
+        )
+        return cls(product_ids, stock, safety_stock, in_production, demand, levels,
+                   work_center_ids, capacity, efficiency, routing, horizon, firm_demand)
+
+    def _factors(self, scenarios, size, index, default, overrides):
+        np = _numpy()
+        factors = np.empty((len(scenarios), size))
+        for row, scenario in enumerate(scenarios):
+            factors[row] = default(scenario)
+            for key, factor in overrides(scenario).items():
+                if key in index:
+                    factors[row, index[key]] *= factor
+        return factors
+
+    def net_requirements(self, demand):
+        """
+        demand: (senaryo sayısı, ürün sayısı) bağımsız talep ve kesinleşmiş iş emirlerinin bileşen talebi matrisi.
+        Her seviyede: Net = max(Brüt + Emniyet Stoku - Stok - Devam Eden Üretim, 0); net ihtiyaç bileşenlere patlatılır.
+        Dönüş: (brüt ihtiyaç, net ihtiyaç) matrisleri.
+        """
+        np = _numpy()
+        gross = demand.copy()
+        available = self.stock + self.in_production - self.safety_stock
+        for parents, children, quantities in self.levels:
+            # Bu seviyedeki ana ürünlerin brüt ihtiyacı üst seviyelerden tamamlanmıştır.
+            net = np.maximum(gross[:, parents] - available[parents], 0)
+            # Seyrek matris çarpımı: Aynı bileşene gelen kenarlar toplanır.
+            np.add.at(gross.T, children, (net * quantities).T)
+        return gross, np.maximum(gross - available, 0)
+
+    def work_center_load(self, production):
+        """production: (senaryo sayısı, ürün sayısı) üretilecek miktarlar. Dönüş: (senaryo sayısı, üretim merkezi sayısı) dakika."""
+        np = _numpy()
+        products, work_centers, setup, cycle = self.routing
+        quantities = production[:, products]
+        # Süre = (Hazırlık + İşlem Süresi * Miktar) / Verimlilik. Hazırlık yalnızca üretilecek miktar varsa eklenir.
+        minutes = (np.where(quantities > 0, setup, 0) + cycle * quantities) / self.efficiency[work_centers]
+        load = np.zeros((production.shape[0], len(self.work_center_ids)))
+        np.add.at(load.T, work_centers, minutes.T)
+        return load
+
+    def evaluate(self, scenarios):
+        """Senaryoları birlikte hesaplar. Dönüş: Her senaryo için ScenarioResult."""
+        np = _numpy()
+        scenarios = list(scenarios)
+        demand_factors = self._factors(scenarios, len(self.product_ids), self.index,
+                                       lambda scenario: scenario.demand_factor, lambda scenario: scenario.product_demand)
+        capacity_factors = self._factors(scenarios, len(self.work_center_ids), self.work_center_index,
+                                         lambda scenario: 1.0, lambda scenario: scenario.capacity)
+
+        _, net = self.net_requirements(self.demand * demand_factors + self.firm_demand)
+        # Yük: Devam eden iş emirlerinin kalanı + net ihtiyaç için açılacak yeni iş emirleri.
+        load = self.work_center_load(net + self.in_production)
+        capacity = self.capacity * capacity_factors
+
+        results = []
+        work_center_ids = self.work_center_ids.tolist()
+        for row, scenario in enumerate(scenarios):
+            short = np.nonzero(net[row] > 1e-9)[0]
+            results.append(ScenarioResult(
+                name=scenario.name,
+                shortages=dict(zip(self.product_ids[short].tolist(), net[row, short].tolist())),
+                load=dict(zip(work_center_ids, zip(load[row].tolist(), capacity[row].tolist()))),
+            ))
+        return results
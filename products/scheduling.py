@@ -0,0 +1,212 @@
+# Sonlu Kapasite Çizelgeleme (Finite-Capacity Scheduling)
+# PLANNED durumundaki tüm iş emirleri ve rotaları (Operation) toplu olarak okunur.
+# Her üretim merkezinin günlük kapasitesi bellekte gün bazlı bir dizi (array) olarak tutulur ve
+# iş emirleri teslim tarihine göre sırayla bu kapasiteden düşülerek yerleştirilir.
+# Üretimdeki (IN_PROGRESS) iş emirlerinin kalan işi, çizelgeden önce bugünden itibaren kapasiteden düşülür.
+# Sonuç iş emrinin scheduled_start_date/scheduled_end_date alanlarına yazılır; planlanan başlangıç (start_date)
+# en erken başlangıç girdisi olarak kalır, böylece yeniden çizelgeleme iş emirlerini öne de çekebilir.
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .atp import invalidate_atp
+from .models import Operation, ProductionOrder, WorkCenter
+from .mrp import mark_mrp_dirty
+
+MINUTES_PER_HOUR = 60
+
+
+@dataclass
+class ScheduledOrder:
+    order_id: int
+    start_date: object
+    end_date: object
+    due_date: object
+
+    @property
+    def is_late(self):
+        return self.end_date > self.due_date
+
+
+class CapacityPlan:
+    """
+    Üretim merkezlerinin gün gün kalan kapasitesi (dakika).
+    buckets[wc_id][gün] = O gün kalan dakika. Gün 0 = çizelgenin başladığı gün.
+    """
+
+    def __init__(self, capacities, horizon):
+        self.horizon = horizon
+        self.buckets = {wc_id: array('d', [minutes]) * horizon for wc_id, minutes in capacities.items()}
+
+    def consume_forward(self, wc_id, day, minutes, journal):
+        """İşi verilen günden itibaren ileriye doğru yerleştirir. Bittiği günü döner; ufuk yetmezse None."""
+        if minutes <= 0:
+            return day
+        bucket = self.buckets[wc_id]
+        while day < self.horizon:
+            available = bucket[day]
+            if available > 0:
+                used = min(available, minutes)
+                bucket[day] -= used
+                journal.append((wc_id, day, used))
+                minutes -= used
+                if minutes <= 0:
+                    return day
+            day += 1
+        return None
+
+    def consume_backward(self, wc_id, day, minutes, journal):
+        """İşi verilen günden geriye doğru yerleştirir. Başladığı günü döner; bugüne kadar sığmazsa None."""
+        if minutes <= 0:
+            return day
+        bucket = self.buckets[wc_id]
+        day = min(day, self.horizon - 1)
+        while day >= 0:
+            available = bucket[day]
+            if available > 0:
+                used = min(available, minutes)
+                bucket[day] -= used
+                journal.append((wc_id, day, used))
+                minutes -= used
+                if minutes <= 0:
+                    return day
+            day -= 1
+        return None
+
+    def rollback(self, journal):
+        for wc_id, day, used in journal:
+            self.buckets[wc_id][day] += used
+
+
+def load_routings(product_ids):
+    """Ürünlerin rotalarını tek sorguda okur. {ürün_id: [(wc_id, hazırlık, işlem süresi), ...]} (İşlem sırasına göre)"""
+    routings = defaultdict(list)
+    rows = (Operation.objects.filter(bom__is_active=True, bom__parent_product_id__in=product_ids)
+            .order_by('bom__parent_product_id', 'step_number')
+            .values_list('bom__parent_product_id', 'work_center_id', 'setup_time', 'cycle_time'))
+    for product_id, wc_id, setup_time, cycle_time in rows:
+        routings[product_id].append((wc_id, setup_time, cycle_time))
+    return routings
+
+
+def _operation_minutes(setup_time, cycle_time, quantity, efficiency):
+    # Süre = (Hazırlık + İşlem Süresi * Miktar) / Verimlilik
+    return float((setup_time + cycle_time * quantity) / (efficiency or Decimal('1')))
+
+
+def _schedule_forward(plan, steps, earliest_day):
+    """Operasyonları sırayla ileri yerleştirir. (başlangıç günü, bitiş günü, günlük) döner; sığmazsa None."""
+    journal = []
+    day = earliest_day
+    start_day = None
+    for wc_id, minutes in steps:
+        mark = len(journal)
+        # Bir sonraki operasyon, öncekinin bittiği gün başlayabilir.
+        finished = plan.consume_forward(wc_id, day, minutes, journal)
+        if finished is None:
+            plan.rollback(journal)
+            return None
+        if start_day is None and len(journal) > mark:
+            start_day = journal[mark][1]
+        day = finished
+    return (earliest_day if start_day is None else start_day), day, journal
+
+
+def _schedule_backward(plan, steps, latest_day):
+    """Operasyonları sondan başa doğru geriye yerleştirir. (başlangıç günü, bitiş günü, günlük) döner; sığmazsa None."""
+    journal = []
+    day = latest_day
+    end_day = None
+    for wc_id, minutes in reversed(steps):
+        mark = len(journal)
+        started = plan.consume_backward(wc_id, day, minutes, journal)
+        if started is None:
+            plan.rollback(journal)
+            return None
+        if end_day is None and len(journal) > mark:
+            end_day = journal[mark][1]
+        day = started
+    return day, (latest_day if end_day is None else end_day), journal
+
+
+def schedule_orders(backward=False, horizon=365, start=None):
+    """
+    PLANNED iş emirlerini sonlu kapasiteye göre çizelgeler. Veritabanına yazmaz; ScheduledOrder listesi ve
+    yerleştirilemeyen iş emirlerinin id listesini döner.
+    İleri (forward): Her iş emri en erken başlangıcından itibaren ilk boş kapasiteye yerleşir.
+    Geri (backward): İş emri teslim tarihinde bitecek şekilde geriye doğru yerleşir; bugünden önceye taşarsa ileri çizelgelenir.
+    """
+    start = start or timezone.localdate()
+    orders = list(ProductionOrder.objects.filter(status='PLANNED').order_by('due_date', 'id')
+                  .values_list('id', 'product_id', 'planned_quantity', 'start_date', 'due_date'))
+    work_centers = {wc_id: (hours, efficiency) for wc_id, hours, efficiency in
+                    WorkCenter.objects.values_list('id', 'daily_capacity_hours', 'efficiency_factor')}
+    routings = load_routings({product_id for _, product_id, _, _, _ in orders})
+
+    plan = CapacityPlan({wc_id: float(hours) * MINUTES_PER_HOUR for wc_id, (hours, _) in work_centers.items()}, horizon)
+    scheduled, unscheduled = [], []
+
+    # Mevcut yük: Üretimdeki iş emirlerinin kalan miktarı. (Hazırlık yapılmış sayılır.)
+    running = list(ProductionOrder.objects.filter(status='IN_PROGRESS', planned_quantity__gt=F('actual_quantity'))
+                   .order_by('due_date', 'id').values_list('product_id', 'planned_quantity', 'actual_quantity'))
+    running_routings = load_routings({product_id for product_id, _, _ in running})
+    for product_id, planned, actual in running:
+        day = 0
+        for wc_id, _, cycle_time in running_routings.get(product_id, ()):
+            # Ufka sığmayan iş, sığdığı kadarıyla kapasiteden düşülmüş olarak kalır.
+            day = plan.consume_forward(wc_id, day, _operation_minutes(0, cycle_time, planned - actual, work_centers[wc_id][1]), [])
+            if day is None:
+                break
+
+    for order_id, product_id, quantity, start_date, due_date in orders:
+        steps = [(wc_id, _operation_minutes(setup_time, cycle_time, quantity, work_centers[wc_id][1]))
+                 for wc_id, setup_time, cycle_time in routings.get(product_id, ())]
+        earliest_day = max((start_date - start).days, 0)
+
+        result = None
+        if backward:
+            latest_day = (due_date - start).days
+            if latest_day >= earliest_day:
+                result = _schedule_backward(plan, steps, latest_day)
+                if result is not None and result[0] < earliest_day:
+                    # Planlanan başlangıçtan önceye taştı; ayrılan kapasite geri verilir ve ileri çizelgelenir.
+                    plan.rollback(result[2])
+                    result = None
+        if result is None:
+            result = _schedule_forward(plan, steps, earliest_day)
+
+        if result is None:
+            unscheduled.append(order_id)
+            continue
+        start_day, end_day, _ = result
+        scheduled.append(ScheduledOrder(order_id, start + timedelta(days=start_day), start + timedelta(days=end_day), due_date))
+
+    return scheduled, unscheduled
+
+
+def save_schedule(scheduled, unscheduled=(), batch_size=1000):
+    """
+    Çizelge sonuçlarını iş emirlerine toplu güncelleme (bulk_update) ile yazar. Planlanan başlangıç değiştirilmez.
+    Ufka sığmayan (unscheduled) planlı iş emirlerinin önceki çalışmadan kalan çizelge tarihleri temizlenir; aksi halde
+    ATP ve MRP bu eski tarihleri stoğa giriş tarihi olarak kullanmaya devam ederdi.
+    Toplu güncelleme sinyal göndermez; iş emirlerinin stoğa giriş tarihi değiştiği için ürünlerin ATP çizelgeleri burada
+    temizlenir ve ürünler net değişim MRP'si için işaretlenir.
+    """
+    orders = [ProductionOrder(pk=item.order_id, scheduled_start_date=item.start_date, scheduled_end_date=item.end_date) for item in scheduled]
+    unscheduled = list(unscheduled)
+    with transaction.atomic():
+        ProductionOrder.objects.bulk_update(orders, ['scheduled_start_date', 'scheduled_end_date'], batch_size=batch_size)
+        product_ids = set(ProductionOrder.objects.filter(pk__in=[order.pk for order in orders]).values_list('product_id', flat=True))
+        for start in range(0, len(unscheduled), batch_size):
+            stale = ProductionOrder.objects.filter(pk__in=unscheduled[start:start + batch_size], status='PLANNED', scheduled_end_date__isnull=False)
+            product_ids.update(stale.values_list('product_id', flat=True))
+            stale.update(scheduled_start_date=None, scheduled_end_date=None)
+        mark_mrp_dirty(product_ids, ProductionOrder.__name__)
+    invalidate_atp(product_ids)
+    return len(orders)
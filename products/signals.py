@@ -0,0 +1,315 @@
+# Sinyaller: Bir kayıt kaydedildiğinde/silindiğinde türetilmiş tabloları (önbellek, özet vb.) güncel tutar.
+# ProductsConfig.ready() içinde yüklenir.
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .atp import invalidate_atp
+from .bom import refresh_closure
+from .cache import invalidate
+from .categories import invalidate_tree
+from .costing import mark_costs_stale
+from .models import (
+    BOM, BOMClosure, BOMItem, Category, Maintenance, Operation, Product, ProductionLog, ProductionOrder, QualityCheck, SalesOrder,
+    StockTransaction, WorkCenter,
+)
+from .mrp import mark_mrp_dirty
+from .oee import local_date, mark_dirty, mark_order_dirty
+from .stats import OPERATION_STATS_FIELDS, record_operation_log, record_work_center_log, refresh_operation_stats, refresh_work_center_stats
+
+
+# --- ÖNCEKİ DEĞERLER ---
+# Bazı sinyaller, kayıttan önceki alan değerine göre karar verir (örn. fiyat değişti mi?).
+# pre_save'de değerler tek sorguyla okunur ve nesnenin _previous sözlüğüne yazılır. Yeni kayıtlarda sözlük boştur.
+
+def _remember(instance, *fields):
+    instance._previous = {}
+    if instance.pk is not None and not instance._state.adding:
+        instance._previous = type(instance).objects.filter(pk=instance.pk).values(*fields).first() or {}
+
+
+def _changed(instance, field):
+    """Alan bu kayıtta değişti mi? (Önceki değer okunmamışsa veya kayıt yeniyse False)"""
+    previous = getattr(instance, '_previous', {})
+    return field in previous and previous[field] != getattr(instance, field)
+
+
+# --- DÜZLEŞTİRİLMİŞ ÜRÜN AĞACI ---
+
+def _bom_parent_product_id(bom_id):
+    return BOM.objects.filter(pk=bom_id).values_list('parent_product_id', flat=True).first()
+
+
+@receiver(post_save, sender=BOMItem)
+@receiver(post_delete, sender=BOMItem)
+def refresh_closure_for_bom_item(sender, instance, origin=None, **kwargs):
+    # Reçete (veya ürün) silinirken kalemler de silinir; güncelleme kalem başına değil, BOM sinyalinde bir kez yapılır.
+    if isinstance(origin, (BOM, Product)):
+        return
+    parent_product_id = _bom_parent_product_id(instance.bom_id)
+    if parent_product_id is not None:
+        refresh_closure([parent_product_id])
+
+
+@receiver(post_save, sender=BOM)
+@receiver(post_delete, sender=BOM)
+def refresh_closure_for_bom(sender, instance, **kwargs):
+    refresh_closure([instance.parent_product_id])
+
+
+# --- ÜRETİM İSTATİSTİKLERİ ---
+
+_state = threading.local()
+
+
+@contextmanager
+def stats_signals_suspended():
+    """
+    Toplu silme/düzenleme sırasında kayıt başına istatistik güncellemesini durdurur. (Yalnızca çalışan thread için)
+    Bloğu kullanan kod, iş bitince etkilenen makine ve operasyonları refresh_* fonksiyonlarıyla bir kez yenilemelidir.
+    """
+    previous = getattr(_state, 'suspended', False)
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
+
+def _stats_suspended():
+    return getattr(_state, 'suspended', False)
+
+
+@receiver(pre_save, sender=ProductionLog)
+def remember_log_owners(sender, instance, **kwargs):
+    if not _stats_suspended():
+        _remember(instance, 'work_center_id', 'operation_id', 'production_order_id')
+
+
+@receiver(post_save, sender=ProductionLog)
+def update_stats_on_log_save(sender, instance, created, **kwargs):
+    if _stats_suspended():
+        return
+    if created:
+        record_work_center_log(instance)
+        record_operation_log(instance)
+        mark_dirty([(instance.work_center_id, local_date(instance.created_at))])
+        return
+    # Düzenlenen kayıt pencerenin herhangi bir yerinde olabilir; pencereler baştan hesaplanır.
+    # Kayıt başka bir makineye/operasyona taşındıysa eskisinin penceresi de yenilenir.
+    previous = getattr(instance, '_previous', {})
+    work_center_ids = {instance.work_center_id, previous.get('work_center_id')} - {None}
+    operation_ids = {instance.operation_id, previous.get('operation_id')} - {None}
+    refresh_work_center_stats(work_center_ids)
+    if operation_ids:
+        refresh_operation_stats(operation_ids)
+    mark_dirty([(work_center_id, local_date(instance.created_at)) for work_center_id in work_center_ids])
+
+
+@receiver(post_delete, sender=ProductionLog)
+def update_stats_on_log_delete(sender, instance, **kwargs):
+    if _stats_suspended():
+        return
+    refresh_work_center_stats([instance.work_center_id])
+    if instance.operation_id is not None:
+        refresh_operation_stats([instance.operation_id])
+    mark_dirty([(instance.work_center_id, local_date(instance.created_at))])
+
+
+# --- OEE ---
+# Üretim kayıtlarının işaretlenmesi yukarıdaki istatistik sinyallerinde yapılır.
+
+@receiver(post_save, sender=Maintenance)
+@receiver(post_delete, sender=Maintenance)
+def mark_oee_on_maintenance(sender, instance, **kwargs):
+    mark_dirty([(instance.work_center_id, local_date(instance.created_at))])
+
+
+@receiver(post_save, sender=QualityCheck)
+@receiver(post_delete, sender=QualityCheck)
+def mark_oee_on_quality_check(sender, instance, **kwargs):
+    mark_order_dirty(instance.production_order_id)
+
+
+# --- MALİYET KARTLARI ---
+# Maliyeti değiştiren kayıtlarda ürünün ve onu kullanan üst ürünlerin maliyet kartı eskimiş işaretlenir (products/costing.py).
+
+@receiver(post_save, sender=BOMItem)
+@receiver(post_delete, sender=BOMItem)
+def mark_costs_on_bom_item(sender, instance, origin=None, **kwargs):
+    # Reçete silinirken kalem başına işaretlemeye gerek yoktur; reçetesiz ürünün kartı kullanılmaz.
+    if isinstance(origin, (BOM, Product)):
+        return
+    mark_costs_stale([_bom_parent_product_id(instance.bom_id)])
+
+
+@receiver(post_save, sender=Operation)
+@receiver(post_delete, sender=Operation)
+def mark_costs_on_operation(sender, instance, update_fields=None, origin=None, **kwargs):
+    # Çevrim süresi istatistiklerinin güncellenmesi (products/stats.py) maliyeti değiştirmez.
+    if update_fields is not None and set(update_fields) <= set(OPERATION_STATS_FIELDS):
+        return
+    if isinstance(origin, (BOM, Product)):
+        return
+    mark_costs_stale([_bom_parent_product_id(instance.bom_id)])
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_price(sender, instance, **kwargs):
+    _remember(instance, 'price')
+
+
+@receiver(post_save, sender=Product)
+def mark_costs_on_price(sender, instance, created, **kwargs):
+    if _changed(instance, 'price'):
+        mark_costs_stale([instance.pk])
+
+
+@receiver(pre_save, sender=WorkCenter)
+def remember_hourly_rate(sender, instance, update_fields=None, **kwargs):
+    # Verimlilik alanlarının güncellenmesi (her üretim kaydında) ek sorgu çalıştırmaz.
+    if update_fields is None or 'hourly_rate' in update_fields:
+        _remember(instance, 'hourly_rate')
+    else:
+        instance._previous = {}
+
+
+@receiver(post_save, sender=WorkCenter)
+def mark_costs_on_hourly_rate(sender, instance, **kwargs):
+    if _changed(instance, 'hourly_rate'):
+        mark_costs_stale(Operation.objects.filter(work_center=instance).values_list('bom__parent_product_id', flat=True))
+
+
+# --- KATEGORİ AĞACI ---
+
+# Kayıtta ağaç, Category.save içinde alt kategorilerin yolları da yazıldıktan sonra temizlenir.
+@receiver(post_delete, sender=Category)
+def invalidate_category_tree(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_tree)
+
+
+# --- TESLİM TARİHİ (ATP) ---
+
+@receiver(pre_save, sender=SalesOrder)
+@receiver(pre_save, sender=ProductionOrder)
+def remember_order_product(sender, instance, **kwargs):
+    _remember(instance, 'product_id')
+
+
+@receiver(post_save, sender=SalesOrder)
+@receiver(post_delete, sender=SalesOrder)
+@receiver(post_save, sender=ProductionOrder)
+@receiver(post_delete, sender=ProductionOrder)
+def invalidate_atp_timeline(sender, instance, **kwargs):
+    # Sipariş başka bir ürüne taşındıysa eski ürünün çizelgesi de temizlenir.
+    invalidate_atp({instance.product_id, getattr(instance, '_previous', {}).get('product_id')} - {None})
+
+
+# --- NET DEĞİŞİM MRP ---
+# Planı etkileyen değişiklikler ürün bazında işaretlenir. Toplu stok hareketleri (post_transactions) kendisi işaretler.
+
+@receiver(post_save, sender=SalesOrder)
+@receiver(post_delete, sender=SalesOrder)
+@receiver(post_save, sender=ProductionOrder)
+@receiver(post_delete, sender=ProductionOrder)
+def mark_mrp_on_order(sender, instance, **kwargs):
+    mark_mrp_dirty([instance.product_id], sender.__name__)
+
+
+@receiver(post_save, sender=StockTransaction)
+def mark_mrp_on_stock_transaction(sender, instance, created, **kwargs):
+    # Mevcut bir hareketin düzenlenmesi stoğu değiştirmez. (StockTransaction.save)
+    if created:
+        mark_mrp_dirty([instance.product_id], sender.__name__)
+
+
+@receiver(post_save, sender=Product)
+def mark_mrp_on_product(sender, instance, created, **kwargs):
+    # Emniyet stoğu veya tedarik süresi değişmiş olabilir.
+    if not created:
+        mark_mrp_dirty([instance.pk], sender.__name__)
+
+
+@receiver(post_save, sender=BOMItem)
+@receiver(post_delete, sender=BOMItem)
+def mark_mrp_on_bom_item(sender, instance, **kwargs):
+    # Ana ürün ve alt ağacı yeniden planlanır. Bileşen de işaretlenir: Kalemden çıkarıldıysa artık alt ağaçta değildir,
+    # ama eski taslaklardan gelen ihtiyacı temizlenmelidir.
+    mark_mrp_dirty([_bom_parent_product_id(instance.bom_id), instance.child_product_id], sender.__name__)
+
+
+@receiver(post_save, sender=BOM)
+@receiver(post_delete, sender=BOM)
+def mark_mrp_on_bom(sender, instance, **kwargs):
+    # Reçete silinirse (veya pasife alınırsa) eski bileşenleri artık alt ağaçta değildir.
+    mark_mrp_dirty([instance.parent_product_id, *instance.items.values_list('child_product_id', flat=True)], sender.__name__)
+
+
+# --- HESAPLANAN ÖZELLİK ÖNBELLEĞİ ---
+# Önbellekteki değerlerin sürümü değiştirilir (products/cache.py). Toplu işlemler (ingest, arşiv) aynı fonksiyonları çağırır.
+
+def invalidate_work_center_caches(work_center_ids):
+    """Makine değişince (verimlilik, saatlik ücret) o makinede operasyonu olan ürünlerin rota süresi ve maliyeti."""
+    product_ids = Operation.objects.filter(work_center_id__in=work_center_ids).values_list('bom__parent_product_id', flat=True).distinct()
+    invalidate(Product, product_ids)
+
+
+def invalidate_product_costs(product_ids):
+    """Ürünler ve onları (dolaylı olarak) kullanan tüm üst ürünler. (Üst ürünün maliyeti bileşenlerinden toplanır.)"""
+    product_ids = {product_id for product_id in product_ids if product_id is not None}
+    if product_ids:
+        product_ids.update(BOMClosure.objects.filter(descendant_id__in=product_ids).values_list('ancestor_id', flat=True))
+    invalidate(Product, product_ids)
+
+
+def invalidate_log_caches(work_center_ids, production_order_ids):
+    """Üretim kayıtları değişince: İş emirlerinin ilerlemesi ve makine verimliliğine bağlı rota süreleri."""
+    invalidate(ProductionOrder, production_order_ids)
+    invalidate_work_center_caches(work_center_ids)
+
+
+@receiver(post_save, sender=ProductionLog)
+@receiver(post_delete, sender=ProductionLog)
+def invalidate_caches_on_log(sender, instance, **kwargs):
+    # Toplu silmede (arşiv) en sonda bir kez yapılır.
+    if _stats_suspended():
+        return
+    # Kayıt başka bir makineye veya iş emrine taşındıysa eskisi de yenilenir.
+    previous = getattr(instance, '_previous', {})
+    invalidate_log_caches([instance.work_center_id, previous.get('work_center_id')],
+                          [instance.production_order_id, previous.get('production_order_id')])
+
+
+@receiver(post_save, sender=Operation)
+@receiver(post_delete, sender=Operation)
+@receiver(post_save, sender=BOMItem)
+@receiver(post_delete, sender=BOMItem)
+def invalidate_caches_on_routing(sender, instance, origin=None, **kwargs):
+    # Reçete (veya ürün) silinirken BOM sinyalinde bir kez yapılır.
+    if isinstance(origin, (BOM, Product)):
+        return
+    invalidate_product_costs([_bom_parent_product_id(instance.bom_id)])
+
+
+@receiver(post_save, sender=BOM)
+@receiver(post_delete, sender=BOM)
+def invalidate_caches_on_bom(sender, instance, **kwargs):
+    invalidate_product_costs([instance.parent_product_id])
+
+
+@receiver(post_save, sender=Product)
+def invalidate_caches_on_price(sender, instance, **kwargs):
+    # Bileşenin fiyatı, onu kullanan ürünlerin önbellekteki iş emri maliyetini değiştirir.
+    if _changed(instance, 'price'):
+        invalidate_product_costs([instance.pk])
+
+
+@receiver(post_save, sender=WorkCenter)
+def invalidate_caches_on_work_center(sender, instance, **kwargs):
+    invalidate_work_center_caches([instance.pk])
+    # Saatlik ücret, bu makinede operasyonu olan ürünleri kullanan üst ürünlerin maliyetini de değiştirir.
+    if _changed(instance, 'hourly_rate'):
+        invalidate_product_costs(Operation.objects.filter(work_center=instance).values_list('bom__parent_product_id', flat=True))
@@ -0,0 +1,191 @@
+# Üretim İstatistikleri
+# Makine verimliliği gibi değerler her okumada üretim kayıtlarını (ProductionLog) taramak yerine
+# yeni bir kayıt yazıldığında artımlı (incremental) olarak güncellenir ve ilgili modelde alan olarak saklanır.
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Operation, ProductionLog, WorkCenter
+
+ZERO = Decimal('0')
+
+
+def efficiency(planned_total, actual_total):
+    """
+    Verimlilik = Toplam Planlanan Süre / Toplam Gerçekleşen Süre (En az %1, en fazla %120)
+    Rota süresi verimliliğe bölündüğü için (Product.calculated_production_time) sonuç 0 olamaz.
+    """
+    if actual_total <= 0 or planned_total <= 0:
+        return Decimal('1.00')
+    ratio = min(max(planned_total / actual_total, WorkCenter.MIN_EFFICIENCY), WorkCenter.MAX_EFFICIENCY)
+    return ratio.quantize(Decimal('0.01'))
+
+
+def _window_changes(logs, field, counts, window, columns):
+    """
+    Kaydedilmiş yeni kayıtların kayıt sahibi (makine/operasyon) bazında pencereye etkisi.
+    counts: {sahip_id: penceredeki mevcut kayıt sayısı}
+    Dönüş: {sahip_id: (yeni kayıt sayısı, pencereye giren yeni kayıtlar, pencereden çıkan eski kayıtların columns değerleri)}
+    Çıkan kayıtlar sahip başına tek sınırlı (LIMIT) sorguyla okunur; kayıt geçmişinin büyüklüğü sorguyu etkilemez.
+    """
+    by_owner = defaultdict(list)
+    for log in logs:
+        by_owner[getattr(log, field)].append(log)
+
+    changes = {}
+    for owner_id, owner_logs in by_owner.items():
+        owner_logs.sort(key=lambda log: log.pk)
+        count = counts.get(owner_id, 0)
+        # Yeni kayıtlar en yenileridir; eski pencereden en yeni "keep" kayıt pencerede kalır.
+        keep = max(window - len(owner_logs), 0)
+        dropped = []
+        if count > keep:
+            older = ProductionLog.objects.filter(**{field: owner_id}, id__lt=owner_logs[0].pk).order_by('-id')
+            dropped = list(older.values_list(*columns)[keep:count])
+        changes[owner_id] = (min(count + len(owner_logs), window), owner_logs[-window:], dropped)
+    return changes
+
+
+def _last_logs(field, ids, window, columns):
+    """Her kayıt sahibinin (makine/operasyon) son window kaydını pencere fonksiyonu (ROW_NUMBER) ile tek sorguda okur."""
+    logs = ProductionLog.objects.filter(**{f'{field}__isnull': False})
+    if ids is not None:
+        logs = logs.filter(**{f'{field}__in': ids})
+    ranked = logs.annotate(
+        position=Window(RowNumber(), partition_by=[F(field)], order_by=F('id').desc())
+    ).filter(position__lte=window)
+    return ranked.values_list(field, *columns)
+
+
+def _apply_efficiency(work_center):
+    if work_center.efficiency_log_count:
+        work_center.efficiency_factor = efficiency(work_center.efficiency_planned_total, work_center.efficiency_actual_total)
+
+
+# --- MAKİNE VERİMLİLİĞİ ---
+
+def record_work_center_logs(logs):
+    """
+    Yeni üretim kayıtlarını makinelerin verimlilik pencerelerine (son 100 kayıt) ekler.
+    Pencere dolarsa pencereden çıkan en eski kayıtlar toplamdan düşülür. Toplamlar makine başına tek F() güncellemesiyle
+    değişir; toplu yazımda (ingest) da tüm geçmiş taranmaz. Aynı makineye aynı anda gelen kayıtlar toplamları bozmasın
+    diye makine satırları kilitlenir.
+    """
+    logs = [log for log in logs if log.work_center_id is not None]
+    if not logs:
+        return
+    window = WorkCenter.EFFICIENCY_WINDOW
+    with transaction.atomic():
+        current = {
+            pk: (count, planned, actual)
+            for pk, count, planned, actual in WorkCenter.objects.select_for_update().filter(pk__in={log.work_center_id for log in logs})
+            .order_by('pk').values_list('pk', 'efficiency_log_count', 'efficiency_planned_total', 'efficiency_actual_total')
+        }
+        changes = _window_changes(logs, 'work_center_id', {pk: row[0] for pk, row in current.items()}, window,
+                                  ['planned_duration', 'actual_duration'])
+        for work_center_id, (count, added, dropped) in changes.items():
+            old_count, old_planned, old_actual = current[work_center_id]
+            planned = sum((log.planned_duration for log in added), ZERO) - sum((row[0] for row in dropped), ZERO)
+            actual = sum((log.actual_duration for log in added), ZERO) - sum((row[1] for row in dropped), ZERO)
+            WorkCenter.objects.filter(pk=work_center_id).update(
+                efficiency_log_count=F('efficiency_log_count') + (count - old_count),
+                efficiency_planned_total=F('efficiency_planned_total') + planned,
+                efficiency_actual_total=F('efficiency_actual_total') + actual,
+                efficiency_factor=efficiency(old_planned + planned, old_actual + actual),
+            )
+
+
+def record_work_center_log(log):
+    """Tek bir yeni üretim kaydını makinenin verimlilik penceresine ekler. (Kilit + en fazla 1 okuma + 1 güncelleme)"""
+    record_work_center_logs([log])
+
+
+def refresh_work_center_stats(work_center_ids=None):
+    """
+    Verimlilik pencerelerini üretim kayıtlarından baştan hesaplar.
+    Kayıt silindiğinde/düzenlendiğinde, arşivde ve ilk kurulumda (onarım) kullanılır. Yeni kayıtlar için record_* kullanılır.
+    Tüm makinelerin son 100 kaydı pencere fonksiyonu (ROW_NUMBER) ile tek sorguda okunur.
+    """
+    work_centers = WorkCenter.objects.all()
+    if work_center_ids is not None:
+        work_centers = work_centers.filter(pk__in=work_center_ids)
+
+    totals = defaultdict(lambda: [0, ZERO, ZERO])
+    rows = _last_logs('work_center_id', work_center_ids, WorkCenter.EFFICIENCY_WINDOW, ['planned_duration', 'actual_duration'])
+    for work_center_id, planned, actual in rows:
+        row = totals[work_center_id]
+        row[0] += 1
+        row[1] += planned
+        row[2] += actual
+
+    changed = []
+    for work_center in work_centers:
+        work_center.efficiency_log_count, work_center.efficiency_planned_total, work_center.efficiency_actual_total = totals.get(work_center.pk, (0, ZERO, ZERO))
+        _apply_efficiency(work_center)
+        changed.append(work_center)
+
+    WorkCenter.objects.bulk_update(changed, ['efficiency_log_count', 'efficiency_planned_total', 'efficiency_actual_total', 'efficiency_factor'], batch_size=500)
+    return len(changed)
+
+
+# --- OPERASYON ÇEVRİM SÜRESİ ---
+
+OPERATION_STATS_FIELDS = ['cycle_log_count', 'cycle_duration_total', 'cycle_duration_sq_total', 'cycle_quantity_total']
+
+
+def record_operation_logs(logs):
+    """
+    Yeni üretim kayıtlarını operasyonların çevrim süresi pencerelerine (son 50 kayıt) ekler.
+    Sayı, süre toplamı, süre kareleri toplamı ve miktar toplamı operasyon başına tek F() güncellemesiyle değişir.
+    """
+    logs = [log for log in logs if log.operation_id is not None]
+    if not logs:
+        return
+    window = Operation.CYCLE_WINDOW
+    with transaction.atomic():
+        counts = dict(Operation.objects.select_for_update().filter(pk__in={log.operation_id for log in logs})
+                      .order_by('pk').values_list('pk', 'cycle_log_count'))
+        changes = _window_changes(logs, 'operation_id', counts, window, ['actual_duration', 'quantity_produced'])
+        for operation_id, (count, added, dropped) in changes.items():
+            duration = sum((log.actual_duration for log in added), ZERO) - sum((row[0] for row in dropped), ZERO)
+            squares = (sum((log.actual_duration * log.actual_duration for log in added), ZERO)
+                       - sum((row[0] * row[0] for row in dropped), ZERO))
+            quantity = sum((log.quantity_produced for log in added), ZERO) - sum((row[1] for row in dropped), ZERO)
+            Operation.objects.filter(pk=operation_id).update(
+                cycle_log_count=F('cycle_log_count') + (count - counts[operation_id]),
+                cycle_duration_total=F('cycle_duration_total') + duration,
+                cycle_duration_sq_total=F('cycle_duration_sq_total') + squares,
+                cycle_quantity_total=F('cycle_quantity_total') + quantity,
+            )
+
+
+def record_operation_log(log):
+    """Tek bir yeni üretim kaydını operasyonun çevrim süresi penceresine ekler."""
+    record_operation_logs([log])
+
+
+def refresh_operation_stats(operation_ids=None):
+    """Operasyonların çevrim süresi pencerelerini üretim kayıtlarından baştan hesaplar. (Tek okuma sorgusu + toplu güncelleme)"""
+    operations = Operation.objects.all()
+    if operation_ids is not None:
+        operations = operations.filter(pk__in=operation_ids)
+
+    totals = defaultdict(lambda: [0, ZERO, ZERO, ZERO])
+    for operation_id, duration, quantity in _last_logs('operation_id', operation_ids, Operation.CYCLE_WINDOW, ['actual_duration', 'quantity_produced']):
+        row = totals[operation_id]
+        row[0] += 1
+        row[1] += duration
+        row[2] += duration * duration
+        row[3] += quantity
+
+    changed = []
+    for operation in operations.only('pk'):
+        (operation.cycle_log_count, operation.cycle_duration_total,
+         operation.cycle_duration_sq_total, operation.cycle_quantity_total) = totals.get(operation.pk, (0, ZERO, ZERO, ZERO))
+        changed.append(operation)
+
+    Operation.objects.bulk_update(changed, OPERATION_STATS_FIELDS, batch_size=500)
+    return len(changed)
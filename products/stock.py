@@ -0,0 +1,192 @@
+# Stok Defteri (Stock Ledger)
+# StockTransaction.save eskiden ürünü Python'da okuyup (stock_quantity += ...) tüm satırı geri yazıyordu.
+# Aynı anda çalışan iki işlem (gunicorn worker) birbirinin güncellemesini eziyordu.
+# Bu modülde stok, veritabanında F() ifadeleriyle artırılır: UPDATE ... SET stock_quantity = stock_quantity + x
+# Bu tek bir atomik komut olduğu için satır kilidine (select_for_update) gerek kalmaz.
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Abs
+from django.utils import timezone
+
+from .models import Product, StockSnapshot, StockTransaction, WarehouseStock
+
+ZERO = Decimal('0')
+
+# StockTransaction.signed_quantity'nin veritabanı karşılığı. (Toplama sorgularında kullanılır.)
+SIGNED_QUANTITY = Case(
+    When(transaction_type__in=StockTransaction.OUTGOING_TYPES, then=-Abs('quantity')),
+    default=Abs('quantity'),
+    output_field=DecimalField(max_digits=12, decimal_places=4),
+)
+
+
+def _delta_case(deltas, lookup):
+    """Her satır için farklı miktar ekleyebilmek amacıyla CASE WHEN ifadesi kurar."""
+    return Case(
+        *[When(then=Value(delta), **lookup(key)) for key, delta in deltas],
+        default=Value(ZERO),
+        output_field=DecimalField(max_digits=12, decimal_places=4),
+    )
+
+
+def _chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _update_product_stock(deltas, batch_size):
+    for chunk in _chunks(deltas.items(), batch_size):
+        Product.objects.filter(pk__in=[product_id for product_id, _ in chunk]).update(
+            stock_quantity=F('stock_quantity') + _delta_case(chunk, lambda key: {'pk': key})
+        )
+
+
+def _update_warehouse_stock(deltas, batch_size):
+    # Depo satırı henüz yoksa oluşturulur. Başka bir işlem aynı anda oluşturduysa çakışma yok sayılır.
+    WarehouseStock.objects.bulk_create(
+        [WarehouseStock(product_id=product_id, warehouse_id=warehouse_id) for product_id, warehouse_id in deltas],
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    for chunk in _chunks(deltas.items(), batch_size):
+        condition = Q()
+        for (product_id, warehouse_id), _ in chunk:
+            condition |= Q(product_id=product_id, warehouse_id=warehouse_id)
+        WarehouseStock.objects.filter(condition).update(
+            quantity=F('quantity') + _delta_case(chunk, lambda key: {'product_id': key[0], 'warehouse_id': key[1]})
+        )
+
+
+def apply_stock_deltas(transactions, batch_size=500):
+    """
+    Kaydedilmiş hareketlerin stok etkisini ürün ve depo bazında toplayıp veritabanına yansıtır.
+    Kaç hareket olursa olsun ürün başına değil, parti başına tek UPDATE çalışır.
+    """
+    product_deltas = defaultdict(lambda: ZERO)
+    warehouse_deltas = defaultdict(lambda: ZERO)
+    for stock_transaction in transactions:
+        delta = stock_transaction.signed_quantity
+        product_deltas[stock_transaction.product_id] += delta
+        if stock_transaction.warehouse_id is not None:
+            warehouse_deltas[(stock_transaction.product_id, stock_transaction.warehouse_id)] += delta
+
+        # Bellekteki ürün nesnesi de güncel kalsın. (Eski davranışla uyumlu)
+        if StockTransaction.product.is_cached(stock_transaction):
+            stock_transaction.product.stock_quantity += delta
+
+    _update_product_stock(product_deltas, batch_size)
+    if warehouse_deltas:
+        _update_warehouse_stock(warehouse_deltas, batch_size)
+
+
+def post_transactions(transactions, batch_size=500):
+    """
+    Binlerce stok hareketini tek seferde kaydeder. (Toplu giriş/çıkış)
+    Hareketler bulk_create ile yazılır, stok etkileri toplanarak parti başına tek UPDATE ile işlenir.
+    Tümü tek bir veritabanı işlemi (transaction) içindedir; hata olursa hiçbiri kaydedilmez.
+    Hareketlerin maliyeti ve ürünlerin stok değeri de aynı işlemde, hareket sırasıyla hesaplanır. (products/valuation.py)
+    """
+    from .mrp import mark_mrp_dirty
+    from .valuation import plan_valuation
+
+    transactions = list(transactions)
+    with transaction.atomic():
+        valuation = plan_valuation(transactions)
+        StockTransaction.objects.bulk_create(transactions, batch_size=batch_size)
+        valuation.save(batch_size)
+        apply_stock_deltas(transactions, batch_size)
+        # Toplu kayıt sinyal göndermez; net değişim MRP'si için ürünler burada işaretlenir.
+        mark_mrp_dirty((t.product_id for t in transactions), StockTransaction.__name__)
+    return transactions
+
+
+# --- GÜNLÜK STOK FOTOĞRAFLARI ---
+
+def end_of_day(day):
+    """Günün bittiği an (Yerel saat ile ertesi gün 00:00)."""
+    return timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def _movements_by_warehouse(transactions):
+    rows = transactions.filter(warehouse__isnull=False).values('product_id', 'warehouse_id').annotate(total=Sum(SIGNED_QUANTITY)).order_by()
+    return {(row['product_id'], row['warehouse_id']): row['total'] or ZERO for row in rows}
+
+
+def take_stock_snapshot(day=None, batch_size=1000):
+    """
+    Verilen günün sonundaki depo bakiyelerini kaydeder. (Varsayılan: dün)
+    Bakiye = Güncel depo stoğu - O günden sonra yapılan hareketler. Tüm geçmiş taranmaz.
+    """
+    day = day or timezone.localdate() - timedelta(days=1)
+    later = _movements_by_warehouse(StockTransaction.objects.filter(created_at__gte=end_of_day(day)))
+
+    balances = {}
+    for product_id, warehouse_id, quantity in WarehouseStock.objects.values_list('product_id', 'warehouse_id', 'quantity').iterator(chunk_size=batch_size):
+        balances[(product_id, warehouse_id)] = quantity - later.pop((product_id, warehouse_id), ZERO)
+    # O günden sonra açılmış depo satırları o gün için sıfırdan başlar.
+    for key, quantity in later.items():
+        balances[key] = -quantity
+
+    rows = [
+        StockSnapshot(product_id=product_id, warehouse_id=warehouse_id, date=day, quantity=quantity)
+        for (product_id, warehouse_id), quantity in balances.items()
+    ]
+    with transaction.atomic():
+        StockSnapshot.objects.bulk_create(
+            rows,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['product', 'warehouse', 'date'],
+            update_fields=['quantity'],
+        )
+    return len(rows)
+
+
+def stock_as_of(product_id, warehouse_id, at):
+    """
+    Bir ürünün bir depodaki stoğunu geçmiş bir an için hesaplar. (at: tarih veya tarih-saat)
+    En yakın önceki fotoğraf + fotoğraftan sonraki hareketler. (2 sorgu)
+    """
+    if not isinstance(at, datetime):
+        at = end_of_day(at)
+
+    snapshot = (StockSnapshot.objects.filter(product_id=product_id, warehouse_id=warehouse_id, date__lt=timezone.localdate(at))
+                .order_by('-date').values_list('date', 'quantity').first())
+    transactions = StockTransaction.objects.filter(product_id=product_id, warehouse_id=warehouse_id, created_at__lt=at)
+    balance = ZERO
+    if snapshot is not None:
+        transactions = transactions.filter(created_at__gte=end_of_day(snapshot[0]))
+        balance = snapshot[1]
+
+    return balance + (transactions.aggregate(total=Sum(SIGNED_QUANTITY))['total'] or ZERO)
+
+
+def warehouse_stock_as_of(at, warehouse_id=None):
+    """
+    Tüm ürünlerin depo bazında geçmiş bir andaki stoğunu hesaplar. {(ürün_id, depo_id): miktar}
+    Fotoğraflar tüm depo satırları için aynı gün alındığı için en son fotoğraf günü ortak kullanılır.
+    """
+    if not isinstance(at, datetime):
+        at = end_of_day(at)
+
+    snapshots = StockSnapshot.objects.filter(date__lt=timezone.localdate(at))
+    transactions = StockTransaction.objects.filter(created_at__lt=at)
+    if warehouse_id is not None:
+        snapshots = snapshots.filter(warehouse_id=warehouse_id)
+        transactions = transactions.filter(warehouse_id=warehouse_id)
+
+    balances = defaultdict(lambda: ZERO)
+    snapshot_day = snapshots.order_by('-date').values_list('date', flat=True).first()
+    if snapshot_day is not None:
+        for product_id, wh_id, quantity in snapshots.filter(date=snapshot_day).values_list('product_id', 'warehouse_id', 'quantity'):
+            balances[(product_id, wh_id)] = quantity
+        transactions = transactions.filter(created_at__gte=end_of_day(snapshot_day))
+
+    for key, quantity in _movements_by_warehouse(transactions).items():
+        balances[key] += quantity
+    return dict(balances)
@@ -1,3 +1,765 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+from dataclasses import replace
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from importlib.util import find_spec
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .archive import archive_production_logs
+from .atp import invalidate_atp, promise
+from .bom import BOMCycleError, BOMGraph, flattened_bom, rebuild_closure, update_low_level_codes, where_used
+from .categories import get_tree, invalidate_tree, subtree_ids
+from .costing import save_cost_snapshots
+from .exports import EXPORTS
+from .importers import import_transactions
+from .ingest import LogBuffer, parse_event, write_logs
+from .mrp import calculate_net_requirements, regenerate_time_phased, replan_net_change
+from .oee import compute_oee
+from .scheduling import ScheduledOrder, save_schedule, schedule_orders
+from .stock import post_transactions, stock_as_of, take_stock_snapshot, warehouse_stock_as_of
+from .stats import OPERATION_STATS_FIELDS, refresh_operation_stats, refresh_work_center_stats
+from .valuation import rebuild_valuation
+from .models import (
+    BOM, BOMClosure, BOMItem, Category, CostLayer, CostSnapshot, Customer, Maintenance, MaintenanceReason, Operation, Product, ProductionLog,
+    ProductionLogSummary, ProductionOrder, PurchaseSuggestion, QualityCheck, QualityMeasurement, QualityParameter, SalesOrder, Shift,
+    StockTransaction, Warehouse, WarehouseStock, WorkCenter
+)
+
+
+# Admin liste ekranlarının sorgu sayısı, listelenen satır sayısından bağımsız olmalıdır.
+# Her testte önce az, sonra çok satırla sayfa açılır ve sorgu sayıları karşılaştırılır.
+class AdminChangelistQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'sifre')
+        cls.customer = Customer.objects.create(name="Müşteri")
+        cls.warehouse = Warehouse.objects.create(name="Ana Depo", warehouse_type='RAW')
+        cls.work_center = WorkCenter.objects.create(code="CNC-01", name="Torna")
+        cls.reason = MaintenanceReason.objects.create(code="M1", description="Rulman", category='MECHANICAL')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def create_rows(self, start, count):
+        today = date.today()
+        for i in range(start, start + count):
+            product = Product.objects.create(name=f"Ürün {i}", sku=f"SKU-{i}", product_type='FINAL', stock_quantity=i % 3)
+            bom = BOM.objects.create(parent_product=product)
+            operation = Operation.objects.create(bom=bom, work_center=self.work_center, step_number=1, description="Kesim", cycle_time=Decimal('1'))
+            order = ProductionOrder.objects.create(product=product, planned_quantity=10, start_date=today, due_date=today - timedelta(days=1), status='PLANNED')
+            ProductionLog.objects.create(production_order=order, work_center=self.work_center, operation=operation,
+                                         planned_duration=10, actual_duration=12, quantity_produced=2)
+            SalesOrder.objects.create(customer=self.customer, product=product, quantity=5, delivery_date=today)
+            StockTransaction.objects.create(product=product, warehouse=self.warehouse, quantity=1, transaction_type='IN')
+            Maintenance.objects.create(work_center=self.work_center, reason=self.reason, maintenance_type='REPAIR', downtime_minutes=5, description="Onarım")
+
+    def count_queries(self, url):
+        # Kategori ağacı önbelleği her ölçümde boş başlar; ölçümler birbirini etkilemez.
+        invalidate_tree()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_query_count_is_constant(self):
+        models = [Product, BOM, ProductionOrder, ProductionLog, WorkCenter, StockTransaction, SalesOrder, Maintenance]
+        urls = [reverse(f'admin:products_{model._meta.model_name}_changelist') for model in models]
+
+        self.create_rows(0, 5)
+        small = {url: self.count_queries(url) for url in urls}
+
+        self.create_rows(5, 95)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), small[url])
+
+    def test_production_order_progress_uses_annotation(self):
+        self.create_rows(0, 1)
+        order = ProductionOrder.objects.with_progress().get()
+        with self.assertNumQueries(0):
+            self.assertEqual(order.current_progress, Decimal('20.00'))
+
+
+class CategoryTreeTests(TestCase):
+    def test_tree_is_refreshed_after_subtree_move(self):
+        root = Category.objects.create(name="Kök")
+        other = Category.objects.create(name="Diğer")
+        child = Category.objects.create(name="Alt", parent=root)
+        leaf = Category.objects.create(name="Yaprak", parent=child)
+        get_tree()
+        with self.captureOnCommitCallbacks(execute=True):
+            child.parent = other
+            child.save()
+        self.assertEqual(sorted(subtree_ids(other.pk)), sorted([other.pk, child.pk, leaf.pk]))
+        self.assertEqual(get_tree().paths[leaf.pk], f"{other.pk}/{child.pk}/{leaf.pk}/")
+
+    def test_admin_filter_rejects_malformed_category(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name="Kök")
+        self.client.force_login(get_user_model().objects.create_superuser('admin', 'admin@example.com', 'sifre'))
+        response = self.client.get(reverse('admin:products_product_changelist') + '?category=abc')
+        self.assertEqual(response.status_code, 302)
+
+
+class NetRequirementQueryTests(TestCase):
+    def test_net_requirement_runs_single_query(self):
+        customer = Customer.objects.create(name="Müşteri")
+        product = Product.objects.create(name="Ürün", sku="SKU-1", product_type='FINAL', stock_quantity=2, min_stock_level=1)
+        SalesOrder.objects.create(customer=customer, product=product, quantity=5, delivery_date=date.today())
+        product = Product.objects.get()
+        with self.assertNumQueries(1):
+            self.assertEqual(product.net_requirement, Decimal('4'))
+
+
+class BOMCycleTests(TestCase):
+    def setUp(self):
+        self.bike = Product.objects.create(name="Bisiklet", sku="B", product_type='FINAL')
+        self.frame = Product.objects.create(name="Kadro", sku="K", product_type='SEMI')
+        BOMItem.objects.create(bom=BOM.objects.create(parent_product=self.bike), child_product=self.frame, quantity=1)
+        self.item = BOMItem(bom=BOM.objects.create(parent_product=self.frame), child_product=self.bike, quantity=1)
+
+    def test_clean_rejects_cycle(self):
+        with self.assertRaises(ValidationError):
+            self.item.full_clean()
+
+    def test_cycle_on_save_is_rolled_back(self):
+        with self.assertRaises(BOMCycleError):
+            self.item.save()
+        self.assertFalse(BOMItem.objects.filter(child_product=self.bike).exists())
+
+
+class BOMGraphTests(TestCase):
+    def setUp(self):
+        # Hammadde hem mamulde doğrudan (seviye 1) hem yarı mamulün altında (seviye 2) kullanılır.
+        self.final = Product.objects.create(name="Mamul", sku="F", product_type='FINAL')
+        self.semi = Product.objects.create(name="Yarı Mamul", sku="S", product_type='SEMI')
+        self.raw = Product.objects.create(name="Hammadde", sku="R", product_type='RAW')
+        final_bom = BOM.objects.create(parent_product=self.final)
+        BOMItem.objects.create(bom=final_bom, child_product=self.semi, quantity=2)
+        BOMItem.objects.create(bom=final_bom, child_product=self.raw, quantity=1)
+        BOMItem.objects.create(bom=BOM.objects.create(parent_product=self.semi), child_product=self.raw, quantity=3, scrap_factor=25)
+
+    def test_component_used_at_two_depths_gets_deepest_level(self):
+        graph = BOMGraph.load()
+        self.assertEqual(graph.low_level_codes(), {self.final.pk: 0, self.semi.pk: 1, self.raw.pk: 2})
+        self.assertEqual(graph.levels(), [[self.final.pk], [self.semi.pk], [self.raw.pk]])
+
+        self.assertEqual(update_low_level_codes(graph), 2)
+        self.assertEqual(dict(Product.objects.values_list('pk', 'low_level_code')),
+                         {self.final.pk: 0, self.semi.pk: 1, self.raw.pk: 2})
+        self.assertEqual(update_low_level_codes(graph), 0)
+
+    def test_explode_multiplies_quantities_along_each_path(self):
+        # Yarı mamul: 10 x 2. Hammadde: Doğrudan 10 x 1 + yarı mamulden 20 x 3 / (1 - 0.25) fire ile.
+        self.assertEqual(BOMGraph.load().explode({self.final.pk: 10}),
+                         {self.final.pk: Decimal('10'), self.semi.pk: Decimal('20'), self.raw.pk: Decimal('90')})
+
+
+class BOMClosureTests(TestCase):
+    def setUp(self):
+        self.final = Product.objects.create(name="Mamul", sku="F", product_type='FINAL')
+        self.semi = Product.objects.create(name="Yarı Mamul", sku="S", product_type='SEMI')
+        self.raw = Product.objects.create(name="Hammadde", sku="R", product_type='RAW')
+        final_bom = BOM.objects.create(parent_product=self.final)
+        BOMItem.objects.create(bom=final_bom, child_product=self.semi, quantity=2)
+        self.direct = BOMItem.objects.create(bom=final_bom, child_product=self.raw, quantity=1)
+        self.semi_item = BOMItem.objects.create(bom=BOM.objects.create(parent_product=self.semi), child_product=self.raw, quantity=3)
+
+    def rows(self):
+        return set(BOMClosure.objects.values_list('ancestor_id', 'descendant_id', 'quantity', 'depth'))
+
+    def assertMatchesRebuild(self):
+        # Artımlı güncellenen satırlar baştan oluşturulanlarla aynı olmalı. Yeniden oluşturma geri alınır; sonraki adım
+        # yine artımlı satırlar üzerinden devam eder.
+        incremental = self.rows()
+        with transaction.atomic():
+            rebuild_closure()
+            rebuilt = self.rows()
+            transaction.set_rollback(True)
+        self.assertEqual(incremental, rebuilt)
+        self.assertEqual(self.rows(), incremental)
+
+    def test_incremental_edits_match_full_rebuild(self):
+        self.assertMatchesRebuild()
+        # Hammadde iki yoldan gelir: 1 + 2 x 3. En kısa yol doğrudan kalemdir.
+        self.assertEqual(flattened_bom(self.final.pk), {self.semi.pk: Decimal('2'), self.raw.pk: Decimal('7')})
+        self.assertEqual(BOMClosure.objects.get(ancestor=self.final, descendant=self.raw).depth, 1)
+
+        top = Product.objects.create(name="Set", sku="T", product_type='FINAL')
+        BOMItem.objects.create(bom=BOM.objects.create(parent_product=top), child_product=self.final, quantity=2)
+        self.assertMatchesRebuild()
+
+        self.semi_item.quantity = 5
+        self.semi_item.save()
+        self.assertMatchesRebuild()
+
+        self.direct.delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(BOMClosure.objects.get(ancestor=self.final, descendant=self.raw).depth, 2)
+        self.assertEqual(where_used(self.raw.pk), {self.semi.pk: Decimal('5'), self.final.pk: Decimal('10'), top.pk: Decimal('20')})
+        self.assertEqual(flattened_bom(top.pk), {self.final.pk: Decimal('2'), self.semi.pk: Decimal('4'), self.raw.pk: Decimal('20')})
+
+
+class CostSnapshotTests(TestCase):
+    def setUp(self):
+        work_center = WorkCenter.objects.create(code="W1", name="Montaj", hourly_rate=60)
+        self.final = Product.objects.create(name="Mamul", sku="F", product_type='FINAL')
+        semi = Product.objects.create(name="Yarı Mamul", sku="S", product_type='SEMI', price=999)
+        self.raw = Product.objects.create(name="Hammadde", sku="R", price=10)
+        BOMItem.objects.create(bom=BOM.objects.create(parent_product=self.final), child_product=semi, quantity=2)
+        semi_bom = BOM.objects.create(parent_product=semi)
+        BOMItem.objects.create(bom=semi_bom, child_product=self.raw, quantity=3)
+        Operation.objects.create(bom=semi_bom, work_center=work_center, step_number=1, description="Kesim", cycle_time=1)
+        self.order = ProductionOrder(product=self.final, planned_quantity=1, start_date=date.today(), due_date=date.today())
+
+    def test_fallback_matches_snapshot(self):
+        # Yarı mamul fiyatı değil, alt seviyelerin malzeme + işçiliği kullanılır: 2 * (3 * 10 + 1)
+        self.assertEqual(self.order._estimate_total_cost(), Decimal('62'))
+        save_cost_snapshots()
+        self.assertEqual(self.order._estimate_total_cost(), Decimal('62'))
+
+    def test_component_price_change_marks_ancestors_stale(self):
+        save_cost_snapshots()
+        self.raw.price = 20
+        self.raw.save()
+        self.assertFalse(CostSnapshot.objects.filter(is_stale=False).exists())
+        self.assertEqual(self.order._estimate_total_cost(), Decimal('122'))
+
+
+class TimePhasedMRPTests(TestCase):
+    def test_firm_order_still_demands_components(self):
+        final = Product.objects.create(name="Mamul", sku="F", product_type='FINAL')
+        raw = Product.objects.create(name="Hammadde", sku="R", product_type='RAW')
+        BOMItem.objects.create(bom=BOM.objects.create(parent_product=final), child_product=raw, quantity=3)
+        SalesOrder.objects.create(customer=Customer.objects.create(name="Müşteri"), product=final, quantity=10,
+                                  delivery_date=date.today() + timedelta(days=10))
+        regenerate_time_phased()
+        self.assertEqual(PurchaseSuggestion.objects.get(product=raw).quantity, Decimal('30'))
+
+        # Planlamacı taslağı onaylar; mamul önerisi kalkar ama hammadde ihtiyacı sürer.
+        order = ProductionOrder.objects.get(product=final, mrp_generated=True)
+        order.status = 'PLANNED'
+        order.save()
+        for replan in (replan_net_change, regenerate_time_phased):
+            with self.subTest(replan=replan.__name__):
+                replan()
+                self.assertFalse(ProductionOrder.objects.filter(product=final, status='DRAFT').exists())
+                self.assertEqual(PurchaseSuggestion.objects.get(product=raw).quantity, Decimal('30'))
+
+
+class CachedCostTests(TestCase):
+    def setUp(self):
+        self.work_center = WorkCenter.objects.create(code="W1", name="Montaj", hourly_rate=60)
+        final = Product.objects.create(name="Mamul", sku="F", product_type='FINAL')
+        semi = Product.objects.create(name="Yarı Mamul", sku="S", product_type='SEMI')
+        self.raw = Product.objects.create(name="Hammadde", sku="R", price=10)
+        BOMItem.objects.create(bom=BOM.objects.create(parent_product=final), child_product=semi, quantity=2)
+        semi_bom = BOM.objects.create(parent_product=semi)
+        BOMItem.objects.create(bom=semi_bom, child_product=self.raw, quantity=3)
+        self.operation = Operation.objects.create(bom=semi_bom, work_center=self.work_center, step_number=1, description="Kesim", cycle_time=1)
+        self.order = ProductionOrder.objects.create(product=final, planned_quantity=1, start_date=date.today(), due_date=date.today())
+
+    def cost(self):
+        return ProductionOrder.objects.get(pk=self.order.pk).estimated_total_cost
+
+    def test_component_changes_refresh_cached_ancestor_cost(self):
+        self.assertEqual(self.cost(), Decimal('62'))
+        self.raw.price = 20
+        self.raw.save()
+        self.assertEqual(self.cost(), Decimal('122'))
+        self.operation.cycle_time = 2
+        self.operation.save()
+        self.assertEqual(self.cost(), Decimal('124'))
+        self.work_center.hourly_rate = 120
+        self.work_center.save()
+        self.assertEqual(self.cost(), Decimal('128'))
+
+    def test_moved_log_refreshes_previous_order_progress(self):
+        other = ProductionOrder.objects.create(product=self.raw, planned_quantity=10, start_date=date.today(), due_date=date.today())
+        log = ProductionLog.objects.create(production_order=self.order, work_center=self.work_center, planned_duration=1,
+                                           actual_duration=1, quantity_produced=1)
+        self.assertEqual(ProductionOrder.objects.get(pk=self.order.pk).current_progress, Decimal('100.00'))
+        log.production_order = other
+        log.save()
+        self.assertEqual(ProductionOrder.objects.get(pk=self.order.pk).current_progress, Decimal('0.00'))
+
+
+class ImportTransactionsTests(TestCase):
+    def test_invalid_jsonl_rows_are_reported_per_line(self):
+        Product.objects.create(name="Ürün", sku="A")
+        lines = [
+            '{"sku": "A", "quantity": "5", "transaction_type": "IN"}',
+            '{bozuk',
+            '[1, 2]',
+            '{"sku": "A", "quantity": "NaN", "transaction_type": "IN"}',
+            '{"sku": "A", "quantity": "1e30", "transaction_type": "IN"}',
+            '{"sku": "A", "quantity": "1", "transaction_type": "IN"}',
+        ]
+        result = import_transactions(io.StringIO("\n".join(lines)), fmt='jsonl', chunk_size=1)
+        self.assertEqual(result.imported, 2)
+        self.assertEqual([line for line, _ in result.errors], [2, 3, 4, 5])
+        self.assertEqual(Product.objects.get().stock_quantity, Decimal('6'))
+
+
+class IngestParseTests(TestCase):
+    def test_out_of_range_decimals_are_rejected(self):
+        for value in ["1e30", "NaN", "-1", "abc"]:
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                parse_event({'work_center': 1, 'planned_duration': value, 'actual_duration': 1})
+        log = parse_event({'work_center': 1, 'planned_duration': "12.345", 'actual_duration': 1})
+        self.assertEqual(log.planned_duration, Decimal('12.34'))
+
+
+class IngestWriteTests(TestCase):
+    def test_bulk_write_updates_windows_like_full_refresh(self):
+        work_center = WorkCenter.objects.create(code="W1", name="Torna")
+        product = Product.objects.create(name="Mamul", sku="F", product_type='FINAL')
+        operation = Operation.objects.create(bom=BOM.objects.create(parent_product=product), work_center=work_center,
+                                             step_number=1, description="Kesim", cycle_time=1)
+        for i in range(90):
+            ProductionLog.objects.create(work_center=work_center, operation=operation, planned_duration=10,
+                                         actual_duration=10 + i % 7, quantity_produced=i % 3)
+        # 90 + 60 kayıt: Makine penceresi (100) taşar; operasyon penceresi (50) yeni kayıtların bir kısmını da dışarıda bırakır.
+        write_logs([ProductionLog(work_center=work_center, operation=operation, planned_duration=Decimal('12.50'),
+                                  actual_duration=Decimal(5 + i), quantity_produced=Decimal(i % 4)) for i in range(60)])
+        fields = ['efficiency_log_count', 'efficiency_planned_total', 'efficiency_actual_total', 'efficiency_factor']
+        incremental = WorkCenter.objects.values_list(*fields).get(), Operation.objects.values_list(*OPERATION_STATS_FIELDS).get()
+        refresh_work_center_stats()
+        refresh_operation_stats()
+        self.assertEqual((WorkCenter.objects.values_list(*fields).get(), Operation.objects.values_list(*OPERATION_STATS_FIELDS).get()),
+                         incremental)
+
+
+    async def test_failed_batch_is_retried_per_request(self):
+        work_center = await WorkCenter.objects.acreate(code="W1", name="Torna")
+        good = [ProductionLog(work_center_id=work_center.pk, planned_duration=1, actual_duration=1) for _ in range(2)]
+        # Veritabanının reddettiği kayıt toplu yazımı düşürür. (Doğrulamadan kaçmış bir olay gibi)
+        bad = [ProductionLog(work_center_id=work_center.pk, planned_duration=1, actual_duration=None)]
+        buffer = LogBuffer(max_size=10_000, max_delay=0.01)
+        results = await asyncio.gather(buffer.submit(good), buffer.submit(bad), return_exceptions=True)
+        self.assertEqual(results[0], 2)
+        self.assertIsInstance(results[1], Exception)
+        self.assertEqual(await ProductionLog.objects.acount(), 2)
+
+
+class ValuationTests(TestCase):
+    def issue(self, product, quantity):
+        StockTransaction.objects.create(product=product, quantity=quantity, transaction_type='OUT')
+        product.refresh_from_db()
+
+    def test_opening_stock_is_valued_and_cleared_when_issued(self):
+        for method in ['AVG', 'FIFO']:
+            with self.subTest(method=method):
+                product = Product.objects.create(name=method, sku=method, stock_quantity=10, price=5, valuation_method=method)
+                self.assertEqual(product.stock_value, Decimal('50'))
+                self.assertEqual(CostLayer.objects.filter(product=product).count(), 1 if method == 'FIFO' else 0)
+                self.issue(product, 4)
+                self.assertEqual(product.stock_value, Decimal('30'))
+                self.issue(product, 6)
+                self.assertEqual((product.stock_quantity, product.stock_value), (Decimal('0'), Decimal('0')))
+
+    def test_leftover_value_is_cleared_at_zero_stock(self):
+        # Eksi stok fiyattan (5), sonraki giriş kendi maliyetinden (7) değerlenir; stok sıfırlanınca fark kalmamalıdır.
+        product = Product.objects.create(name="Ürün", sku="A", price=5)
+        self.issue(product, 2)
+        StockTransaction.objects.create(product=product, quantity=2, transaction_type='IN', unit_cost=Decimal('7'))
+        product.refresh_from_db()
+        self.assertEqual((product.stock_quantity, product.stock_value), (Decimal('0'), Decimal('0')))
+
+
+    def test_fifo_receipt_covers_negative_stock_before_opening_a_layer(self):
+        product = Product.objects.create(name="Ürün", sku="A", price=5, valuation_method='FIFO')
+        self.issue(product, 3)
+        StockTransaction.objects.create(product=product, quantity=5, transaction_type='IN', unit_cost=Decimal('7'))
+        for rebuild in (False, True):
+            with self.subTest(rebuild=rebuild):
+                if rebuild:
+                    rebuild_valuation()
+                product.refresh_from_db()
+                layers = CostLayer.objects.filter(product=product).aggregate(total=Sum('remaining_quantity'))['total']
+                self.assertEqual((product.stock_quantity, layers), (Decimal('2'), Decimal('2')))
+                self.assertEqual(product.stock_value, Decimal('14'))
+
+
+class WorkCenterEfficiencyTests(TestCase):
+    def test_efficiency_never_reaches_zero(self):
+        work_center = WorkCenter.objects.create(code="W1", name="Torna")
+        ProductionLog.objects.create(work_center=work_center, planned_duration=0, actual_duration=10)
+        work_center.refresh_from_db()
+        self.assertEqual(work_center.efficiency_factor, Decimal('1.00'))
+        ProductionLog.objects.create(work_center=work_center, planned_duration=Decimal('0.01'), actual_duration=1000)
+        work_center.refresh_from_db()
+        self.assertEqual(work_center.efficiency_factor, WorkCenter.MIN_EFFICIENCY)
+
+    def test_moved_log_refreshes_previous_work_center(self):
+        first = WorkCenter.objects.create(code="W1", name="Torna")
+        second = WorkCenter.objects.create(code="W2", name="Freze")
+        log = ProductionLog.objects.create(work_center=first, planned_duration=10, actual_duration=10)
+        log.work_center = second
+        log.save()
+        self.assertEqual(WorkCenter.objects.get(pk=first.pk).efficiency_log_count, 0)
+        self.assertEqual(WorkCenter.objects.get(pk=second.pk).efficiency_log_count, 1)
+
+
+class PromiseTests(TestCase):
+    def setUp(self):
+        # ATP çizelgeleri süreç içi bellektedir; önceki testlerden kalanlar temizlenir.
+        invalidate_atp()
+        self.customer = Customer.objects.create(name="Müşteri")
+        self.product = Product.objects.create(name="Mamul", sku="F", product_type='FINAL', stock_quantity=5)
+        self.today = date.today()
+
+    def test_ctp_requires_lead_time(self):
+        result = promise(self.product.pk, 10, self.today)
+        self.assertEqual((result.promise_date, result.is_feasible), (None, False))
+        Product.objects.filter(pk=self.product.pk).update(lead_time=3)
+        result = promise(self.product.pk, 10, self.today)
+        self.assertEqual((result.promise_date, result.source), (self.today + timedelta(days=3), 'CTP'))
+
+    def test_moved_sales_order_releases_previous_product(self):
+        other = Product.objects.create(name="Diğer", sku="D", product_type='FINAL')
+        order = SalesOrder.objects.create(customer=self.customer, product=self.product, quantity=5, delivery_date=self.today)
+        self.assertEqual(promise(self.product.pk, 5, self.today).available_on_requested, Decimal('0'))
+        order.product = other
+        order.save()
+        self.assertEqual(promise(self.product.pk, 5, self.today).available_on_requested, Decimal('5'))
+
+    def test_saved_schedule_refreshes_timeline(self):
+        order = ProductionOrder.objects.create(product=self.product, planned_quantity=5, start_date=self.today,
+                                               due_date=self.today + timedelta(days=10), status='PLANNED')
+        self.assertFalse(promise(self.product.pk, 10, self.today + timedelta(days=2)).is_feasible)
+        save_schedule([ScheduledOrder(order.pk, self.today, self.today + timedelta(days=1), order.due_date)])
+        self.assertTrue(promise(self.product.pk, 10, self.today + timedelta(days=2)).is_feasible)
+
+
+class SchedulingTests(TestCase):
+    def test_running_orders_load_capacity_and_reschedule_can_pull_earlier(self):
+        today = date.today()
+        work_center = WorkCenter.objects.create(code="W1", name="Torna", daily_capacity_hours=8, efficiency_factor=1)
+        product = Product.objects.create(name="Mamul", sku="F", product_type='FINAL')
+        Operation.objects.create(bom=BOM.objects.create(parent_product=product), work_center=work_center, step_number=1,
+                                 description="Kesim", cycle_time=60)
+        running = ProductionOrder.objects.create(product=product, planned_quantity=10, actual_quantity=2, start_date=today,
+                                                 due_date=today, status='IN_PROGRESS')
+        order = ProductionOrder.objects.create(product=product, planned_quantity=4, start_date=today,
+                                               due_date=today + timedelta(days=5), status='PLANNED')
+
+        # Üretimdeki emrin kalan 8 saati bugünü doldurur.
+        save_schedule(schedule_orders(start=today)[0])
+        order.refresh_from_db()
+        self.assertEqual(order.scheduled_start_date, today + timedelta(days=1))
+
+        running.status = 'COMPLETED'
+        running.save()
+        save_schedule(schedule_orders(start=today)[0])
+        order.refresh_from_db()
+        self.assertEqual((order.start_date, order.scheduled_start_date), (today, today))
+
+
+    def test_unscheduled_orders_lose_stale_dates(self):
+        today = date.today()
+        work_center = WorkCenter.objects.create(code="W1", name="Torna", daily_capacity_hours=8, efficiency_factor=1)
+        product = Product.objects.create(name="Mamul", sku="F", product_type='FINAL')
+        operation = Operation.objects.create(bom=BOM.objects.create(parent_product=product), work_center=work_center,
+                                             step_number=1, description="Kesim", cycle_time=1)
+        order = ProductionOrder.objects.create(product=product, planned_quantity=10, start_date=today, due_date=today, status='PLANNED')
+        save_schedule(*schedule_orders(start=today))
+        self.assertEqual(ProductionOrder.objects.get(pk=order.pk).scheduled_end_date, today)
+
+        # İşlem süresi uzadı; emir artık 2 günlük ufka sığmıyor.
+        operation.cycle_time = 600
+        operation.save()
+        scheduled, unscheduled = schedule_orders(start=today, horizon=2)
+        self.assertEqual(unscheduled, [order.pk])
+        save_schedule(scheduled, unscheduled)
+        order.refresh_from_db()
+        self.assertEqual((order.scheduled_start_date, order.scheduled_end_date), (None, None))
+
+    def test_saved_schedule_triggers_net_change_mrp(self):
+        today = date.today()
+        work_center = WorkCenter.objects.create(code="W1", name="Torna", daily_capacity_hours=8, efficiency_factor=1)
+        product = Product.objects.create(name="Mamul", sku="F", product_type='FINAL')
+        Operation.objects.create(bom=BOM.objects.create(parent_product=product), work_center=work_center, step_number=1,
+                                 description="Kesim", cycle_time=1)
+        customer = Customer.objects.create(name="Müşteri")
+        for days in (5, 10):
+            SalesOrder.objects.create(customer=customer, product=product, quantity=10, delivery_date=today + timedelta(days=days))
+        ProductionOrder.objects.create(product=product, planned_quantity=10, start_date=today,
+                                       due_date=today + timedelta(days=40), status='PLANNED')
+
+        def draft_dates():
+            return list(ProductionOrder.objects.filter(status='DRAFT').order_by('due_date').values_list('due_date', flat=True))
+
+        regenerate_time_phased()
+        self.assertEqual(draft_dates(), [today + timedelta(days=5), today + timedelta(days=10)])
+        # Emir bugün biter; ilk siparişi karşılar.
+        save_schedule(schedule_orders(start=today)[0])
+        plan, _ = replan_net_change()
+        self.assertIsNotNone(plan)
+        self.assertEqual(draft_dates(), [today + timedelta(days=10)])
+
+
+class ArchiveTests(TestCase):
+    def test_purge_keeps_logs_of_open_orders(self):
+        work_center = WorkCenter.objects.create(code="W1", name="Torna")
+        product = Product.objects.create(name="Mamul", sku="F", product_type='FINAL')
+        open_order, closed_order = [
+            ProductionOrder.objects.create(product=product, planned_quantity=10, start_date=date.today(), due_date=date.today(), status=status)
+            for status in ['IN_PROGRESS', 'COMPLETED']
+        ]
+        for order in [open_order, closed_order, None]:
+            ProductionLog.objects.create(work_center=work_center, production_order=order, planned_duration=1, actual_duration=1, quantity_produced=2)
+        ProductionLog.objects.update(created_at=timezone.now() - timedelta(days=200))
+
+        archived = archive_production_logs(keep_months=1, purge=True)
+        self.assertEqual([item.purged_logs for item in archived], [2])
+        self.assertEqual(ProductionOrder.objects.get(pk=open_order.pk).current_progress, Decimal('20.00'))
+
+        # Özetlenmiş ay tekrar özetlenmez; emir kapanınca kalan kayıt silinir.
+        self.assertEqual(archive_production_logs(keep_months=1, purge=True), [])
+        open_order.status = 'COMPLETED'
+        open_order.save()
+        archived = archive_production_logs(keep_months=1, purge=True)
+        self.assertEqual([(item.summary_rows, item.purged_logs) for item in archived], [(0, 1)])
+        self.assertEqual(ProductionLogSummary.objects.get().log_count, 3)
+
+
+class OEETests(TestCase):
+    def test_logs_without_shift_share_downtime_and_idle_shifts_have_planned_time(self):
+        work_center = WorkCenter.objects.create(code="W1", name="Torna")
+        reason = MaintenanceReason.objects.create(code="M1", description="Rulman", category='MECHANICAL')
+        morning = Shift.objects.create(name="Sabah", start_time=time(8), end_time=time(16))
+        evening = Shift.objects.create(name="Akşam", start_time=time(16), end_time=time(0))
+        day = date.today()
+        moment = timezone.make_aware(datetime.combine(day, time(10)))
+        ProductionLog.objects.create(work_center=work_center, planned_duration=240, actual_duration=240, quantity_produced=1)
+        Maintenance.objects.create(work_center=work_center, reason=reason, maintenance_type='REPAIR', downtime_minutes=120, description="Onarım")
+        ProductionLog.objects.update(created_at=moment)
+        Maintenance.objects.update(created_at=moment)
+
+        rows = {row.shift_id: row for row in compute_oee({(work_center.pk, day)})}
+        self.assertEqual(set(rows), {morning.pk, evening.pk})
+        self.assertEqual(rows[morning.pk].availability, Decimal('0.7500'))
+        self.assertEqual(rows[morning.pk].performance, Decimal('0.6667'))
+        self.assertEqual((rows[evening.pk].planned_minutes, rows[evening.pk].oee), (Decimal('480'), Decimal('0')))
+
+
+class RunScenariosCommandTests(TestCase):
+    def test_missing_numpy_is_reported_as_command_error(self):
+        with mock.patch('products.scenarios._numpy', side_effect=ImportError("Senaryo analizi için numpy gerekli")):
+            with self.assertRaisesMessage(CommandError, "numpy"):
+                call_command('run_scenarios', stdout=io.StringIO())
+
+
+@skipUnless(find_spec('numpy'), "numpy kurulu değil")
+class ScenarioModelTests(TestCase):
+    def setUp(self):
+        from .scenarios import Scenario, ScenarioModel
+        self.Scenario, self.ScenarioModel = Scenario, ScenarioModel
+        self.work_center = WorkCenter.objects.create(code="W1", name="Montaj", efficiency_factor=1)
+        self.final = Product.objects.create(name="Mamul", sku="F", product_type='FINAL', stock_quantity=2)
+        self.semi = Product.objects.create(name="Yarı Mamul", sku="S", product_type='SEMI', stock_quantity=5)
+        self.raw = Product.objects.create(name="Hammadde", sku="R", product_type='RAW', min_stock_level=4)
+        final_bom = BOM.objects.create(parent_product=self.final)
+        BOMItem.objects.create(bom=final_bom, child_product=self.semi, quantity=2)
+        BOMItem.objects.create(bom=BOM.objects.create(parent_product=self.semi), child_product=self.raw, quantity=3)
+        Operation.objects.create(bom=final_bom, work_center=self.work_center, step_number=1, description="Montaj", cycle_time=30)
+        SalesOrder.objects.create(customer=Customer.objects.create(name="Müşteri"), product=self.final, quantity=10,
+                                  delivery_date=date.today())
+
+    def expected_shortages(self, demand_factor):
+        # Tek seviyeli MRP sonucu; bileşenlerin talebine ana ürünün eksiği ağaç miktarıyla eklenir.
+        net = calculate_net_requirements()
+        final = replace(net[self.final.pk], open_demand=net[self.final.pk].open_demand * demand_factor).net_requirement
+        semi = replace(net[self.semi.pk], open_demand=net[self.semi.pk].open_demand + final * 2).net_requirement
+        raw = replace(net[self.raw.pk], open_demand=net[self.raw.pk].open_demand + semi * 3).net_requirement
+        return {self.final.pk: final, self.semi.pk: semi, self.raw.pk: raw}
+
+    def test_shortages_match_net_requirements_per_level(self):
+        base, peak = self.ScenarioModel.load(horizon=1).evaluate([
+            self.Scenario("Mevcut"),
+            self.Scenario("Yoğun", demand_factor=1.5, capacity={self.work_center.pk: 0.5}),
+        ])
+        for result, demand_factor in ((base, 1), (peak, Decimal('1.5'))):
+            with self.subTest(scenario=result.name):
+                expected = {pk: float(quantity) for pk, quantity in self.expected_shortages(demand_factor).items()}
+                self.assertEqual(result.shortages, expected)
+
+        # Kapasite 8 saat = 480 dk; yük = mamul eksiği x 30 dk. (8 x 30 = 240, 13 x 30 = 390 > 240)
+        self.assertEqual(base.load[self.work_center.pk], (240.0, 480.0))
+        self.assertEqual(base.overloaded, {})
+        self.assertEqual(peak.load[self.work_center.pk], (390.0, 240.0))
+        self.assertEqual(peak.overloaded, {self.work_center.pk: 390.0 / 240.0})
+
+
+class ProductAPITests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user('personel', password='sifre', is_staff=True))
+        # Sıralamada kullanılabilecek tüm alanları aynı ürünler; sayfa sınırını yalnızca id belirler.
+        self.ids = [Product.objects.create(name="Vida", sku=f"V-{i}", product_type='RAW', price=1).pk for i in range(5)]
+
+    def walk(self, url):
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            seen.extend(row['id'] for row in page['results'])
+            url = page['next']
+        return seen
+
+    def test_pages_with_equal_sort_keys_neither_skip_nor_repeat(self):
+        url = reverse('products:api_products') + '?type=RAW&limit=2'
+        self.assertEqual(self.walk(url), self.ids)
+
+        # Sayfalar arasında eklenen kayıt satır kaydırmaz; sonraki sayfalarda görünür.
+        first = self.client.get(url).json()
+        added = Product.objects.create(name="Vida", sku="V-5", product_type='RAW', price=1).pk
+        self.assertEqual([row['id'] for row in first['results']] + self.walk(first['next']), self.ids + [added])
+
+    def test_unchanged_page_returns_not_modified(self):
+        url = reverse('products:api_products')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        Product.objects.filter(pk=self.ids[0]).update(price=2)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(PRODUCTS_API_TOKEN='gizli')
+    def test_unauthenticated_requests_are_rejected(self):
+        url = reverse('products:api_products')
+        self.client.logout()
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Token yanlis').status_code, 401)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Token gizli').status_code, 200)
+
+        self.client.force_login(get_user_model().objects.create_user('operator', password='sifre'))
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+
+class ExportCSVTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_user('personel', password='sifre', is_staff=True)
+        cls.operator = get_user_model().objects.create_user('operator', password='sifre')
+        cls.product = Product.objects.create(name="Şaft", sku="SAFT-1", price=4)
+        StockTransaction.objects.create(product=cls.product, warehouse=Warehouse.objects.create(name="Ana Depo", warehouse_type='RAW'),
+                                        transaction_type='IN', quantity=5)
+        cls.log = ProductionLog.objects.create(work_center=WorkCenter.objects.create(code="W1", name="Torna"),
+                                               planned_duration=10, actual_duration=12, quantity_produced=3)
+        order = ProductionOrder.objects.create(product=cls.product, planned_quantity=5, start_date=date.today(), due_date=date.today())
+        check = QualityCheck.objects.create(production_order=order, checked_quantity=5, approved_quantity=5, rejected_quantity=0)
+        parameter = QualityParameter.objects.create(product=cls.product, name="Çap", min_value=9, max_value=11)
+        QualityMeasurement.objects.create(quality_check=check, parameter=parameter, measured_value=10)
+
+    def assertExport(self, name, column, expected):
+        """Personel başlık + satırları alır; personel olmayan kullanıcı giriş sayfasına yönlendirilir."""
+        url = reverse('products:export_csv', args=[name])
+        self.client.force_login(self.staff)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        header, *rows = csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig')))
+        self.assertEqual(header, EXPORTS[name].headers)
+        self.assertEqual([row[header.index(column)] for row in rows], expected)
+
+        self.client.force_login(self.operator)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(response.streaming)
+
+    def test_production_logs(self):
+        self.assertExport('production-logs', "Üretim Merkezi", ["W1"])
+
+    def test_stock_transactions(self):
+        self.assertExport('stock-transactions', "Değişim Miktarı", ["5.0000"])
+
+    def test_quality_measurements(self):
+        self.assertExport('quality-measurements', "Ölçülen Değer", ["10.0000"])
+
+    def test_stock_valuation(self):
+        self.assertExport('stock-valuation', "Stok Miktarı", ["5.0000"])
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.main = Warehouse.objects.create(name="Ana Depo", warehouse_type='RAW')
+        self.line = Warehouse.objects.create(name="Hat Deposu", warehouse_type='WIP')
+
+    def movements(self, product):
+        # Çıkış miktarı eksi de girilebilir; yönü hareket tipi belirler.
+        return [
+            StockTransaction(product=product, warehouse=self.main, transaction_type='IN', quantity=10, unit_cost=Decimal('3')),
+            StockTransaction(product=product, warehouse=self.main, transaction_type='OUT', quantity=-4),
+            StockTransaction(product=product, warehouse=self.line, transaction_type='ADJ', quantity=3),
+            StockTransaction(product=product, warehouse=self.line, transaction_type='IN', quantity=5, unit_cost=Decimal('5')),
+            StockTransaction(product=product, warehouse=self.line, transaction_type='SCRAP', quantity=1),
+            StockTransaction(product=product, transaction_type='OUT', quantity=2),
+        ]
+
+    def balances(self, product):
+        return dict(WarehouseStock.objects.filter(product=product).values_list('warehouse_id', 'quantity'))
+
+    def test_bulk_post_matches_per_row_save(self):
+        bulk = Product.objects.create(name="Toplu", sku="T", price=2)
+        single = Product.objects.create(name="Tekil", sku="S", price=2)
+        post_transactions(self.movements(bulk))
+        for stock_transaction in self.movements(single):
+            stock_transaction.save()
+
+        bulk.refresh_from_db()
+        single.refresh_from_db()
+        self.assertEqual(bulk.stock_quantity, Decimal('11'))
+        self.assertEqual((bulk.stock_quantity, bulk.stock_value), (single.stock_quantity, single.stock_value))
+        self.assertEqual(list(bulk.transactions.order_by('pk').values_list('unit_cost', flat=True)),
+                         list(single.transactions.order_by('pk').values_list('unit_cost', flat=True)))
+        # Depo bakiyeleri: Ana depo 10 - 4, hat deposu 3 + 5 - 1. Deposuz çıkış yalnızca toplam stoğu düşer.
+        self.assertEqual(self.balances(bulk), {self.main.pk: Decimal('6'), self.line.pk: Decimal('7')})
+        self.assertEqual(self.balances(single), self.balances(bulk))
+
+    def test_point_in_time_balances_use_snapshot_and_later_movements(self):
+        product = Product.objects.create(name="Ürün", sku="U")
+        today = timezone.localdate()
+        first, second, third = (today - timedelta(days=n) for n in (3, 2, 1))
+        history = [
+            (first, StockTransaction(product=product, warehouse=self.main, transaction_type='IN', quantity=10)),
+            (second, StockTransaction(product=product, warehouse=self.main, transaction_type='OUT', quantity=3)),
+            (second, StockTransaction(product=product, warehouse=self.line, transaction_type='IN', quantity=4)),
+            (third, StockTransaction(product=product, warehouse=self.main, transaction_type='ADJ', quantity=2)),
+            (third, StockTransaction(product=product, warehouse=self.line, transaction_type='SCRAP', quantity=1)),
+        ]
+        post_transactions([stock_transaction for _, stock_transaction in history])
+        for day, stock_transaction in history:
+            StockTransaction.objects.filter(pk=stock_transaction.pk).update(
+                created_at=timezone.make_aware(datetime.combine(day, time(12))))
+
+        self.assertEqual(take_stock_snapshot(second), 2)
+        # Fotoğraf öncesi hareket silinse de sonraki günler fotoğraftan hesaplanır.
+        StockTransaction.objects.filter(pk=history[0][1].pk).delete()
+
+        with self.assertNumQueries(2):
+            self.assertEqual(stock_as_of(product.pk, self.main.pk, third), Decimal('9'))
+        self.assertEqual(stock_as_of(product.pk, self.main.pk, second), Decimal('7'))
+        self.assertEqual(stock_as_of(product.pk, self.main.pk, timezone.make_aware(datetime.combine(third, time(8)))), Decimal('7'))
+        self.assertEqual(stock_as_of(product.pk, self.line.pk, third), Decimal('3'))
+
+        self.assertEqual(warehouse_stock_as_of(third), {(product.pk, self.main.pk): Decimal('9'), (product.pk, self.line.pk): Decimal('3')})
+        self.assertEqual(warehouse_stock_as_of(second, warehouse_id=self.line.pk), {(product.pk, self.line.pk): Decimal('4')})
+        # Fotoğraftan önceki günler yalnızca hareketlerden hesaplanır; silinen giriş artık sayılmaz.
+        self.assertEqual(warehouse_stock_as_of(first), {})
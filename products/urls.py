@@ -0,0 +1,16 @@
+from django.urls import path
+
+from . import api, ingest, views
+
+app_name = 'products'
+
+urlpatterns = [
+    path('export/<slug:name>.csv', views.export_csv, name='export_csv'),
+    # Salt okunur JSON API (products/api.py)
+    path('api/products/', api.product_list, name='api_products'),
+    path('api/boms/', api.bom_list, name='api_boms'),
+    path('api/production-orders/', api.production_order_list, name='api_production_orders'),
+    path('api/stock-transactions/', api.stock_transaction_list, name='api_stock_transactions'),
+    # Saha terminalleri için asenkron üretim kaydı girişi (products/ingest.py)
+    path('api/production-logs/ingest/', ingest.ingest_production_logs, name='api_ingest_production_logs'),
+]
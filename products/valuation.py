@@ -0,0 +1,200 @@
+# Stok Değerleme (FIFO / Hareketli Ortalama)
+# Eskiden stok değeri "güncel fiyat x stok miktarı" idi. Artık her ürünün stok değeri (Product.stock_value) hareket
+# geldikçe artımlı güncellenir:
+#   Hareketli Ortalama: Girişler kendi maliyetiyle eklenir, çıkışlar o anki ortalama maliyetle düşülür.
+#   FIFO: Her giriş bir maliyet katmanıdır (CostLayer). Çıkışlar en eski açık katmandan başlayarak tüketilir.
+# Ay sonu değerlemesi tüm geçmişi oynatmak yerine Product.stock_value alanlarını toplar.
+from collections import deque
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+
+from .models import CostLayer, Product, StockTransaction
+from .stock import SIGNED_QUANTITY
+
+ZERO = Decimal('0')
+COST = Decimal('0.0001')
+
+
+class _ProductState:
+    """Değerleme sırasında bir ürünün bellekteki durumu."""
+
+    def __init__(self, method, quantity, value, price):
+        self.method = method
+        self.quantity = quantity
+        self.value = value
+        self.price = price
+        self.layers = deque()
+
+    @property
+    def average_cost(self):
+        if self.quantity > 0 and self.value > 0:
+            return self.value / self.quantity
+        return self.price
+
+    def _clear_if_empty(self):
+        # Stok sıfırlandığında yuvarlama veya fiyattan değerlenen çıkışlardan kalan değer silinir.
+        if self.quantity == 0:
+            self.value = ZERO
+
+    def receive(self, quantity, unit_cost, source=None):
+        """
+        Giriş: Stok değerine eklenir; FIFO ürünlerde yeni katman açılır. Oluşan katmanı (veya None) döner.
+        Stok eksideyse giriş önce eksi bakiyeyi kapatır; katman yalnızca kalan (eldeki) miktar için açılır.
+        Böylece açık katmanların toplamı her zaman stok miktarına eşittir.
+        """
+        unit_cost = (self.average_cost if unit_cost is None else unit_cost).quantize(COST)
+        covered = min(quantity, max(-self.quantity, ZERO))
+        self.quantity += quantity
+        self.value += quantity * unit_cost
+        self._clear_if_empty()
+        if self.method != 'FIFO' or quantity <= covered:
+            return unit_cost, None
+        remaining = quantity - covered
+        if covered:
+            # Eksi çıkışlar birim fiyattan değerlenmişti; eksi bakiye kapanınca stok değeri açık katmanlara eşitlenir.
+            self.value = remaining * unit_cost
+        layer = CostLayer(product_id=None, source=source, quantity=quantity, remaining_quantity=remaining, unit_cost=unit_cost)
+        self.layers.append(layer)
+        return unit_cost, layer
+
+    def issue(self, quantity, changed_layers):
+        """Çıkış: Maliyeti hesaplanıp stok değerinden düşülür. Birim maliyeti döner."""
+        if self.method == 'FIFO':
+            cost, needed = ZERO, quantity
+            while needed > 0 and self.layers:
+                layer = self.layers[0]
+                used = min(layer.remaining_quantity, needed)
+                layer.remaining_quantity -= used
+                cost += used * layer.unit_cost
+                needed -= used
+                if layer.pk is not None:
+                    changed_layers[layer.pk] = layer
+                if layer.remaining_quantity <= 0:
+                    self.layers.popleft()
+            # Katmanlar yetmezse (eksi stok) kalan miktar birim fiyatla değerlenir.
+            cost += needed * self.price
+        else:
+            cost = quantity * self.average_cost
+        cost = cost.quantize(COST)
+        self.quantity -= quantity
+        self.value -= cost
+        self._clear_if_empty()
+        return (cost / quantity).quantize(COST) if quantity else ZERO
+
+
+class ValuationPlan:
+    """plan_valuation sonucu: Hareketler kaydedildikten sonra save() ile katmanlar ve stok değerleri yazılır."""
+
+    def __init__(self, states, new_layers, changed_layers):
+        self.states = states
+        self.new_layers = new_layers
+        self.changed_layers = changed_layers
+
+    def save(self, batch_size=1000):
+        # Katmanların kaynak hareketleri bu noktada kaydedilmiş olmalıdır; source_id kayıt sırasında hareketten alınır.
+        CostLayer.objects.bulk_create(self.new_layers, batch_size=batch_size)
+        CostLayer.objects.bulk_update(list(self.changed_layers.values()), ['remaining_quantity'], batch_size=batch_size)
+        Product.objects.bulk_update(
+            [Product(pk=pk, stock_value=state.value.quantize(COST)) for pk, state in self.states.items()],
+            ['stock_value'], batch_size=batch_size,
+        )
+
+
+def _load_states(product_ids):
+    """Ürünlerin değerleme durumunu ve FIFO ürünlerin açık katmanlarını okur. Ürün satırları işlem sonuna kadar kilitlenir."""
+    states = {
+        pk: _ProductState(method, quantity, value, price)
+        for pk, method, quantity, value, price in Product.objects.select_for_update().filter(pk__in=product_ids)
+        .values_list('pk', 'valuation_method', 'stock_quantity', 'stock_value', 'price')
+    }
+    fifo_ids = [pk for pk, state in states.items() if state.method == 'FIFO']
+    if fifo_ids:
+        layers = CostLayer.objects.select_for_update().filter(product_id__in=fifo_ids, remaining_quantity__gt=0).order_by('product_id', 'id')
+        for layer in layers:
+            states[layer.product_id].layers.append(layer)
+    return states
+
+
+def plan_valuation(transactions):
+    """
+    Henüz kaydedilmemiş hareketlerin maliyetini sırayla hesaplar ve hareketlerin unit_cost alanını doldurur.
+    Stok miktarı değişmeden önce çağrılmalıdır. Dönen plan, hareketler kaydedildikten sonra save() ile yazılır.
+    """
+    transactions = list(transactions)
+    states = _load_states({t.product_id for t in transactions})
+    new_layers, changed_layers = [], {}
+
+    for stock_transaction in transactions:
+        state = states[stock_transaction.product_id]
+        delta = stock_transaction.signed_quantity
+        if delta > 0:
+            stock_transaction.unit_cost, layer = state.receive(delta, stock_transaction.unit_cost, source=stock_transaction)
+            if layer is not None:
+                layer.product_id = stock_transaction.product_id
+                new_layers.append(layer)
+        elif delta < 0:
+            stock_transaction.unit_cost = state.issue(-delta, changed_layers)
+    return ValuationPlan(states, new_layers, changed_layers)
+
+
+def rebuild_valuation(product_ids=None, chunk_size=500, batch_size=1000):
+    """
+    Stok değerlerini ve FIFO katmanlarını hareket geçmişinden baştan oluşturur. (İlk kurulum veya yöntem değişikliği için)
+    Hareketlerle açıklanamayan başlangıç stoğu, birim fiyattan açılış bakiyesi olarak alınır.
+    Ürünler parça parça işlenir; bellekte bir parçanın hareketleri tutulur.
+    """
+    products = Product.objects.order_by('pk')
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+    ids = list(products.values_list('pk', flat=True))
+
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        with transaction.atomic():
+            rows = Product.objects.select_for_update().filter(pk__in=chunk).values_list('pk', 'valuation_method', 'stock_quantity', 'price')
+            movements = dict(StockTransaction.objects.filter(product_id__in=chunk).values_list('product_id')
+                             .annotate(total=Sum(SIGNED_QUANTITY)).order_by())
+            states = {}
+            new_layers = []
+            for pk, method, quantity, price in rows:
+                state = states[pk] = _ProductState(method, ZERO, ZERO, price)
+                opening = quantity - (movements.get(pk) or ZERO)
+                if opening > 0:
+                    _, layer = state.receive(opening, price)
+                    if layer is not None:
+                        layer.product_id = pk
+                        new_layers.append(layer)
+
+            CostLayer.objects.filter(product_id__in=chunk).delete()
+            updated = []
+            transactions = StockTransaction.objects.filter(product_id__in=chunk).order_by('product_id', 'id').only(
+                'pk', 'product_id', 'quantity', 'transaction_type', 'unit_cost')
+            for stock_transaction in transactions.iterator(chunk_size=batch_size):
+                state = states[stock_transaction.product_id]
+                delta = stock_transaction.signed_quantity
+                if delta > 0:
+                    # Girişin elle girilmiş maliyeti korunur.
+                    stock_transaction.unit_cost, layer = state.receive(delta, stock_transaction.unit_cost, source=stock_transaction)
+                    if layer is not None:
+                        layer.product_id = stock_transaction.product_id
+                        new_layers.append(layer)
+                elif delta < 0:
+                    stock_transaction.unit_cost = state.issue(-delta, {})
+                updated.append(stock_transaction)
+                if len(updated) >= batch_size:
+                    StockTransaction.objects.bulk_update(updated, ['unit_cost'], batch_size=batch_size)
+                    updated = []
+            StockTransaction.objects.bulk_update(updated, ['unit_cost'], batch_size=batch_size)
+
+            ValuationPlan(states, [layer for layer in new_layers if layer.remaining_quantity > 0], {}).save(batch_size)
+    return len(ids)
+
+
+def inventory_value(product_ids=None):
+    """Toplam stok değeri. (Ay sonu değerlemesi; tek toplama sorgusu)"""
+    products = Product.objects.all()
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+    return products.aggregate(total=Sum('stock_value'))['total'] or ZERO
@@ -1,3 +1,29 @@
-from django.shortcuts import render
+from datetime import date
 
-# Create your views here.
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from .exports import EXPORTS, csv_lines, export_rows
+
+
+def _date_param(request, name):
+    value = request.GET.get(name)
+    return date.fromisoformat(value) if value else None
+
+
+# CSV DIŞA AKTARIM: /products/export/<ad>.csv?from=YYYY-AA-GG&to=YYYY-AA-GG
+# Yanıt satır satır üretilir (StreamingHttpResponse); ilk baytlar sorgu başlar başlamaz gönderilir.
+@require_GET
+@staff_member_required
+def export_csv(request, name):
+    if name not in EXPORTS:
+        raise Http404("Tanımsız dışa aktarım.")
+    try:
+        start, end = _date_param(request, 'from'), _date_param(request, 'to')
+    except ValueError:
+        return HttpResponseBadRequest("Tarihler YYYY-AA-GG biçiminde olmalı.")
+
+    response = StreamingHttpResponse(csv_lines(export_rows(name, start, end)), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{EXPORTS[name].filename}.csv"'
+    return response